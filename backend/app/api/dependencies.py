@@ -1,26 +1,26 @@
 """
 Authentication API Dependencies
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session, select
+from typing import Optional
 from uuid import UUID
 
 from app.core import get_session
+from app.core.database import get_engine
 from app.core.security import decode_token
 from app.models import User
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
+def user_from_token(token: str, session: Session, token_type: str = "access") -> User:
     """
-    Dependency to get the current authenticated user
+    Resolve an access token (or another `token_type`) to an active user
     """
-    token = credentials.credentials
     payload = decode_token(token)
     
     if not payload:
@@ -29,7 +29,7 @@ async def get_current_user(
             detail="Could not validate credentials"
         )
     
-    if payload.get("type") != "access":
+    if payload.get("type") != token_type:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token type"
@@ -68,6 +68,56 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: Session = Depends(get_session)
+) -> User:
+    """
+    Dependency to get the current authenticated user
+    """
+    return user_from_token(credentials.credentials, session)
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    session: Session = Depends(get_session)
+) -> Optional[User]:
+    """
+    Dependency for endpoints open to guests - the user when a bearer token
+    is sent, otherwise None
+    """
+    if not credentials:
+        return None
+    return user_from_token(credentials.credentials, session)
+
+
+async def get_stream_user(
+    ticket: Optional[str] = Query(
+        None, description="Stream ticket, for clients that cannot send headers (EventSource)"
+    ),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> User:
+    """
+    Dependency for long-lived streams - authenticates with a short-lived
+    session so the stream does not hold a pooled connection while open.
+    Takes the access token from the Authorization header, or a stream
+    ticket (never an access token) from the query string.
+    """
+    if not credentials and not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    
+    def load_user() -> User:
+        with Session(get_engine()) as session:
+            if credentials:
+                return user_from_token(credentials.credentials, session)
+            return user_from_token(ticket, session, token_type="stream")
+    
+    return await run_in_threadpool(load_user)
+
+
 async def get_current_superuser(
     current_user: User = Depends(get_current_user)
 ) -> User:
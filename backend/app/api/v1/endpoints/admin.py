@@ -0,0 +1,169 @@
+"""
+Admin Endpoints - Dashboard statistics, maintenance jobs, archive, exports and profiling
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlmodel import Session
+
+from app.core import get_session
+from app.core.config import settings
+from app.core.profiling import list_profiles, profile_path
+from app.core.security import create_profile_token
+from app.services.archive import ARCHIVE_KINDS, query_archive
+from app.services.exports import EXPORT_KINDS, EXPORT_FORMATS, stream_export
+from app.models import User
+from app.schemas import AdminStatsResponse, ProfileTokenResponse, ProfileInfo
+from app.api.dependencies import get_current_superuser
+from app.services.analytics import read_dashboard
+from app.services.feeds import build_feeds
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=AdminStatsResponse)
+async def get_stats(
+    days: int = Query(30, ge=1, le=366, description="Window for quote and order stats"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Quote and order statistics plus revenue per category (Admin only)
+    
+    Read from the incrementally maintained rollup tables, so the cost
+    depends on the window size, not on the number of quotes and orders.
+    """
+    return read_dashboard(session, days)
+
+
+@router.post("/feeds/rebuild", response_model=dict)
+async def rebuild_feeds(
+    full: bool = Query(False, description="Regenerate every shard instead of only changed ones"),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Regenerate sitemaps and product feeds now (Admin only)
+    """
+    summary = await run_in_threadpool(build_feeds, session, full)
+    
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A feed build is already running"
+        )
+    
+    return summary
+
+
+@router.get("/archive/{kind}", response_model=list[dict])
+async def search_archive(
+    kind: str,
+    start: Optional[date] = Query(None, description="Created on or after"),
+    end: Optional[date] = Query(None, description="Created on or before"),
+    number: Optional[str] = Query(None, description="Quote or order number"),
+    email: Optional[str] = Query(None, description="Contact email (quotes)"),
+    user_id: Optional[UUID] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Search archived quotes or orders in cold storage, newest first (Admin only)
+    """
+    if kind not in ARCHIVE_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown archive: {kind}"
+        )
+    
+    return await run_in_threadpool(query_archive, kind, start, end, number, email, user_id, limit)
+
+
+@router.post("/profiles/token", response_model=ProfileTokenResponse)
+async def issue_profile_token(
+    minutes: int = Query(15, ge=1, le=settings.PROFILE_TOKEN_MAX_MINUTES),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Issue a short-lived token that profiles the requests carrying it (Admin only)
+    
+    Send it as the `X-Profile-Token` header (with PROFILING_ENABLED set);
+    the response's `X-Profile-Id` names the stored profile.
+    """
+    expires_delta = timedelta(minutes=minutes)
+    
+    return ProfileTokenResponse(
+        token=create_profile_token({"sub": str(current_user.id)}, expires_delta),
+        header="X-Profile-Token",
+        expires_at=datetime.utcnow() + expires_delta
+    )
+
+
+@router.get("/profiles", response_model=list[ProfileInfo])
+async def get_profiles(
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Stored request profiles, newest first (Admin only)
+    """
+    return await run_in_threadpool(list_profiles)
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Download a profile in speedscope format - open it at https://www.speedscope.app (Admin only)
+    """
+    path = profile_path(profile_id)
+    
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
+
+
+@router.get("/exports/{kind}")
+async def export_records(
+    kind: str,
+    format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    since: Optional[datetime] = Query(
+        None, description="X-Export-Watermark of a previous export (omit for everything)"
+    ),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Stream orders, order items or quotes as Parquet or an Arrow IPC stream (Admin only)
+    
+    The `X-Export-Watermark` header of the response is the `since` for the
+    next incremental export. Incremental exports can repeat a few rows from
+    the previous one; keep the latest version of each id.
+    """
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export: {kind}"
+        )
+    
+    # Taken before reading so rows changed during the export are in the next one
+    watermark = datetime.utcnow()
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"{kind}-{watermark:%Y%m%dT%H%M%S}.{extension}"
+    
+    return StreamingResponse(
+        stream_export(kind, format, since),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Watermark": watermark.isoformat(),
+        }
+    )
@@ -2,13 +2,17 @@
 Authentication Endpoints - User registration and login
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
-from datetime import datetime
+from datetime import datetime, timedelta
+from uuid import UUID
 
+from app.core.config import settings
 from app.core import get_session, hash_password, verify_password, create_access_token
-from app.core.security import create_refresh_token
+from app.core.security import create_refresh_token, decode_token
+from app.core.revocation import revocation_index, token_key, family_key
 from app.models import User
-from app.schemas import UserCreate, UserLogin, UserResponse, Token, Message
+from app.schemas import UserCreate, UserLogin, UserResponse, Token, Message, RefreshRequest
 from app.api.dependencies import get_current_user
 
 router = APIRouter()
@@ -81,6 +85,140 @@ async def login(
     )
 
 
+def decode_refresh_token(refresh_token: str) -> dict:
+    """
+    Decode a refresh token issued with a token id and family
+    """
+    payload = decode_token(refresh_token)
+    
+    if not payload or payload.get("type") != "refresh":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    if not payload.get("jti") or not payload.get("fam") or not payload.get("sub"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token is no longer supported, please log in again"
+        )
+    
+    return payload
+
+
+def revoke_family(session: Session, payload: dict, reason: str) -> None:
+    """
+    Revoke every token rotated from the same login
+    """
+    key = family_key(payload["fam"])
+    
+    if revocation_index.is_revoked(session, key):
+        return
+    
+    # Tokens rotated after the presented one expire later than it does, but
+    # none outlives a full refresh lifetime from now
+    revocation_index.revoke(
+        session,
+        key,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        reason=reason,
+        user_id=UUID(payload["sub"])
+    )
+    
+    try:
+        session.commit()
+    except IntegrityError:
+        # Revoked concurrently
+        session.rollback()
+        return
+    
+    revocation_index.announce([key])
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    request: RefreshRequest,
+    session: Session = Depends(get_session)
+):
+    """
+    Exchange a refresh token for a new token pair (rotation)
+    
+    Each refresh token can be used once. Presenting an already used token
+    means it leaked, so its whole family is revoked.
+    """
+    payload = decode_refresh_token(request.refresh_token)
+    
+    if revocation_index.is_revoked(session, family_key(payload["fam"])):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked"
+        )
+    
+    reuse_detected = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token has already been used"
+    )
+    
+    if revocation_index.is_revoked(session, token_key(payload["jti"])):
+        revoke_family(session, payload, reason="reuse")
+        raise reuse_detected
+    
+    try:
+        user = session.get(User, UUID(payload["sub"]))
+    except ValueError:
+        user = None
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    
+    # Retire the presented token
+    revocation_index.revoke(
+        session,
+        token_key(payload["jti"]),
+        expires_at=datetime.utcfromtimestamp(payload["exp"]),
+        reason="rotated",
+        user_id=user.id
+    )
+    
+    try:
+        session.commit()
+    except IntegrityError:
+        # The same token was rotated concurrently - treat as reuse
+        session.rollback()
+        revoke_family(session, payload, reason="reuse")
+        raise reuse_detected
+    
+    revocation_index.announce([token_key(payload["jti"])])
+    
+    return Token(
+        access_token=create_access_token(data={"sub": str(user.id)}),
+        refresh_token=create_refresh_token(data={"sub": str(user.id)}, family=payload["fam"])
+    )
+
+
+@router.post("/logout", response_model=Message)
+async def logout(
+    request: RefreshRequest,
+    session: Session = Depends(get_session)
+):
+    """
+    Revoke a refresh token and every token rotated from it
+    """
+    payload = decode_refresh_token(request.refresh_token)
+    revoke_family(session, payload, reason="logout")
+    
+    return Message(message="Logged out successfully")
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_me(
     current_user: User = Depends(get_current_user)
@@ -1,7 +1,7 @@
 """
 Category Endpoints - Manage product categories
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session, select
 from datetime import datetime
 from slugify import slugify
@@ -9,8 +9,12 @@ from uuid import UUID
 
 from app.core import get_session
 from app.models import Category, User
-from app.schemas import CategoryCreate, CategoryUpdate, CategoryResponse
+from app.schemas import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryTreeNode
 from app.api.dependencies import get_current_superuser
+from app.services.catalog import category_changed
+from app.services.category_tree import category_tree, validate_parent, move_category
+from app.services.rows import select_category_rows, category_rows, RowsResponse
+from app.services.sync import next_change_seq
 
 router = APIRouter()
 
@@ -23,15 +27,25 @@ async def list_categories(
     """
     List all categories
     """
-    statement = select(Category)
+    statement = select_category_rows()
     
     if not include_inactive:
         statement = statement.where(Category.is_active == True)
     
     statement = statement.order_by(Category.sort_order)
     
-    categories = session.exec(statement).all()
-    return categories
+    return RowsResponse(content=category_rows(session, statement))
+
+
+@router.get("/tree", response_model=list[CategoryTreeNode])
+async def get_category_tree(
+    session: Session = Depends(get_session)
+):
+    """
+    Active categories nested under their parents (served from a cached,
+    pre-encoded tree)
+    """
+    return Response(content=category_tree.get(session)["json"], media_type="application/json")
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
@@ -73,6 +87,14 @@ async def create_category(
             detail="Category with this name already exists"
         )
     
+    try:
+        validate_parent(session, None, category_data.parent_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     category = Category(
         **category_data.model_dump(),
         slug=slug
@@ -82,6 +104,8 @@ async def create_category(
     session.commit()
     session.refresh(category)
     
+    category_changed(category)
+    
     return category
 
 
@@ -109,6 +133,16 @@ async def update_category(
     if "name" in update_dict:
         update_dict["slug"] = slugify(update_dict["name"])
     
+    # Re-parenting rewrites the paths of the whole subtree
+    if "parent_id" in update_dict:
+        try:
+            move_category(session, category, update_dict.pop("parent_id"), next_change_seq(session))
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
     for key, value in update_dict.items():
         setattr(category, key, value)
     
@@ -118,4 +152,6 @@ async def update_category(
     session.commit()
     session.refresh(category)
     
+    category_changed(category)
+    
     return category
@@ -1,38 +1,67 @@
 """
 Product Endpoints - CRUD operations for products
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
+from fastapi.responses import JSONResponse
+from sqlalchemy import case, update
 from sqlmodel import Session, select, func
 from typing import Optional
 from datetime import datetime
+from decimal import Decimal
 from slugify import slugify
-import os
 from uuid import UUID, uuid4
 
 from app.core import get_session
-from app.models import Product, Category, User
-from app.schemas import ProductCreate, ProductUpdate, ProductResponse, PaginatedResponse
+from app.models import Product, Category, User, ProductRecommendation
+from app.schemas import (
+    ProductCreate, ProductUpdate, ProductResponse, PaginatedResponse, FacetedProductResponse,
+    SuggestionResponse, ProductBulkUpdate, ProductBulkResult, RelatedProductResponse
+)
 from app.api.dependencies import get_current_superuser
+from app.services.facets import (
+    product_facets, apply_facet_delta, read_facet_counts, price_bucket_range, matched_facet_counts
+)
+from app.services.suggest import suggest_index
+from app.services.catalog import product_changed, catalog_reloaded
+from app.services.category_tree import category_tree, subtree_condition
+from app.services.attributes import AttributeFilters, parse_spec_params, apply_attribute_filters
+from app.services.projection import resolve_fields, projection_columns, project_row
+from app.services.recommendations import RECOMMENDATION_KINDS
+from app.services.sync import next_change_seq
+from app.services.rows import select_product_rows, product_rows, RowsResponse
+
+FIELDS_DESCRIPTION = (
+    "Comma separated product fields and/or preset views (card, detail) to return "
+    "instead of the full product"
+)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=list[ProductResponse])
-async def list_products(
-    session: Session = Depends(get_session),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
+def subtree_path(session: Session, category_id: Optional[UUID], include_subcategories: bool) -> Optional[str]:
+    if not (category_id and include_subcategories):
+        return None
+    return category_tree.path_of(session, category_id)
+
+
+def filter_products(
+    statement,
     category_id: Optional[UUID] = None,
     is_featured: Optional[bool] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    category_path: Optional[str] = None
 ):
     """
-    List all active products with optional filtering
+    Apply the common product list filters to a select statement.
+    With category_path, products anywhere in that category's subtree match.
     """
-    statement = select(Product).where(Product.is_active == True)
+    statement = statement.where(Product.is_active == True)
     
-    # Apply filters
-    if category_id:
+    if category_path:
+        statement = statement.where(
+            Product.category_id.in_(select(Category.id).where(subtree_condition(category_path)))
+        )
+    elif category_id:
         statement = statement.where(Product.category_id == category_id)
     
     if is_featured is not None:
@@ -44,21 +73,170 @@ async def list_products(
             Product.description.ilike(f"%{search}%")
         )
     
+    return statement
+
+
+def attribute_filters(
+    request: Request,
+    feature: Optional[list[str]] = Query(
+        None, description="Only products listing this feature (repeatable)"
+    )
+) -> AttributeFilters:
+    """
+    Dependency collecting `spec.<key>=<value>` and `feature=` filters
+    """
+    try:
+        specs = parse_spec_params(request.query_params)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    
+    return AttributeFilters(specs=specs, features=feature or [])
+
+
+def filter_attributes(statement, attributes: AttributeFilters, session: Session):
+    """
+    Apply specification / feature filters for the session's database
+    """
+    return apply_attribute_filters(statement, attributes, session.get_bind().dialect.name)
+
+
+def parse_fields(fields: str) -> list[str]:
+    """
+    Resolve the `fields` query parameter or fail with 400
+    """
+    try:
+        return resolve_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+
+
+def select_projection(names: list[str]):
+    """
+    Select only the columns behind the requested fields
+    """
+    statement = select(*projection_columns(names))
+    
+    if "category" in names:
+        statement = statement.select_from(Product).outerjoin(Category, Product.category_id == Category.id)
+    
+    return statement
+
+
+@router.get("/", response_model=list[ProductResponse])
+async def list_products(
+    session: Session = Depends(get_session),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[UUID] = None,
+    include_subcategories: bool = False,
+    is_featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    attributes: AttributeFilters = Depends(attribute_filters)
+):
+    """
+    List all active products with optional filtering
+    (including `spec.<key>=<value>` and `feature=<value>`)
+    """
+    category_path = subtree_path(session, category_id, include_subcategories)
+    
+    if fields:
+        names = parse_fields(fields)
+        statement = filter_products(select_projection(names), category_id, is_featured, search, category_path)
+        statement = filter_attributes(statement, attributes, session)
+        rows = session.execute(statement.offset(skip).limit(limit)).all()
+        return JSONResponse(content=[project_row(row, names) for row in rows])
+    
+    statement = filter_products(select_product_rows(), category_id, is_featured, search, category_path)
+    statement = filter_attributes(statement, attributes, session)
+    
     # Pagination
     statement = statement.offset(skip).limit(limit)
     
-    products = session.exec(statement).all()
-    return products
+    return RowsResponse(content=product_rows(session, statement))
+
+
+@router.get("/faceted", response_model=FacetedProductResponse)
+async def list_products_faceted(
+    session: Session = Depends(get_session),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    category_id: Optional[UUID] = None,
+    include_subcategories: bool = False,
+    is_featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    price_bucket: Optional[str] = Query(None, pattern=r"^\d+(-\d+|\+)$"),
+    in_stock: Optional[bool] = None,
+    attributes: AttributeFilters = Depends(attribute_filters)
+):
+    """
+    List active products together with precomputed facet counts
+    (per category, price bucket and stock status)
+    """
+    category_path = subtree_path(session, category_id, include_subcategories)
+    statement = filter_products(select(Product), category_id, is_featured, search, category_path)
+    statement = filter_attributes(statement, attributes, session)
+    
+    if price_bucket:
+        lower, upper = price_bucket_range(price_bucket)
+        statement = statement.where(Product.price >= lower)
+        if upper is not None:
+            statement = statement.where(Product.price < upper)
+    
+    if in_stock is not None:
+        statement = statement.where((Product.stock > 0) if in_stock else (Product.stock == 0))
+    
+    statement = statement.offset(skip).limit(limit)
+    
+    return FacetedProductResponse(
+        items=session.exec(statement).all(),
+        facets=read_facet_counts(session)
+    )
+
+
+@router.get("/suggest", response_model=list[SuggestionResponse])
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=25)
+):
+    """
+    Typeahead suggestions over product names, SKUs and category names,
+    served from the in-memory prefix index (empty until it has loaded)
+    """
+    if not suggest_index.loaded:
+        suggest_index.schedule_load()
+        return []
+    
+    return suggest_index.suggest(q, limit)
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: UUID,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Get a single product by ID
     """
+    if fields:
+        names = parse_fields(fields)
+        row = session.execute(select_projection(names).where(Product.id == product_id)).first()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        
+        return JSONResponse(content=project_row(row, names))
+    
     product = session.get(Product, product_id)
     
     if not product:
@@ -70,6 +248,45 @@ async def get_product(
     return product
 
 
+@router.get("/{product_id}/related", response_model=list[RelatedProductResponse])
+async def get_related_products(
+    product_id: UUID,
+    kind: Optional[str] = Query(
+        None,
+        pattern=f"^({'|'.join(RECOMMENDATION_KINDS)})$",
+        description="bought_together or similar (default: both)"
+    ),
+    limit: int = Query(8, ge=1, le=50),
+    session: Session = Depends(get_session)
+):
+    """
+    Get precomputed related products - frequently bought together first,
+    then similar products from the same category
+    """
+    statement = (
+        select(
+            Product.id, Product.name, Product.slug, Product.price, Product.image_url,
+            ProductRecommendation.kind, ProductRecommendation.score
+        )
+        .join(ProductRecommendation, ProductRecommendation.related_id == Product.id)
+        .where(ProductRecommendation.product_id == product_id, Product.is_active == True)
+        .order_by(ProductRecommendation.kind, ProductRecommendation.rank)
+    )
+    
+    if kind:
+        statement = statement.where(ProductRecommendation.kind == kind)
+    
+    related = []
+    seen = set()
+    
+    for row in session.execute(statement):
+        if row.id not in seen:
+            seen.add(row.id)
+            related.append(row._asdict())
+    
+    return related[:limit]
+
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
@@ -94,9 +311,12 @@ async def create_product(
     )
     
     session.add(product)
+    apply_facet_delta(session, [], product_facets(product))
     session.commit()
     session.refresh(product)
     
+    product_changed(product)
+    
     return product
 
 
@@ -125,18 +345,90 @@ async def update_product(
     if "name" in update_dict:
         update_dict["slug"] = slugify(update_dict["name"])
     
+    facets_before = product_facets(product)
+    
     for key, value in update_dict.items():
         setattr(product, key, value)
     
     product.updated_at = datetime.utcnow()
     
     session.add(product)
+    apply_facet_delta(session, facets_before, product_facets(product))
     session.commit()
     session.refresh(product)
     
+    product_changed(product)
+    
     return product
 
 
+@router.post("/bulk", response_model=ProductBulkResult)
+async def bulk_update_products(
+    bulk_data: ProductBulkUpdate,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Apply the same changes to many products at once (Admin only)
+    
+    Runs as a single UPDATE in one transaction; facet counts are adjusted
+    by the batch's delta and catalog caches are refreshed once.
+    """
+    if bulk_data.move_to_category_id and not session.get(Category, bulk_data.move_to_category_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+    
+    conditions = []
+    
+    if bulk_data.ids is not None:
+        conditions.append(Product.id.in_(bulk_data.ids))
+    if bulk_data.category_id:
+        conditions.append(Product.category_id == bulk_data.category_id)
+    if bulk_data.is_active is not None:
+        conditions.append(Product.is_active == bulk_data.is_active)
+    if bulk_data.is_featured is not None:
+        conditions.append(Product.is_featured == bulk_data.is_featured)
+    
+    # Taking the version locks out other catalog writers until commit,
+    # so the rows counted here are the rows the UPDATE changes
+    change_seq = next_change_seq(session)
+    values = {"updated_at": datetime.utcnow(), "change_seq": change_seq}
+    facets_before = matched_facet_counts(session, *conditions)
+    
+    if bulk_data.set_stock is not None:
+        values["stock"] = bulk_data.set_stock
+    elif bulk_data.adjust_stock is not None:
+        adjusted = Product.stock + bulk_data.adjust_stock
+        values["stock"] = case((adjusted < 0, 0), else_=adjusted)
+    
+    if bulk_data.price_change_percent is not None:
+        factor = 1 + Decimal(str(bulk_data.price_change_percent)) / 100
+        values["price"] = func.round(Product.price * factor, 2)
+    
+    if bulk_data.activate is not None:
+        values["is_active"] = bulk_data.activate
+    
+    if bulk_data.move_to_category_id:
+        values["category_id"] = bulk_data.move_to_category_id
+    
+    result = session.execute(
+        update(Product).where(*conditions).values(**values).execution_options(synchronize_session=False)
+    )
+    
+    if result.rowcount:
+        # The version marks exactly the rows this transaction updated
+        apply_facet_delta(session, facets_before, matched_facet_counts(session, Product.change_seq == change_seq))
+    
+    session.commit()
+    
+    if result.rowcount:
+        catalog_reloaded()
+    
+    return ProductBulkResult(updated=result.rowcount)
+
+
 @router.delete("/{product_id}", response_model=dict)
 async def delete_product(
     product_id: UUID,
@@ -154,12 +446,17 @@ async def delete_product(
             detail="Product not found"
         )
     
+    facets_before = product_facets(product)
+    
     product.is_active = False
     product.updated_at = datetime.utcnow()
     
     session.add(product)
+    apply_facet_delta(session, facets_before, [])
     session.commit()
     
+    product_changed(product)
+    
     return {"message": "Product deleted successfully"}
 
 
@@ -181,25 +478,21 @@ async def upload_product_image(
             detail="Product not found"
         )
     
-    # Create uploads directory
-    upload_dir = "uploads/products"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = file.filename.split(".")[-1]
-    filename = f"{product_id}_{uuid4().hex[:8]}.{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Upload handling is loaded on first use
+    from app.core.uploads import save_upload, UploadRejected
     
-    # Update product
-    product.image_url = f"/uploads/products/{filename}"
+    try:
+        product.image_url = await save_upload(file, "products", str(product_id))
+    except UploadRejected as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.detail
+        )
     product.updated_at = datetime.utcnow()
     
     session.add(product)
     session.commit()
     
+    product_changed(product)
+    
     return {"image_url": product.image_url}
@@ -2,18 +2,30 @@
 Quote Endpoints - Handle quote requests
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlmodel import Session, select
-from datetime import datetime
-from uuid import UUID, uuid4
-import os
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
 
 from app.core import get_session
+from app.core.config import settings
+from app.core.security import create_stream_ticket
 from app.models import Quote, User,  QuoteStatus
-from app.schemas import QuoteCreate, QuoteResponse, QuoteUpdateStatus
-from app.api.dependencies import get_current_user, get_current_superuser
+from app.schemas import QuoteCreate, QuoteResponse, QuoteUpdateStatus, StreamTicketResponse
+from app.api.dependencies import get_current_user, get_current_superuser, get_optional_user, get_stream_user
+from app.core.streams import event_hub, stream_events
+from app.services.analytics import quote_created, quote_status_changed
+from app.services.quote_events import (
+    ADMIN_CHANNEL, user_channel, publish_quote_created, publish_quote_status
+)
+from app.services.rows import select_quote_rows, quote_rows, RowsResponse
 
 router = APIRouter()
 
+QUOTE_NUMBER_ATTEMPTS = 3
+
 
 def generate_quote_number() -> str:
     """Generate a unique quote number"""
@@ -26,21 +38,32 @@ def generate_quote_number() -> str:
 async def create_quote(
     quote_data: QuoteCreate,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user) if False else None
+    current_user: Optional[User] = Depends(get_optional_user)
 ):
     """
     Submit a new quote request (authenticated or guest)
     """
-    quote = Quote(
-        **quote_data.model_dump(),
-        quote_number=generate_quote_number(),
-        user_id=current_user.id if current_user else None
-    )
-    
-    session.add(quote)
-    session.commit()
+    # The number is claimed in record_numbers on flush; retry on a collision
+    for attempt in range(QUOTE_NUMBER_ATTEMPTS):
+        quote = Quote(
+            **quote_data.model_dump(),
+            quote_number=generate_quote_number(),
+            user_id=current_user.id if current_user else None
+        )
+        
+        try:
+            session.add(quote)
+            quote_created(session, quote)
+            session.commit()
+            break
+        except IntegrityError:
+            session.rollback()
+            if attempt == QUOTE_NUMBER_ATTEMPTS - 1:
+                raise
     session.refresh(quote)
     
+    publish_quote_created(quote)
+    
     # TODO: Send email notification to admin
     
     return quote
@@ -54,9 +77,8 @@ async def get_my_quotes(
     """
     Get all quotes for the current user
     """
-    statement = select(Quote).where(Quote.user_id == current_user.id).order_by(Quote.created_at.desc())
-    quotes = session.exec(statement).all()
-    return quotes
+    statement = select_quote_rows().where(Quote.user_id == current_user.id).order_by(Quote.created_at.desc())
+    return RowsResponse(content=quote_rows(session, statement))
 
 
 @router.get("/admin/quotes", response_model=list[QuoteResponse])
@@ -68,13 +90,63 @@ async def list_all_quotes(
     """
     List all quotes (Admin only)
     """
-    statement = select(Quote).order_by(Quote.created_at.desc())
+    statement = select_quote_rows().order_by(Quote.created_at.desc())
     
     if status:
         statement = statement.where(Quote.status == status)
     
-    quotes = session.exec(statement).all()
-    return quotes
+    return RowsResponse(content=quote_rows(session, statement))
+
+
+@router.post("/events/ticket", response_model=StreamTicketResponse)
+async def issue_stream_ticket(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Issue a short-lived ticket for opening the quote event stream
+    
+    EventSource cannot send an Authorization header; pass the ticket as
+    `?ticket=` instead of the access token, which would end up in access logs.
+    """
+    expires_delta = timedelta(seconds=settings.SSE_TICKET_EXPIRE_SECONDS)
+    
+    return StreamTicketResponse(
+        ticket=create_stream_ticket({"sub": str(current_user.id)}, expires_delta),
+        expires_at=datetime.utcnow() + expires_delta
+    )
+
+
+@router.get("/events")
+async def quote_events(
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    Live quote updates as server-sent events
+    
+    Customers receive `quote_status` events for their own quotes; admins also
+    receive `quote_created` for every new quote. On a `resync` event the client
+    should refetch its quotes. Clients that cannot set an Authorization
+    header (EventSource) pass a ticket from `POST /events/ticket` as `?ticket=`.
+    """
+    if event_hub.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams, please retry shortly"
+        )
+    
+    channels = [user_channel(current_user.id)]
+    if current_user.is_superuser:
+        channels.append(ADMIN_CHANNEL)
+    
+    return StreamingResponse(
+        stream_events(event_hub, channels),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+        }
+    )
 
 
 @router.get("/{quote_id}", response_model=QuoteResponse)
@@ -122,6 +194,7 @@ async def update_quote_status(
             detail="Quote not found"
         )
     
+    previous_status = quote.status
     quote.status = status_data.status
     
     if status_data.admin_response:
@@ -134,9 +207,12 @@ async def update_quote_status(
     quote.updated_at = datetime.utcnow()
     
     session.add(quote)
+    quote_status_changed(session, quote, previous_status)
     session.commit()
     session.refresh(quote)
     
+    publish_quote_status(quote)
+    
     # TODO: Send email notification to customer
     
     return quote
@@ -159,21 +235,16 @@ async def upload_quote_logo(
             detail="Quote not found"
         )
     
-    # Create uploads directory
-    upload_dir = "uploads/quotes"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Save file
-    file_extension = file.filename.split(".")[-1]
-    filename = f"{quote_id}_{uuid4().hex[:8]}.{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
+    # Upload handling is loaded on first use
+    from app.core.uploads import save_upload, UploadRejected
     
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
-    # Update quote
-    quote.logo_url = f"/uploads/quotes/{filename}"
+    try:
+        quote.logo_url = await save_upload(file, "quotes", str(quote_id))
+    except UploadRejected as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=exc.detail
+        )
     quote.updated_at = datetime.utcnow()
     
     session.add(quote)
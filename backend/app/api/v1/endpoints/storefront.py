@@ -0,0 +1,33 @@
+"""
+Storefront Endpoints - Aggregated pages for the public shop
+"""
+from fastapi import APIRouter, Response
+
+from app.core.config import settings
+from app.schemas import StorefrontHomeResponse
+from app.services.storefront import storefront_home
+
+router = APIRouter()
+
+
+@router.get("/home", response_model=StorefrontHomeResponse)
+async def get_home():
+    """
+    Categories, featured products and per-category highlights in one response
+    
+    Served from a periodically rebuilt snapshot; right after a catalog change
+    the previous snapshot may be returned once while the new one is built.
+    """
+    snapshot = await storefront_home.get()
+    
+    return Response(
+        content=snapshot.body,
+        media_type="application/json",
+        headers={
+            "Cache-Control": (
+                f"public, max-age={int(settings.STOREFRONT_HOME_TTL_SECONDS)}, "
+                f"stale-while-revalidate={int(settings.STOREFRONT_HOME_MAX_STALE_SECONDS)}"
+            ),
+            "Age": str(int(snapshot.age)),
+        }
+    )
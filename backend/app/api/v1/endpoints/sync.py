@@ -0,0 +1,35 @@
+"""
+Sync Endpoints - Delta feeds for client-side caches
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session
+from typing import Optional
+
+from app.core import get_session
+from app.schemas import CatalogSyncResponse
+from app.services.sync import read_catalog_changes, current_change_seq
+
+router = APIRouter()
+
+
+@router.get("/catalog", response_model=CatalogSyncResponse)
+async def sync_catalog(
+    since: Optional[int] = Query(
+        None, ge=0, description="sync_token from the previous response (omit for a full snapshot)"
+    ),
+    limit: int = Query(500, ge=1, le=2000),
+    session: Session = Depends(get_session)
+):
+    """
+    Products and categories created, updated or deactivated since a sync token
+    
+    Keep requesting with the returned `sync_token` while `has_more` is true.
+    Deactivated (deleted) items are listed by id only.
+    """
+    if since is not None and since > current_change_seq(session):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token is no longer valid, please sync from scratch"
+        )
+    
+    return read_catalog_changes(session, since, limit)
@@ -3,7 +3,7 @@ API V1 Router - Combines all endpoint routers
 """
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, products, categories, quotes
+from app.api.v1.endpoints import auth, products, categories, quotes, admin, sync, storefront
 
 api_router = APIRouter()
 
@@ -12,3 +12,6 @@ api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(products.router, prefix="/products", tags=["Products"])
 api_router.include_router(categories.router, prefix="/categories", tags=["Categories"])
 api_router.include_router(quotes.router, prefix="/quotes", tags=["Quotes"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
+api_router.include_router(sync.router, prefix="/sync", tags=["Sync"])
+api_router.include_router(storefront.router, prefix="/storefront", tags=["Storefront"])
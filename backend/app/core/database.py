@@ -1,30 +1,204 @@
 """
 Database Connection and Session Management
+
+The engine profile comes from settings:
+- connections are opened up front by warm_up() and recycled periodically;
+  liveness relies on TCP keepalives rather than a ping on every checkout,
+  and a connection error invalidates the whole pool so the next checkouts
+  reconnect
+- on Postgres every statement has a statement_timeout, tightened or relaxed
+  per route through DB_ROUTE_STATEMENT_TIMEOUTS (SET LOCAL per transaction);
+  background rebuilds use background_session() and their own budget
+- with the psycopg 3 driver (postgresql+psycopg://), statements run
+  DB_PREPARE_THRESHOLD times on a connection are prepared server-side
+- timeouts and connection failures become 504 / 503 responses
 """
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session as OrmSession, configure_mappers
 from sqlmodel import create_engine, Session, SQLModel
 from app.core.config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=True if settings.ENVIRONMENT == "development" else False,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the statement_timeout (ms) for its transactions
+STATEMENT_TIMEOUT_KEY = "statement_timeout_ms"
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+def engine_options(url: str) -> dict:
+    """
+    create_engine() keyword arguments for the configured engine profile
+    """
+    options = {
+        "echo": settings.ENVIRONMENT == "development",
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+    }
+
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "postgresql":
+        # libpq parameters, understood by psycopg2 and psycopg 3
+        connect_args = {
+            "keepalives": 1,
+            "keepalives_idle": settings.DB_TCP_KEEPALIVE_SECONDS,
+            "keepalives_interval": max(settings.DB_TCP_KEEPALIVE_SECONDS // 3, 1),
+            "keepalives_count": 3,
+            "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}",
+        }
+        if database_url.get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = settings.DB_PREPARE_THRESHOLD
+        options["connect_args"] = connect_args
+
+    return options
+
+
+@lru_cache
+def get_engine():
+    """
+    Database engine, created on first use
+    """
+    return create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+
+def __getattr__(name: str):
+    # Keeps `from app.core.database import engine` working with lazy creation
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def pool_saturated() -> bool:
+    """
+    True when every pooled and overflow connection is checked out
+    """
+    return get_engine().pool.checkedout() >= settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+def set_statement_timeout(session: Session, milliseconds: Optional[int]) -> None:
+    """
+    statement_timeout for the session's transactions from now on
+    (0 disables it, None restores the engine default)
+    """
+    if milliseconds is None:
+        session.info.pop(STATEMENT_TIMEOUT_KEY, None)
+    else:
+        session.info[STATEMENT_TIMEOUT_KEY] = milliseconds
+
+
+@event.listens_for(OrmSession, "after_begin")
+def apply_statement_timeout(session, transaction, connection) -> None:
+    """SET LOCAL the session's budget at the start of each transaction (Postgres)"""
+    milliseconds = session.info.get(STATEMENT_TIMEOUT_KEY)
+    if milliseconds is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(milliseconds)}")
+
+
+def route_statement_timeout(request: Request) -> Optional[int]:
+    route = request.scope.get("route")
+    if route is None:
+        return None
+    return settings.DB_ROUTE_STATEMENT_TIMEOUTS.get(f"{request.method} {route.path}")
+
+
+def background_session() -> Session:
+    """
+    Session for work outside a request (rebuilds, refreshes), with the
+    DB_BACKGROUND_STATEMENT_TIMEOUT_MS budget instead of the request default
+    """
+    session = Session(get_engine())
+    set_statement_timeout(session, settings.DB_BACKGROUND_STATEMENT_TIMEOUT_MS)
+    return session
 
 
-def get_session():
+def get_session(request: Request):
     """
-    Dependency to get database session
+    Dependency to get database session (with the route's statement_timeout budget)
     """
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        set_statement_timeout(session, route_statement_timeout(request))
         yield session
 
 
+async def database_error_handler(request: Request, exc: Exception) -> JSONResponse:
+    """
+    Map database timeouts and outages (OperationalError, pool timeouts)
+    to 504 / 503 instead of a 500
+    """
+    if isinstance(exc, PoolTimeoutError):
+        logger.warning("No database connection available for %s %s", request.method, request.url.path)
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Database is busy, please retry"},
+            headers={"Retry-After": "1"}
+        )
+
+    orig = getattr(exc, "orig", None)
+    sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if sqlstate == QUERY_CANCELED:
+        logger.warning("Statement timeout on %s %s", request.method, request.url.path)
+        return JSONResponse(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            content={"detail": "Database query took too long"}
+        )
+
+    if isinstance(exc, OperationalError) and exc.connection_invalidated:
+        # The pool has been invalidated; a retry gets a fresh connection
+        logger.warning("Database connection lost during %s %s", request.method, request.url.path)
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Database connection lost, please retry"},
+            headers={"Retry-After": "1"}
+        )
+
+    logger.error("Database error on %s %s", request.method, request.url.path, exc_info=exc)
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database unavailable"}
+    )
+
+
+def warm_up(connections: int = 0) -> None:
+    """
+    Configure ORM mappers and open `connections` pooled connections up front
+    so the first requests don't pay for them
+    """
+    # Import models so every mapper is registered before configuring
+    import app.models  # noqa: F401
+
+    configure_mappers()
+
+    engine = get_engine()
+    opened = []
+    try:
+        for _ in range(min(connections, settings.DB_POOL_SIZE)):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            opened.append(connection)
+    finally:
+        # Returned to the pool, not closed
+        for connection in opened:
+            connection.close()
+
+    logger.info("Warmed up ORM mappers and %d database connections", len(opened))
+
+
 def init_db():
     """
     Initialize database - create all tables
     """
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(get_engine())
     print("✅ Database tables created successfully")
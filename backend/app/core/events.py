@@ -0,0 +1,177 @@
+"""
+Invalidation Bus - Cross-worker notifications for in-process caches
+
+Handlers subscribe to a topic; publish() runs the local handlers at once and
+broadcasts the message to every other worker through Postgres LISTEN/NOTIFY.
+Each worker runs one listener thread on a dedicated connection, so an admin
+write reaches all processes within milliseconds (psycopg2 and psycopg 3
+drivers). On other databases (e.g. SQLite in development) messages stay
+in-process.
+"""
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Optional
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+Handler = Callable[[dict], None]
+
+
+class InvalidationBus:
+    """
+    Topic based publish/subscribe shared by all workers
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.origin = uuid4().hex
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Call `handler(payload)` for every message published on `topic`"""
+        self._handlers[topic].append(handler)
+
+    def publish(self, topic: str, payload: Optional[dict] = None) -> None:
+        """
+        Deliver a message to local handlers and broadcast it to other workers.
+        Call after the change it describes has been committed.
+        """
+        payload = payload or {}
+        self._dispatch(topic, payload)
+
+        if not self._is_postgres():
+            return
+
+        message = json.dumps({"o": self.origin, "t": topic, "p": payload}, default=str)
+        if len(message.encode()) > MAX_PAYLOAD_BYTES:
+            # Too large to broadcast - let other workers drop everything for the topic
+            message = json.dumps({"o": self.origin, "t": topic, "p": {"reload": True}})
+
+        try:
+            with get_engine().begin() as connection:
+                connection.execute(
+                    text("SELECT pg_notify(:channel, :message)"),
+                    {"channel": self.channel, "message": message}
+                )
+        except Exception:
+            logger.exception("Failed to broadcast %s invalidation", topic)
+
+    def _dispatch(self, topic: str, payload: dict) -> None:
+        for handler in list(self._handlers.get(topic, ())):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("Invalidation handler for %s failed", topic)
+
+    @staticmethod
+    def _is_postgres() -> bool:
+        return get_engine().dialect.name == "postgresql"
+
+    def start(self) -> None:
+        """
+        Start the listener thread (Postgres only)
+        """
+        if self._thread or not self._is_postgres():
+            return
+
+        # New identity per worker - workers forked from a preloaded master
+        # would otherwise share one and ignore each other's messages
+        self.origin = uuid4().hex
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _connect(self):
+        """
+        Open a dedicated DBAPI connection outside the pool
+        """
+        engine = get_engine()
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return connection
+
+    def _listen(self) -> None:
+        backoff = 1.0
+        reconnecting = False
+
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                backoff = 1.0
+
+                # Anything may have changed while we were disconnected
+                if reconnecting:
+                    self._dispatch_reload()
+                reconnecting = True
+
+                while not self._stop.is_set():
+                    self._wait(connection)
+            except Exception:
+                logger.exception("Invalidation listener disconnected, retrying in %.0fs", backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def _wait(self, connection) -> None:
+        """
+        Handle the notifications arriving within about a second
+        """
+        if get_engine().dialect.driver == "psycopg":
+            # psycopg 3: notifies() yields as they arrive and ends after the timeout
+            for notify in connection.notifies(timeout=1.0):
+                self._receive(notify.payload)
+            return
+
+        # psycopg2: poll() moves pending notifications into connection.notifies
+        if select.select([connection], [], [], 1.0)[0]:
+            connection.poll()
+            while connection.notifies:
+                self._receive(connection.notifies.pop(0).payload)
+
+    def _receive(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+
+        if message.get("o") == self.origin:
+            return
+
+        self._dispatch(message.get("t", ""), message.get("p") or {})
+
+    def _dispatch_reload(self) -> None:
+        for topic in list(self._handlers):
+            self._dispatch(topic, {"reload": True})
+
+
+# Process-wide bus instance
+bus = InvalidationBus(settings.INVALIDATION_CHANNEL)
@@ -0,0 +1,460 @@
+"""
+Idempotency-Key Support for State-Changing Requests
+
+A POST/PUT/PATCH/DELETE carrying an `Idempotency-Key` header is executed at
+most once per key: the request fingerprint and the response are stored for
+a TTL and replayed on retries, and a retry that arrives while the original
+is still running waits for it instead of executing a second time.
+
+Keys are scoped to the caller: the user of a valid bearer token, otherwise
+the client IP (guests must send keys of at least MIN_GUEST_KEY_LENGTH
+characters, e.g. UUIDs, so clients behind one address don't collide).
+Records live in-process by default; DatabaseIdempotencyStore shares them
+between workers.
+
+Keyed request bodies are buffered before routing, so they are capped at
+UPLOAD_MAX_BYTES (plus multipart overhead) with a 413. Responses over
+IDEMPOTENCY_MAX_RESPONSE_BYTES are streamed through but not stored: the key
+stays used and retries get a 409 instead of running the request again.
+"""
+import abc
+import asyncio
+import hashlib
+import importlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import get_engine
+from app.core.ratelimit import bearer_user_id, client_ip
+from app.models import IdempotencyKey
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+MIN_GUEST_KEY_LENGTH = 16
+# Multipart boundaries and part headers around an upload
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+TOO_LARGE_DETAIL = "A request with this Idempotency-Key already completed; its response is too large to replay"
+
+# Outcomes of IdempotencyStore.begin
+STARTED = "started"
+PENDING = "pending"
+COMPLETED = "completed"
+MISMATCH = "mismatch"
+
+
+@dataclass
+class IdempotencyRecord:
+    """A request seen under an idempotency key, and its response once done"""
+    fingerprint: str
+    expires_at: float
+    status_code: Optional[int] = None
+    headers: list = field(default_factory=list)
+    body: bytes = b""
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+class IdempotencyStore(abc.ABC):
+    """
+    Storage for idempotency records. Subclass to share records across workers.
+    """
+
+    # Poll interval used by wait() in stores without local notification
+    POLL_INTERVAL = 0.05
+
+    # Stores doing I/O are called from the threadpool, not the event loop
+    BLOCKING = False
+
+    @abc.abstractmethod
+    def begin(self, key: str, fingerprint: str, ttl: int) -> tuple[str, Optional[IdempotencyRecord]]:
+        """
+        Atomically claim `key` for a new request, or report the existing record
+        """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[IdempotencyRecord]:
+        pass
+
+    @abc.abstractmethod
+    def complete(self, key: str, status_code: int, headers: list, body: bytes) -> None:
+        pass
+
+    @abc.abstractmethod
+    def abort(self, key: str) -> None:
+        """Forget a claimed key so the request can be retried"""
+
+    async def call(self, method, *args):
+        """Run one of the store's methods without blocking the event loop"""
+        if self.BLOCKING:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def wait(self, key: str, timeout: float) -> Optional[IdempotencyRecord]:
+        """
+        Wait until the in-flight request for `key` finishes (or the timeout passes)
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            record = await self.call(self.get, key)
+            if record is None or record.completed:
+                return record
+            await asyncio.sleep(self.POLL_INTERVAL)
+        return await self.call(self.get, key)
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    In-process records (one set per worker)
+    """
+
+    def __init__(self):
+        self._records: dict[str, IdempotencyRecord] = {}
+        self._events: dict[str, asyncio.Event] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def begin(self, key, fingerprint, ttl):
+        now = time.time()
+
+        with self._lock:
+            if now >= self._next_sweep:
+                self._records = {k: r for k, r in self._records.items() if r.expires_at > now}
+                self._next_sweep = now + 60
+
+            record = self._records.get(key)
+            if record and record.expires_at > now:
+                if record.fingerprint != fingerprint:
+                    return MISMATCH, record
+                return (COMPLETED if record.completed else PENDING), record
+
+            record = IdempotencyRecord(fingerprint=fingerprint, expires_at=now + ttl)
+            self._records[key] = record
+            self._events[key] = asyncio.Event()
+            return STARTED, record
+
+    def get(self, key):
+        record = self._records.get(key)
+        if record and record.expires_at > time.time():
+            return record
+        return None
+
+    def complete(self, key, status_code, headers, body):
+        record = self._records.get(key)
+        if record:
+            record.headers = headers
+            record.body = body
+            record.status_code = status_code
+        self._notify(key)
+
+    def abort(self, key):
+        with self._lock:
+            self._records.pop(key, None)
+        self._notify(key)
+
+    def _notify(self, key: str) -> None:
+        event = self._events.pop(key, None)
+        if event:
+            event.set()
+
+    async def wait(self, key, timeout):
+        event = self._events.get(key)
+        if event:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(key)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """
+    Records in the idempotency_keys table, shared by all workers. Keys are
+    claimed with INSERT ... ON CONFLICT (Postgres, or SQLite in development).
+    """
+
+    POLL_INTERVAL = 0.2
+    BLOCKING = True
+
+    UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+    # Seconds between deletions of expired rows (per worker)
+    SWEEP_INTERVAL = 60
+
+    def __init__(self):
+        self._next_sweep = 0.0
+
+    def begin(self, key, fingerprint, ttl):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+
+        with Session(get_engine()) as session:
+            if time.time() >= self._next_sweep:
+                session.exec(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+                self._next_sweep = time.time() + self.SWEEP_INTERVAL
+
+            insert = self.UPSERT_INSERTS[session.get_bind().dialect.name]
+            # Claim the key - or take over an expired record still in the table
+            statement = (
+                insert(IdempotencyKey)
+                .values(key=key, fingerprint=fingerprint, expires_at=expires_at, created_at=now)
+                .on_conflict_do_update(
+                    index_elements=["key"],
+                    set_={
+                        "fingerprint": fingerprint,
+                        "expires_at": expires_at,
+                        "created_at": now,
+                        "status_code": None,
+                        "headers": None,
+                        "body": None,
+                    },
+                    where=IdempotencyKey.expires_at <= now
+                )
+                .returning(IdempotencyKey.key)
+            )
+            claimed = session.execute(statement).first()
+            session.commit()
+
+            if claimed:
+                return STARTED, IdempotencyRecord(fingerprint=fingerprint, expires_at=self._timestamp(expires_at))
+
+            record = self._get(session, key)
+
+        if record is None:
+            # Aborted in between - the caller waits, finds nothing and claims again
+            return PENDING, None
+        if record.fingerprint != fingerprint:
+            return MISMATCH, record
+        return (COMPLETED if record.completed else PENDING), record
+
+    def get(self, key):
+        with Session(get_engine()) as session:
+            return self._get(session, key)
+
+    def complete(self, key, status_code, headers, body):
+        with Session(get_engine()) as session:
+            session.exec(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(
+                    status_code=status_code,
+                    headers=[[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers],
+                    body=body
+                )
+            )
+            session.commit()
+
+    def abort(self, key):
+        with Session(get_engine()) as session:
+            session.exec(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            session.commit()
+
+    def _get(self, session: Session, key: str) -> Optional[IdempotencyRecord]:
+        row = session.exec(
+            select(IdempotencyKey)
+            .where(IdempotencyKey.key == key, IdempotencyKey.expires_at > datetime.utcnow())
+        ).first()
+        if row is None:
+            return None
+
+        return IdempotencyRecord(
+            fingerprint=row.fingerprint,
+            expires_at=self._timestamp(row.expires_at),
+            status_code=row.status_code,
+            headers=[(name.encode("latin-1"), value.encode("latin-1")) for name, value in row.headers or []],
+            body=row.body or b""
+        )
+
+    @staticmethod
+    def _timestamp(value: datetime) -> float:
+        # Stored timestamps are naive UTC
+        return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def load_store(path: str) -> IdempotencyStore:
+    """
+    Instantiate a store from a dotted "module.ClassName" path
+    """
+    module_name, _, class_name = path.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware replaying stored responses for repeated Idempotency-Keys
+    """
+
+    def __init__(self, app, store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.store = store or load_store(settings.IDEMPOTENCY_BACKEND)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        raw_key = headers.get(b"idempotency-key")
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            await self._error(send, 400, "Invalid Idempotency-Key header")
+            return
+
+        # Keys are scoped to the caller so two clients can't collide
+        user_id = bearer_user_id(scope)
+        if user_id:
+            caller = f"user:{user_id}"
+        elif len(raw_key) < MIN_GUEST_KEY_LENGTH:
+            await self._error(
+                send, 400, f"Idempotency-Key must be at least {MIN_GUEST_KEY_LENGTH} characters without authentication"
+            )
+            return
+        else:
+            caller = f"ip:{client_ip(scope)}"
+        key = f"{caller}:{raw_key.decode('latin-1')}"
+
+        limit = settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            await self._error(send, 413, "Request body too large")
+            return
+        body = await self._read_body(receive, limit)
+        if body is None:
+            await self._error(send, 413, "Request body too large")
+            return
+        fingerprint = hashlib.sha256(b"\n".join([
+            scope["method"].encode(),
+            scope["path"].encode(),
+            scope.get("query_string", b""),
+            headers.get(b"content-type", b""),
+            body,
+        ])).hexdigest()
+
+        outcome, record = await self.store.call(
+            self.store.begin, key, fingerprint, settings.IDEMPOTENCY_TTL_SECONDS
+        )
+
+        if outcome == PENDING:
+            record = await self.store.wait(key, settings.IDEMPOTENCY_WAIT_SECONDS)
+            if record is None:
+                # The original failed - run this request in its place
+                outcome, record = await self.store.call(
+                    self.store.begin, key, fingerprint, settings.IDEMPOTENCY_TTL_SECONDS
+                )
+            elif record.completed:
+                outcome = COMPLETED
+            else:
+                await self._error(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+
+        if outcome == MISMATCH:
+            await self._error(send, 422, "Idempotency-Key was already used for a different request")
+            return
+
+        if outcome == COMPLETED:
+            await self._replay(send, record)
+            return
+
+        if outcome != STARTED:
+            await self._error(send, 409, "A request with this Idempotency-Key is still in progress")
+            return
+
+        await self._execute(scope, body, receive, send, key)
+
+    async def _execute(self, scope, body: bytes, receive, send, key: str) -> None:
+        """
+        Run the request once and store its response
+        """
+        body_delivered = False
+        response = {"status": 500, "headers": [], "body": [], "size": 0}
+
+        async def replay_receive():
+            nonlocal body_delivered
+            if not body_delivered:
+                body_delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                if response["size"] <= settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                    response["body"].append(chunk)
+                else:
+                    response["body"] = []
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await self.store.call(self.store.abort, key)
+            raise
+
+        # Server errors are not final - let the client retry them
+        if response["status"] >= 500:
+            await self.store.call(self.store.abort, key)
+        elif response["size"] > settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+            status_code, headers, body = self._error_response(409, TOO_LARGE_DETAIL)
+            await self.store.call(self.store.complete, key, status_code, headers, body)
+        else:
+            await self.store.call(
+                self.store.complete, key, response["status"], response["headers"], b"".join(response["body"])
+            )
+
+    @staticmethod
+    async def _read_body(receive, limit: int) -> Optional[bytes]:
+        """The whole request body, or None once it grows past `limit` bytes"""
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > limit:
+                return None
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _replay(send, record: IdempotencyRecord) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": record.status_code,
+            "headers": list(record.headers) + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": record.body})
+
+    @staticmethod
+    def _error_response(status_code: int, detail: str) -> tuple[int, list, bytes]:
+        body = json.dumps({"detail": detail}).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        return status_code, headers, body
+
+    @classmethod
+    async def _error(cls, send, status_code: int, detail: str) -> None:
+        status_code, headers, body = cls._error_response(status_code, detail)
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
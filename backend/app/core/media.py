@@ -0,0 +1,244 @@
+"""
+Media Serving - ASGI app for uploaded files
+
+Replaces a plain StaticFiles mount for /uploads with:
+- long-lived immutable caching for content-named files
+- ETag / Last-Modified validators and 304 responses
+- single byte-range (206) responses
+- zero-copy sending when the server supports the ASGI zerocopysend or
+  pathsend extensions, threaded chunked reads otherwise
+- optional X-Accel-Redirect mode, where a front proxy serves the bytes
+"""
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from anyio import to_thread
+
+from app.core.config import settings
+
+CHUNK_SIZE = 256 * 1024
+
+# Uploads are saved as "<owner id>_<8 hex chars>.<ext>" - a new upload always
+# gets a new name, so the URL of an existing file never changes content
+CONTENT_NAMED = re.compile(r"_[0-9a-f]{8}\.[A-Za-z0-9]+$")
+
+# Precompressed variants, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class MediaFiles:
+    """
+    Serve files below `directory` with caching headers and range support
+    """
+
+    def __init__(self, directory: str, accel_redirect_prefix: Optional[str] = None):
+        self.directory = os.path.realpath(directory)
+        self.accel_redirect_prefix = (
+            accel_redirect_prefix if accel_redirect_prefix is not None
+            else settings.MEDIA_ACCEL_REDIRECT_PREFIX
+        )
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+
+        relative_path = self._relative_path(scope)
+        full_path = self._resolve(relative_path)
+        file_stat = self._stat(full_path) if full_path else None
+
+        if file_stat is None:
+            await self._empty(send, 404)
+            return
+
+        request_headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope.get("headers") or []
+        }
+
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        headers = [
+            (b"content-type", content_type.encode()),
+            (b"cache-control", self._cache_control(full_path).encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+
+        # Offload the transfer to the front proxy
+        if self.accel_redirect_prefix:
+            target = self.accel_redirect_prefix.rstrip("/") + "/" + relative_path
+            headers.append((b"x-accel-redirect", target.encode()))
+            await self._empty(send, 200, headers)
+            return
+
+        # Pick a precompressed variant if the client accepts one
+        serve_path, serve_stat = full_path, file_stat
+        accept_encoding = request_headers.get("accept-encoding", "")
+        for encoding, suffix in ENCODINGS:
+            if encoding in accept_encoding:
+                variant_stat = self._stat(full_path + suffix)
+                if variant_stat is not None:
+                    serve_path, serve_stat = full_path + suffix, variant_stat
+                    headers.append((b"content-encoding", encoding.encode()))
+                    break
+
+        size = serve_stat.st_size
+        etag = f'"{serve_stat.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(serve_stat.st_mtime, usegmt=True)
+        headers += [
+            (b"etag", etag.encode()),
+            (b"last-modified", last_modified.encode()),
+            (b"accept-ranges", b"bytes"),
+        ]
+
+        if self._not_modified(request_headers, etag, serve_stat.st_mtime):
+            await self._empty(send, 304, headers)
+            return
+
+        start, end, status_code = 0, size - 1, 200
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers, etag, last_modified):
+            byte_range = self._parse_range(range_header, size)
+            if byte_range is False:
+                await self._empty(send, 416, headers + [(b"content-range", f"bytes */{size}".encode())])
+                return
+            if byte_range:
+                start, end = byte_range
+                status_code = 206
+                headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+
+        count = end - start + 1 if size else 0
+        headers.append((b"content-length", str(count).encode()))
+
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+
+        if scope["method"] == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await self._send_file(scope, send, serve_path, start, count, status_code == 200)
+
+    def _relative_path(self, scope) -> str:
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        return path.lstrip("/")
+
+    def _resolve(self, relative_path: str) -> Optional[str]:
+        """
+        Absolute path of the requested file, or None if it escapes the directory
+        """
+        full_path = os.path.realpath(os.path.join(self.directory, relative_path))
+        if os.path.commonpath([self.directory, full_path]) != self.directory:
+            return None
+        return full_path
+
+    @staticmethod
+    def _stat(path: str) -> Optional[os.stat_result]:
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        return file_stat if stat.S_ISREG(file_stat.st_mode) else None
+
+    @staticmethod
+    def _cache_control(path: str) -> str:
+        if CONTENT_NAMED.search(os.path.basename(path)):
+            return "public, max-age=31536000, immutable"
+        return f"public, max-age={settings.MEDIA_DEFAULT_MAX_AGE}"
+
+    @staticmethod
+    def _not_modified(request_headers: dict, etag: str, mtime: float) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+
+        return False
+
+    @staticmethod
+    def _if_range_matches(request_headers: dict, etag: str, last_modified: str) -> bool:
+        if_range = request_headers.get("if-range")
+        return if_range is None or if_range in (etag, last_modified)
+
+    @staticmethod
+    def _parse_range(header: str, size: int):
+        """
+        (start, end) for a satisfiable single range, None to ignore the header
+        (e.g. multiple ranges - the full file is sent), False if unsatisfiable
+        """
+        match = RANGE_PATTERN.match(header.strip())
+        if not match:
+            return None
+
+        first, last = match.groups()
+        if not first and not last:
+            return None
+
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0 or size == 0:
+                return False
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            return False
+        return start, end
+
+    async def _send_file(self, scope, send, path: str, offset: int, count: int, whole_file: bool) -> None:
+        extensions = scope.get("extensions") or {}
+
+        if whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": path})
+            return
+
+        with open(path, "rb") as file:
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": offset,
+                    "count": count,
+                })
+                return
+
+            fd = file.fileno()
+            remaining = count
+            while remaining > 0:
+                chunk = await to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+            if remaining > 0:
+                # File shrank while sending - terminate the body
+                await send({"type": "http.response.body", "body": b""})
+
+    @staticmethod
+    async def _empty(send, status_code: int, headers: Optional[list] = None) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": (headers or []) + [(b"content-length", b"0")],
+        })
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,189 @@
+"""
+On-demand Request Profiling
+
+A request carrying a valid profile token (issued to admins by
+POST /admin/profiles/token) in the `X-Profile-Token` header is run under
+a pyinstrument sampling profiler, subject to PROFILING_SAMPLE_RATE. The profile covers the handler
+task - routing, ORM queries and response serialization - and is written as
+a speedscope JSON file to PROFILING_DIR, named by the `X-Profile-Id`
+response header.
+
+Requests without a token only pay for a header lookup. pyinstrument is
+imported on first use and one request per worker is profiled at a time.
+Synchronous endpoints run in the threadpool and are not sampled. The token
+is not accepted as a query parameter, since URLs end up in access logs.
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from anyio import to_thread
+
+from app.core.config import settings
+from app.core.security import decode_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_SUFFIX = ".speedscope.json"
+META_SUFFIX = ".meta.json"
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[A-Za-z0-9_-]+$")
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """
+    Speedscope file of a stored profile, or None for an unknown/invalid id
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, profile_id + PROFILE_SUFFIX)
+    return path if os.path.exists(path) else None
+
+
+def list_profiles() -> list[dict]:
+    """
+    Stored profiles, newest first
+    """
+    try:
+        names = os.listdir(settings.PROFILING_DIR)
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    for name in names:
+        if not name.endswith(META_SUFFIX):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILING_DIR, name)) as meta_file:
+                profiles.append(json.load(meta_file))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda meta: meta["created_at"], reverse=True)
+
+
+def prune_profiles(keep: int) -> None:
+    """Delete all but the newest `keep` profiles"""
+    names = sorted(n for n in os.listdir(settings.PROFILING_DIR) if n.endswith(META_SUFFIX))
+    for name in names[:max(0, len(names) - keep)]:
+        profile_id = name[:-len(META_SUFFIX)]
+        for suffix in (META_SUFFIX, PROFILE_SUFFIX):
+            try:
+                os.remove(os.path.join(settings.PROFILING_DIR, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that carry a profile token
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.busy = False
+        self._profiler_class = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.busy:
+            await self.app(scope, receive, send)
+            return
+
+        token = self._token(scope)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        payload = decode_token(token)
+        if not payload or payload.get("type") != "profile":
+            await self.app(scope, receive, send)
+            return
+
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        profiler_class = self._load_profiler()
+        if profiler_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self._profile(profiler_class, scope, receive, send, payload.get("sub"))
+
+    async def _profile(self, profiler_class, scope, receive, send, user_id: Optional[str]) -> None:
+        now = datetime.utcnow()
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")[:60] or "root"
+        profile_id = f"{now:%Y%m%dT%H%M%S}-{scope['method']}-{slug}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())],
+                }
+            await send(message)
+
+        self.busy = True
+        profiler = profiler_class(interval=settings.PROFILING_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            session = profiler.stop()
+            duration = time.perf_counter() - started
+            self.busy = False
+
+            meta = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "created_at": now.isoformat(),
+                "user_id": user_id,
+            }
+            # Rendering a long profile takes a while - keep it off the event loop
+            await to_thread.run_sync(self._write, session, meta)
+
+    @staticmethod
+    def _write(session, meta: dict) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        try:
+            os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+            base = os.path.join(settings.PROFILING_DIR, meta["id"])
+            with open(base + PROFILE_SUFFIX, "w") as profile_file:
+                profile_file.write(SpeedscopeRenderer().render(session))
+            with open(base + META_SUFFIX, "w") as meta_file:
+                json.dump(meta, meta_file)
+            prune_profiles(settings.PROFILING_MAX_FILES)
+        except OSError:
+            logger.exception("Could not write profile %s", meta["id"])
+
+    @staticmethod
+    def _token(scope) -> Optional[str]:
+        for name, value in scope.get("headers") or []:
+            if name == PROFILE_HEADER:
+                return value.decode("latin-1")
+        return None
+
+    def _load_profiler(self):
+        if self._profiler_class is None:
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("Profile requested but pyinstrument is not installed")
+                return None
+            self._profiler_class = Profiler
+        return self._profiler_class
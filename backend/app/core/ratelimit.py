@@ -0,0 +1,216 @@
+"""
+Rate Limiting and Load Shedding Middleware
+
+Token buckets limit requests per client IP, per authenticated user and per
+configured route. A global concurrency limit sheds load with 503 +
+Retry-After once the worker is saturated or the DB pool is exhausted, so a
+burst against one endpoint cannot starve everyone else.
+"""
+import abc
+import importlib
+import json
+import math
+import threading
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import pool_saturated
+from app.core.security import decode_token
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Paths never throttled or shed (monitoring)
+EXEMPT_PATHS = {"/health", "/health/ready"}
+
+# Long-lived streams are rate limited on connect but do not count towards
+# MAX_CONCURRENT_REQUESTS (the event hub caps them separately)
+STREAMING_PATHS = {"/api/v1/quotes/events"}
+
+
+def client_ip(scope) -> str:
+    """
+    The client's address. With RATE_LIMIT_TRUST_FORWARDED, the
+    X-Forwarded-For entry added by the outermost of the
+    RATE_LIMIT_TRUSTED_PROXIES proxies, counted from the right - entries
+    further left come from the client and can be forged.
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED and settings.RATE_LIMIT_TRUSTED_PROXIES > 0:
+        forwarded = dict(scope.get("headers") or []).get(b"x-forwarded-for")
+        if forwarded:
+            hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",")]
+            if len(hops) >= settings.RATE_LIMIT_TRUSTED_PROXIES:
+                return hops[-settings.RATE_LIMIT_TRUSTED_PROXIES]
+
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def bearer_user_id(scope) -> Optional[str]:
+    """
+    User id of a valid bearer token, without a database lookup
+    """
+    authorization = dict(scope.get("headers") or []).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
+
+
+def parse_rate(rate: str) -> tuple[float, float]:
+    """
+    Parse "<requests>/<period>" into (capacity, refill tokens per second)
+    """
+    count, _, period = rate.partition("/")
+    seconds = PERIODS.get(period.strip().lower())
+
+    if not seconds or not count.strip().isdigit():
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+
+    capacity = float(count)
+    return capacity, capacity / seconds
+
+
+class RateLimitBackend(abc.ABC):
+    """
+    Storage for token buckets. Subclass to share buckets across workers.
+    """
+
+    @abc.abstractmethod
+    def consume(self, key: str, capacity: float, refill_rate: float, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens from the bucket `key`. Returns 0 when allowed,
+        otherwise the number of seconds until enough tokens are available.
+        """
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    In-process token buckets (one set per worker)
+    """
+
+    # Drop idle, fully refilled buckets once this many keys are tracked
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        # key -> (tokens, last update, time the bucket is full again)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, refill_rate: float, cost: float = 1.0) -> float:
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / refill_rate
+
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_rate)
+
+            if len(self._buckets) > self.MAX_KEYS:
+                self._prune(now)
+
+        return retry_after
+
+    def _prune(self, now: float) -> None:
+        # A bucket that has refilled completely is the same as a missing one
+        self._buckets = {
+            key: value for key, value in self._buckets.items() if value[2] > now
+        }
+
+
+def load_backend(path: str) -> RateLimitBackend:
+    """
+    Instantiate a backend from a dotted "module.ClassName" path
+    """
+    module_name, _, class_name = path.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying token-bucket limits and global load shedding
+    """
+
+    def __init__(self, app, backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.backend = backend or load_backend(settings.RATE_LIMIT_BACKEND)
+        self.ip_rate = parse_rate(settings.RATE_LIMIT_PER_IP)
+        self.user_rate = parse_rate(settings.RATE_LIMIT_PER_USER)
+        self.route_rates = {
+            route: parse_rate(rate) for route, rate in settings.RATE_LIMIT_ROUTES.items()
+        }
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        # Load shedding
+        if self.in_flight >= settings.MAX_CONCURRENT_REQUESTS or pool_saturated():
+            await self._reject(
+                send, 503, "Server is busy, please retry shortly", settings.LOAD_SHED_RETRY_AFTER
+            )
+            return
+
+        # Token buckets
+        if settings.RATE_LIMIT_ENABLED:
+            retry_after = self._check_limits(scope)
+            if retry_after:
+                await self._reject(send, 429, "Too many requests", retry_after)
+                return
+
+        if scope["path"] in STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    def _check_limits(self, scope) -> float:
+        """
+        Return the longest Retry-After of all exhausted buckets (0 if allowed)
+        """
+        ip = client_ip(scope)
+        user_id = bearer_user_id(scope)
+        client = f"user:{user_id}" if user_id else f"ip:{ip}"
+
+        checks = [(f"ip:{ip}", self.ip_rate)]
+        if user_id:
+            checks.append((client, self.user_rate))
+
+        route = f"{scope['method']} {scope['path']}"
+        if route in self.route_rates:
+            checks.append((f"route:{route}:{client}", self.route_rates[route]))
+
+        retry_after = 0.0
+        for key, (capacity, refill_rate) in checks:
+            retry_after = max(retry_after, self.backend.consume(key, capacity, refill_rate))
+
+        return retry_after
+
+    @staticmethod
+    async def _reject(send, status_code: int, detail: str, retry_after: float) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,147 @@
+"""
+Refresh Token Revocation Index
+
+Revoked refresh tokens and token families are stored in the revoked_tokens
+table and mirrored in an in-memory Bloom filter. A key the filter has never
+seen is certainly not revoked, so the common case costs no query; only
+filter hits (real revocations and rare false positives) are confirmed in the
+database. The filter is rebuilt at startup and kept in sync across workers
+through the invalidation bus.
+"""
+import hashlib
+import logging
+import math
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import background_session
+from app.core.events import bus
+from app.models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_TOPIC = "token_revocations"
+
+
+def token_key(jti: str) -> str:
+    return f"jti:{jti}"
+
+
+def family_key(family: str) -> str:
+    return f"fam:{family}"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings (double hashing on one blake2b digest)
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationIndex:
+    """
+    Bloom filter in front of the revoked_tokens table
+    """
+
+    def __init__(self):
+        self._filter = BloomFilter(settings.REVOCATION_FILTER_CAPACITY, settings.REVOCATION_FILTER_ERROR_RATE)
+        self._lock = threading.Lock()
+
+    def rebuild(self, session: Session) -> None:
+        """
+        Purge expired rows and rebuild the filter from the remaining ones
+        """
+        session.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+        session.commit()
+
+        keys = session.exec(select(RevokedToken.key)).all()
+
+        # Leave room to grow before the false positive rate degrades
+        capacity = max(settings.REVOCATION_FILTER_CAPACITY, len(keys) * 2)
+        bloom = BloomFilter(capacity, settings.REVOCATION_FILTER_ERROR_RATE)
+        for key in keys:
+            bloom.add(key)
+
+        with self._lock:
+            self._filter = bloom
+
+        logger.info("Loaded %d revoked token keys", len(keys))
+
+    def rebuild_from_db(self) -> None:
+        with background_session() as session:
+            self.rebuild(session)
+
+    def is_revoked(self, session: Session, key: str) -> bool:
+        """
+        True if the key is revoked - only filter hits reach the database
+        """
+        if key not in self._filter:
+            return False
+        return session.get(RevokedToken, key) is not None
+
+    def revoke(
+        self,
+        session: Session,
+        key: str,
+        expires_at: datetime,
+        reason: str,
+        user_id: Optional[UUID] = None
+    ) -> None:
+        """
+        Stage a revocation in the session. Call announce() after committing.
+        Revoking the same key twice fails on commit with an IntegrityError.
+        """
+        session.add(RevokedToken(key=key, user_id=user_id, reason=reason, expires_at=expires_at))
+
+    def add(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._filter.add(key)
+            overfull = self._filter.count > self._filter.capacity
+
+        if overfull:
+            self.rebuild_from_db()
+
+    def announce(self, keys: list[str]) -> None:
+        """
+        Add committed revocations to the filter in every worker
+        """
+        bus.publish(REVOCATION_TOPIC, {"keys": keys})
+
+    def handle_event(self, payload: dict) -> None:
+        if payload.get("reload"):
+            self.rebuild_from_db()
+        else:
+            self.add(payload.get("keys", []))
+
+
+# Process-wide index, kept in sync by revocation messages
+revocation_index = RevocationIndex()
+bus.subscribe(REVOCATION_TOPIC, revocation_index.handle_event)
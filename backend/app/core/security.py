@@ -3,6 +3,7 @@ Security Utilities - Password Hashing and JWT Token Management
 """
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import uuid4
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -42,19 +43,48 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def create_refresh_token(data: dict) -> str:
+def create_refresh_token(data: dict, family: Optional[str] = None) -> str:
     """
     Create a new JWT refresh token
+    
+    Each token gets a unique id (jti). Tokens rotated from the same login
+    share a family id (fam) so a whole chain can be revoked at once.
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({
+        "exp": expire,
+        "type": "refresh",
+        "jti": uuid4().hex,
+        "fam": family or uuid4().hex
+    })
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
     return encoded_jwt
 
 
+def create_profile_token(data: dict, expires_delta: timedelta) -> str:
+    """
+    Create a short-lived token that turns on profiling for the requests carrying it
+    """
+    to_encode = data.copy()
+    to_encode.update({"exp": datetime.utcnow() + expires_delta, "type": "profile"})
+    
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def create_stream_ticket(data: dict, expires_delta: timedelta) -> str:
+    """
+    Create a short-lived ticket that opens an event stream, for clients that
+    can only pass it in the URL (EventSource)
+    """
+    to_encode = data.copy()
+    to_encode.update({"exp": datetime.utcnow() + expires_delta, "type": "stream"})
+    
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
 def decode_token(token: str) -> Optional[dict]:
     """
     Decode and verify a JWT token
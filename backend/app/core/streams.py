@@ -0,0 +1,157 @@
+"""
+Event Streams - In-process fan-out hub for server-sent events
+
+Each open stream owns a bounded queue and subscribes to one or more
+channels (e.g. "user:<id>", "admins"). publish() is thread safe, so it can
+be fed from request handlers and from the invalidation bus listener thread,
+which carries events published by other workers.
+
+A client that cannot keep up never blocks the publisher: when its queue is
+full the backlog is dropped and replaced by a single "resync" event telling
+the client to refetch. Idle streams get a comment line every heartbeat
+interval so proxies keep the connection open.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Iterable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESYNC_EVENT = {"event": "resync", "data": {}}
+
+# Reconnect delay suggested to EventSource clients (milliseconds)
+RETRY_MILLISECONDS = 5000
+
+
+class StreamConnection:
+    """
+    One open stream: its channels and bounded event queue
+    """
+    __slots__ = ("channels", "queue", "dropped")
+
+    def __init__(self, channels: tuple[str, ...], queue_size: int):
+        self.channels = channels
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def push(self, event: Optional[dict]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer - replace the backlog with a resync marker
+            self.dropped += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT if event is not None else None)
+
+
+class EventHub:
+    """
+    Channel -> open streams registry for one worker
+    """
+
+    def __init__(self, queue_size: int, max_connections: int):
+        self.queue_size = queue_size
+        self.max_connections = max_connections
+        self._channels: dict[str, set[StreamConnection]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connections = 0
+
+    @property
+    def full(self) -> bool:
+        return self.connections >= self.max_connections
+
+    def connect(self, channels: Iterable[str]) -> StreamConnection:
+        """
+        Register a stream (call from the event loop)
+        """
+        self._loop = asyncio.get_running_loop()
+        connection = StreamConnection(tuple(channels), self.queue_size)
+        for channel in connection.channels:
+            self._channels[channel].add(connection)
+        self.connections += 1
+        return connection
+
+    def disconnect(self, connection: StreamConnection) -> None:
+        for channel in connection.channels:
+            members = self._channels.get(channel)
+            if members is not None:
+                members.discard(connection)
+                if not members:
+                    del self._channels[channel]
+        self.connections -= 1
+
+    def publish(self, channels: Optional[Iterable[str]], event: str, data: dict) -> None:
+        """
+        Queue an event for every stream on any of the channels, or on every
+        stream if channels is None (thread safe)
+        """
+        self._schedule(tuple(channels) if channels is not None else None, {"event": event, "data": data})
+
+    def close_all(self) -> None:
+        """Ask every open stream to finish (shutdown)"""
+        self._schedule(None, None)
+
+    def _schedule(self, channels: Optional[tuple[str, ...]], message: Optional[dict]) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            if self._in_loop(loop):
+                self._deliver(channels, message)
+            else:
+                loop.call_soon_threadsafe(self._deliver, channels, message)
+        except RuntimeError:
+            # Loop shut down between the check and the call
+            pass
+
+    @staticmethod
+    def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def _deliver(self, channels: Optional[tuple[str, ...]], message: Optional[dict]) -> None:
+        # A stream on several channels still gets the event once
+        targets = set()
+        for channel in self._channels if channels is None else channels:
+            targets.update(self._channels.get(channel, ()))
+        for connection in targets:
+            connection.push(message)
+
+
+def format_event(message: dict) -> str:
+    data = json.dumps(message["data"], default=str, separators=(",", ":"))
+    return f"event: {message['event']}\ndata: {data}\n\n"
+
+
+async def stream_events(hub: EventHub, channels: Iterable[str]) -> AsyncIterator[str]:
+    """
+    SSE body for a stream on `channels`. Registration happens inside the
+    generator so it is always undone when the client goes away.
+    """
+    connection = hub.connect(channels)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(connection.queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+
+            if message is None:
+                return
+            yield format_event(message)
+    finally:
+        hub.disconnect(connection)
+
+
+# Process-wide hub
+event_hub = EventHub(settings.SSE_QUEUE_SIZE, settings.SSE_MAX_CONNECTIONS)
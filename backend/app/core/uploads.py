@@ -0,0 +1,232 @@
+"""
+Upload Storage - Validate, sanitize and persist uploaded images
+
+Uploaded bytes are never trusted: each file is decoded with Pillow in a
+separate worker process, checked against byte and pixel limits (before the
+pixel data is decompressed, so decompression bombs are refused from the
+header), rotated according to its EXIF orientation, stripped of all
+metadata and re-encoded as JPEG (PNG when it has transparency). Only the
+re-encoded bytes are written, under an extension we choose.
+
+Each job has a time limit. The worker interrupts itself with a timer, and
+if it still does not answer, the pool's processes are killed and a fresh
+pool is started, so a hostile file cannot pin a worker. Other jobs lost
+with the killed pool are retried once on the fresh one.
+
+Imported lazily by the upload endpoints so the API process doesn't load
+upload handling until the first upload.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ROOT = "uploads"
+READ_CHUNK_SIZE = 64 * 1024
+
+ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+
+# Extra time the parent waits before giving up on a worker
+KILL_GRACE_SECONDS = 2.0
+
+
+class UploadRejected(Exception):
+    """An upload that is not an acceptable image"""
+
+    def __init__(self, status_code: int, detail: str):
+        # Both in args so the exception survives pickling back from a worker
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise JobTimeout()
+
+
+def sanitize_image(
+    data: bytes,
+    max_pixels: int,
+    max_dimension: int,
+    jpeg_quality: int,
+    timeout: float
+) -> tuple[bytes, str]:
+    """
+    Decode, check and re-encode an image (runs in a worker process).
+    Returns (encoded bytes, extension) or raises UploadRejected.
+    """
+    from PIL import Image, ImageOps
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        # Pillow's own bomb check is a backstop; the header check below is the limit
+        Image.MAX_IMAGE_PIXELS = max_pixels
+        try:
+            image = Image.open(io.BytesIO(data))
+        except Image.DecompressionBombError:
+            raise UploadRejected(413, "Image has too many pixels")
+        except (Image.UnidentifiedImageError, OSError):
+            raise UploadRejected(415, "File is not a supported image")
+
+        if image.format not in ALLOWED_FORMATS:
+            raise UploadRejected(415, f"Unsupported image format: {image.format}")
+
+        width, height = image.size
+        if width * height > max_pixels:
+            raise UploadRejected(413, "Image has too many pixels")
+
+        try:
+            # First frame only for animations
+            image.seek(0)
+            image.load()
+            image = ImageOps.exif_transpose(image)
+        except (Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+            raise UploadRejected(415, "Image data is corrupt")
+
+        image.thumbnail((max_dimension, max_dimension))
+
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        output = io.BytesIO()
+        # A fresh save without exif/icc/pnginfo arguments writes no metadata
+        if has_alpha:
+            image.convert("RGBA").save(output, "PNG", optimize=True)
+            return output.getvalue(), "png"
+
+        image.convert("RGB").save(output, "JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+        return output.getvalue(), "jpg"
+    except JobTimeout:
+        raise UploadRejected(422, "Image took too long to process")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ImageWorkerPool:
+    """
+    Process pool for image jobs, replaced whenever a worker has to be killed
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn - forking a multi-threaded server process is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def reset(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Kill the workers of `executor` and start a fresh pool on the next job
+        (no-op if it has been replaced already)
+        """
+        if executor is not self._executor:
+            return
+        self._executor = None
+
+        # ProcessPoolExecutor has no public way to kill its workers or to
+        # tell which one runs a job. _processes (pid -> Process) is private;
+        # checked against CPython 3.11, the version of the Docker images.
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        # Jobs still queued or running fail with BrokenProcessPool
+        executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        """Stop the workers (from the app lifespan)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def run(self, data: bytes) -> tuple[bytes, str]:
+        timeout = settings.UPLOAD_TIMEOUT_SECONDS
+        retried = False
+
+        while True:
+            executor = self.executor()
+            future = asyncio.get_running_loop().run_in_executor(
+                executor,
+                sanitize_image,
+                data,
+                settings.UPLOAD_MAX_PIXELS,
+                settings.UPLOAD_MAX_DIMENSION,
+                settings.UPLOAD_JPEG_QUALITY,
+                timeout,
+            )
+            try:
+                return await asyncio.wait_for(future, timeout + KILL_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning("Image worker did not finish in %.1fs, restarting the pool", timeout)
+                self.reset(executor)
+                raise UploadRejected(422, "Image took too long to process")
+            except BrokenProcessPool:
+                if executor is not self._executor and not retried:
+                    # Killed along with another job's worker - not this image's fault
+                    retried = True
+                    continue
+                # A worker died (e.g. out of memory) while decoding
+                self.reset(executor)
+                raise UploadRejected(422, "Image could not be processed")
+
+
+image_pool = ImageWorkerPool(settings.UPLOAD_WORKERS)
+
+
+async def read_limited(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read an upload, refusing it as soon as it exceeds max_bytes
+    """
+    chunks = []
+    size = 0
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadRejected(413, f"File is larger than {max_bytes // (1024 * 1024)} MB")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def save_upload(file: UploadFile, folder: str, prefix: str) -> str:
+    """
+    Validate and re-encode an uploaded image, save it to uploads/<folder>/
+    and return its public URL. Raises UploadRejected for unacceptable files.
+    """
+    data = await read_limited(file, settings.UPLOAD_MAX_BYTES)
+    if not data:
+        raise UploadRejected(400, "Empty file")
+
+    content, file_extension = await image_pool.run(data)
+
+    upload_dir = os.path.join(UPLOAD_ROOT, folder)
+    os.makedirs(upload_dir, exist_ok=True)
+
+    # Generate unique filename
+    filename = f"{prefix}_{uuid4().hex[:8]}.{file_extension}"
+    file_path = os.path.join(upload_dir, filename)
+
+    # Save file
+    with open(file_path, "wb") as buffer:
+        buffer.write(content)
+
+    return f"/uploads/{folder}/{filename}"
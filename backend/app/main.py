@@ -1,87 +1,170 @@
 """
 Senteng Fashions Backend - Main Application Entry Point
 """
+from contextlib import asynccontextmanager
+import logging
+import os
+import sys
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
-import os
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
 
-from app.core.config import settings
+from app.core.config import Settings, get_settings
+from app.core.database import get_engine, warm_up, database_error_handler
+from app.core.events import bus
+from app.core.revocation import revocation_index
+from app.core.streams import event_hub
 from app.api.v1.router import api_router
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.media import MediaFiles
+from app.core.profiling import ProfilingMiddleware
+from app.services.catalog_snapshot import catalog_snapshot
+# Registers the write-path checks for partitioned quotes/orders
+from app.services import partitions  # noqa: F401
+from app.services.storefront import storefront_home
+from app.services.suggest import suggest_index
+
+logger = logging.getLogger("app")
 
-# Create FastAPI app instance
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    description="Senteng Fashions E-Commerce Platform API",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    openapi_url="/openapi.json"
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Create uploads directory if it doesn't exist
-os.makedirs("uploads", exist_ok=True)
-
-# Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-# Include API router
-app.include_router(api_router, prefix="/api/v1")
-
-
-@app.get("/", tags=["Root"])
-async def root():
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     """
-    Root endpoint - API health check
+    Startup / shutdown - the worker only reports ready once ORM mappers are
+    configured and the connection pool is warm
     """
-    return JSONResponse(
-        content={
-            "message": "Welcome to Senteng Fashions API",
-            "version": "1.0.0",
-            "docs": "/docs",
-            "health": "healthy"
-        }
-    )
+    settings = app.state.settings
+    logger.info("Senteng Fashions Backend starting up (environment: %s)", settings.ENVIRONMENT)
+
+    await run_in_threadpool(warm_up, settings.DB_POOL_WARM_CONNECTIONS)
+    await run_in_threadpool(revocation_index.rebuild_from_db)
+    # Map the host's catalog snapshot now; catch it up with the database in the background
+    await run_in_threadpool(catalog_snapshot.load)
+    catalog_snapshot.schedule_refresh()
+    # Built from the mapped snapshot when it is current
+    suggest_index.schedule_load()
+    bus.start()
+    storefront_home.start()
+    app.state.ready = True
+    logger.info("Ready to serve requests")
 
+    yield
 
-@app.get("/health", tags=["Health"])
-async def health_check():
+    app.state.ready = False
+    logger.info("Senteng Fashions Backend shutting down")
+    event_hub.close_all()
+    storefront_home.stop()
+    catalog_snapshot.stop()
+    suggest_index.stop()
+    # Image workers only exist once an upload has loaded app.core.uploads
+    uploads = sys.modules.get("app.core.uploads")
+    if uploads is not None:
+        await run_in_threadpool(uploads.image_pool.shutdown)
+    bus.stop()
+    get_engine().dispose()
+
+
+def create_app(settings: Settings = None) -> FastAPI:
     """
-    Health check endpoint for monitoring
+    Build the FastAPI application
     """
-    return JSONResponse(
-        content={
-            "status": "healthy",
-            "environment": settings.ENVIRONMENT
-        }
+    settings = settings or get_settings()
+    logging.basicConfig(level=settings.LOG_LEVEL)
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description="Senteng Fashions E-Commerce Platform API",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        openapi_url="/openapi.json",
+        lifespan=lifespan
     )
+    app.state.settings = settings
+    app.state.ready = False
 
+    # Statement timeouts -> 504, pool exhaustion and lost connections -> 503
+    app.add_exception_handler(OperationalError, database_error_handler)
+    app.add_exception_handler(PoolTimeoutError, database_error_handler)
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """
-    Actions to perform on application startup
-    """
-    print("🚀 Senteng Fashions Backend starting up...")
-    print(f"📝 Environment: {settings.ENVIRONMENT}")
-    print(f"📚 API Docs available at: /docs")
+    # Profile requests carrying an admin-issued profile token (innermost, so
+    # only the request itself is measured)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
 
+    # Replay responses for retried requests carrying an Idempotency-Key
+    app.add_middleware(IdempotencyMiddleware)
 
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown_event():
-    """
-    Actions to perform on application shutdown
-    """
-    print("👋 Senteng Fashions Backend shutting down...")
+    # Rate limiting and load shedding (added before CORS so CORS stays outermost
+    # and 429/503 responses still carry CORS headers)
+    app.add_middleware(RateLimitMiddleware)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Create uploads directory if it doesn't exist
+    os.makedirs("uploads", exist_ok=True)
+
+    # Serve uploaded media (caching headers, ranges, optional X-Accel-Redirect)
+    app.mount("/uploads", MediaFiles(directory="uploads"), name="uploads")
+
+    # Serve generated sitemaps and product feeds (built by scripts/build_feeds.py)
+    feeds_directory = os.path.join(settings.FEED_DIR, "public")
+    os.makedirs(feeds_directory, exist_ok=True)
+    app.mount("/feeds", MediaFiles(directory=feeds_directory, accel_redirect_prefix=""), name="feeds")
+
+    # Include API router
+    app.include_router(api_router, prefix="/api/v1")
+
+    @app.get("/", tags=["Root"])
+    async def root():
+        """
+        Root endpoint - API health check
+        """
+        return JSONResponse(
+            content={
+                "message": "Welcome to Senteng Fashions API",
+                "version": "1.0.0",
+                "docs": "/docs",
+                "health": "healthy"
+            }
+        )
+
+    @app.get("/health", tags=["Health"])
+    async def health_check():
+        """
+        Health check endpoint for monitoring (liveness)
+        """
+        return JSONResponse(
+            content={
+                "status": "healthy",
+                "environment": settings.ENVIRONMENT
+            }
+        )
+
+    @app.get("/health/ready", tags=["Health"])
+    async def readiness_check():
+        """
+        Readiness check - 503 until startup warm-up has finished
+        """
+        ready = app.state.ready
+        return JSONResponse(
+            status_code=200 if ready else 503,
+            content={"status": "ready" if ready else "starting"}
+        )
+
+    return app
+
+
+# Application instance used by `uvicorn app.main:app`
+app = create_app()
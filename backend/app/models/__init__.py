@@ -4,6 +4,13 @@ from app.models.category import Category
 from app.models.product import Product
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.quote import Quote, QuoteStatus
+from app.models.facet import ProductFacetCount
+from app.models.token import RevokedToken
+from app.models.stats import QuoteDailyStat, OrderDailyStat, CategoryRevenueStat
+from app.models.recommendation import ProductCooccurrence, ProductRecommendation
+from app.models.sync import ChangeSequence
+from app.models.idempotency import IdempotencyKey
+from app.models.record_number import RecordNumber
 
 __all__ = [
     "User",
@@ -13,5 +20,15 @@ __all__ = [
     "OrderItem",
     "OrderStatus",
     "Quote",
-    "QuoteStatus"
+    "QuoteStatus",
+    "ProductFacetCount",
+    "RevokedToken",
+    "QuoteDailyStat",
+    "OrderDailyStat",
+    "CategoryRevenueStat",
+    "ProductCooccurrence",
+    "ProductRecommendation",
+    "ChangeSequence",
+    "IdempotencyKey",
+    "RecordNumber"
 ]
@@ -1,11 +1,15 @@
 """
 Category Database Model
 """
+from sqlalchemy import Column, String
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 from datetime import datetime
 from uuid import UUID, uuid4
 
+# Byte-wise ordering (COLLATE "C" on Postgres) so a subtree is one path range
+PATH_TYPE = String(1000).with_variant(String(1000, collation="C"), "postgresql")
+
 
 class Category(SQLModel, table=True):
     """
@@ -19,10 +23,17 @@ class Category(SQLModel, table=True):
     description: Optional[str] = Field(default=None)
     image_url: Optional[str] = Field(default=None, max_length=500)
     
+    # Tree position - path is "/<root id hex>/.../<own id hex>/", set on insert
+    parent_id: Optional[UUID] = Field(default=None, foreign_key="categories.id", index=True)
+    path: str = Field(default="", sa_column=Column(PATH_TYPE, nullable=False, index=True))
+    
     # Display order
     sort_order: int = Field(default=0)
     is_active: bool = Field(default=True)
     
+    # Catalog version of the last write (delta sync)
+    change_seq: int = Field(default=0, index=True)
+    
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = Field(default=None)
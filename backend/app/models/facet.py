@@ -0,0 +1,16 @@
+"""
+Product Facet Count Database Model
+"""
+from sqlmodel import SQLModel, Field
+
+
+class ProductFacetCount(SQLModel, table=True):
+    """
+    Precomputed number of active products per facet value
+    (e.g. facet="category", value="<category id>")
+    """
+    __tablename__ = "product_facet_counts"
+    
+    facet: str = Field(primary_key=True, max_length=50)
+    value: str = Field(primary_key=True, max_length=100)
+    count: int = Field(default=0)
@@ -0,0 +1,27 @@
+"""
+Idempotency Key Database Model
+"""
+from sqlalchemy import Column, JSON, LargeBinary
+from sqlmodel import SQLModel, Field
+from typing import Any, Optional
+from datetime import datetime
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    A request seen under an Idempotency-Key (scoped to its caller), and its
+    response once completed. Rows can be purged once expired.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    key: str = Field(primary_key=True, max_length=320)
+    fingerprint: str = Field(max_length=64)
+    
+    # Stored response (status_code is NULL while the request is running)
+    status_code: Optional[int] = Field(default=None)
+    headers: Optional[Any] = Field(default=None, sa_column=Column(JSON))
+    body: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    
+    # Timestamps
+    expires_at: datetime = Field(index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
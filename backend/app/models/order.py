@@ -28,7 +28,7 @@ class Order(SQLModel, table=True):
     """
     __tablename__ = "orders"
     
-    id: UUID = Field(default_factory=uuid 4, primary_key=True)
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
     order_number: str = Field(unique=True, max_length=50, index=True)
     
     # Customer
@@ -48,8 +48,8 @@ class Order(SQLModel, table=True):
     customer_notes: Optional[str] = Field(default=None)
     admin_notes: Optional[str] = Field(default=None)
     
-    # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Timestamps (monthly partition key on Postgres)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     updated_at: Optional[datetime] = Field(default=None)
     shipped_at: Optional[datetime] = Field(default=None)
     delivered_at: Optional[datetime] = Field(default=None)
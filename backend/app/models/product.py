@@ -1,18 +1,28 @@
 """
 Product Database Model
 """
-from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional, List
+from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlalchemy import JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID, uuid4
 from decimal import Decimal
 
+# JSONB on Postgres, JSON (TEXT + JSON1 functions) elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Product(SQLModel, table=True):
     """
     Product model for items in the catalog
     """
     __tablename__ = "products"
+    __table_args__ = (
+        # GIN indexes serve the @> containment filters (Postgres only)
+        Index("ix_products_specifications_gin", "specifications", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_products_features_gin", "features", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
     
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str = Field(max_length=255, index=True)
@@ -29,15 +39,15 @@ class Product(SQLModel, table=True):
     
     # Media
     image_url: Optional[str] = Field(default=None, max_length=500)
-    images: Optional[str] = Field(default=None)  # JSON array of image URLs
+    images: Optional[List[str]] = Field(default=None, sa_column=Column(JSONType))  # Image URLs
     
     # Category relationship
-    category_id: Optional[UUID] = Field(default=None, foreign_key="categories.id")
+    category_id: Optional[UUID] = Field(default=None, foreign_key="categories.id", index=True)
     category: Optional["Category"] = Relationship(back_populates="products")
     
     # Product details
-    features: Optional[str] = Field(default=None)  # JSON array
-    specifications: Optional[str] = Field(default=None)  # JSON object
+    features: Optional[List[str]] = Field(default=None, sa_column=Column(JSONType))
+    specifications: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONType))
     
     # Status
     is_active: bool = Field(default=True)
@@ -47,6 +57,9 @@ class Product(SQLModel, table=True):
     meta_title: Optional[str] = Field(default=None, max_length=255)
     meta_description: Optional[str] = Field(default=None, max_length=500)
     
+    # Catalog version of the last write (delta sync)
+    change_seq: int = Field(default=0, index=True)
+    
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = Field(default=None)
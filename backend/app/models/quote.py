@@ -52,7 +52,7 @@ class Quote(SQLModel, table=True):
     admin_response: Optional[str] = Field(default=None)
     estimated_price: Optional[str] = Field(default=None, max_length=100)
     
-    # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Timestamps (monthly partition key on Postgres)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     updated_at: Optional[datetime] = Field(default=None)
     responded_at: Optional[datetime] = Field(default=None)
@@ -0,0 +1,31 @@
+"""
+Product Recommendation Database Models
+"""
+from sqlmodel import SQLModel, Field
+from uuid import UUID
+
+
+class ProductCooccurrence(SQLModel, table=True):
+    """
+    Number of orders containing both products. The diagonal
+    (product_id == other_id) holds the number of orders containing the product.
+    """
+    __tablename__ = "product_cooccurrences"
+    
+    product_id: UUID = Field(primary_key=True)
+    other_id: UUID = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+class ProductRecommendation(SQLModel, table=True):
+    """
+    Precomputed top-K related products per product and kind
+    ("bought_together" or "similar"), read with one primary key range scan
+    """
+    __tablename__ = "product_recommendations"
+    
+    product_id: UUID = Field(primary_key=True)
+    kind: str = Field(primary_key=True, max_length=20)
+    rank: int = Field(primary_key=True)
+    related_id: UUID
+    score: float
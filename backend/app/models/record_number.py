@@ -0,0 +1,20 @@
+"""
+Record Number Database Model
+"""
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class RecordNumber(SQLModel, table=True):
+    """
+    Every quote/order number ever issued. Partitioned tables can only enforce
+    (number, created_at), so this plain table keeps the number itself unique.
+    Rows outlive archival so archived numbers are not handed out again.
+    """
+    __tablename__ = "record_numbers"
+    
+    kind: str = Field(primary_key=True, max_length=20)
+    number: str = Field(primary_key=True, max_length=50)
+    
+    # Timestamps
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,41 @@
+"""
+Analytics Rollup Database Models
+"""
+from sqlmodel import SQLModel, Field
+from datetime import date
+from decimal import Decimal
+
+
+class QuoteDailyStat(SQLModel, table=True):
+    """
+    Number of quotes created on a day that are currently in a status
+    """
+    __tablename__ = "quote_daily_stats"
+    
+    day: date = Field(primary_key=True)
+    status: str = Field(primary_key=True, max_length=20)
+    count: int = Field(default=0)
+
+
+class OrderDailyStat(SQLModel, table=True):
+    """
+    Number and value of orders created on a day that are currently in a status
+    """
+    __tablename__ = "order_daily_stats"
+    
+    day: date = Field(primary_key=True)
+    status: str = Field(primary_key=True, max_length=20)
+    count: int = Field(default=0)
+    revenue: Decimal = Field(default=0, decimal_places=2)
+
+
+class CategoryRevenueStat(SQLModel, table=True):
+    """
+    Units sold and revenue per category over all non-cancelled orders
+    (category="uncategorized" for products without one)
+    """
+    __tablename__ = "category_revenue_stats"
+    
+    category: str = Field(primary_key=True, max_length=36)
+    units: int = Field(default=0)
+    revenue: Decimal = Field(default=0, decimal_places=2)
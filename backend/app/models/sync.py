@@ -0,0 +1,14 @@
+"""
+Change Sequence Database Model
+"""
+from sqlmodel import SQLModel, Field
+
+
+class ChangeSequence(SQLModel, table=True):
+    """
+    Named monotonic counter (e.g. "catalog"), bumped once per writing transaction
+    """
+    __tablename__ = "change_sequences"
+    
+    name: str = Field(primary_key=True, max_length=50)
+    value: int = Field(default=0)
@@ -0,0 +1,23 @@
+"""
+Revoked Token Database Model
+"""
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class RevokedToken(SQLModel, table=True):
+    """
+    Revoked refresh token (key "jti:<token id>") or whole token family
+    (key "fam:<family id>"). Rows can be purged once expired.
+    """
+    __tablename__ = "revoked_tokens"
+    
+    key: str = Field(primary_key=True, max_length=100)
+    user_id: Optional[UUID] = Field(default=None, foreign_key="users.id")
+    reason: str = Field(max_length=50)
+    
+    # Timestamps
+    expires_at: datetime = Field(index=True)
+    revoked_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,10 +1,11 @@
 """
 Pydantic schemas for API request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, model_validator
+from typing import Any, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 
 
 # ============================================
@@ -57,6 +58,17 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class StreamTicketResponse(BaseModel):
+    """Short-lived ticket for opening an event stream"""
+    ticket: str
+    expires_at: datetime
+
+
+class RefreshRequest(BaseModel):
+    """Schema for refreshing or revoking a refresh token"""
+    refresh_token: str
+
+
 class TokenPayload(BaseModel):
     """Token payload schema"""
     sub: UUID
@@ -77,7 +89,7 @@ class CategoryBase(BaseModel):
 
 class CategoryCreate(CategoryBase):
     """Schema for creating category"""
-    pass
+    parent_id: Optional[UUID] = None
 
 
 class CategoryUpdate(BaseModel):
@@ -86,6 +98,7 @@ class CategoryUpdate(BaseModel):
     description: Optional[str] = None
     is_active: Optional[bool] = None
     sort_order: Optional[int] = None
+    parent_id: Optional[UUID] = None
 
 
 class CategoryResponse(CategoryBase):
@@ -95,10 +108,22 @@ class CategoryResponse(CategoryBase):
     image_url: Optional[str] = None
     sort_order: int
     created_at: datetime
+    parent_id: Optional[UUID] = None
     
     model_config = ConfigDict(from_attributes=True)
 
 
+class CategoryTreeNode(BaseModel):
+    """Active category with its active subcategories"""
+    id: UUID
+    name: str
+    slug: str
+    image_url: Optional[str] = None
+    sort_order: int
+    parent_id: Optional[UUID] = None
+    children: list["CategoryTreeNode"] = []
+
+
 # ============================================
 # Product Schemas
 # ============================================
@@ -117,6 +142,8 @@ class ProductCreate(ProductBase):
     """Schema for creating product"""
     sku: Optional[str] = None
     features: Optional[list[str]] = None
+    specifications: Optional[dict[str, str]] = None
+    images: Optional[list[str]] = None
     is_featured: bool = False
 
 
@@ -128,6 +155,9 @@ class ProductUpdate(BaseModel):
     compare_at_price: Optional[float] = Field(None, ge=0)
     stock: Optional[int] = Field(None, ge=0)
     category_id: Optional[UUID] = None
+    features: Optional[list[str]] = None
+    specifications: Optional[dict[str, str]] = None
+    images: Optional[list[str]] = None
     is_active: Optional[bool] = None
     is_featured: Optional[bool] = None
 
@@ -138,6 +168,9 @@ class ProductResponse(ProductBase):
     slug: str
     sku: Optional[str] = None
     image_url: Optional[str] = None
+    images: Optional[list[str]] = None
+    features: Optional[list[str]] = None
+    specifications: Optional[dict[str, Any]] = None
     is_active: bool
     is_featured: bool
     created_at: datetime
@@ -146,6 +179,94 @@ class ProductResponse(ProductBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductBulkUpdate(BaseModel):
+    """
+    Schema for a bulk product mutation: selects products by `ids` and/or
+    filters and applies every given change to all of them
+    """
+    # Selection
+    ids: Optional[list[UUID]] = Field(None, max_length=5000)
+    category_id: Optional[UUID] = None
+    is_active: Optional[bool] = None
+    is_featured: Optional[bool] = None
+    
+    # Changes
+    set_stock: Optional[int] = Field(None, ge=0)
+    adjust_stock: Optional[int] = None
+    price_change_percent: Optional[float] = Field(None, gt=-100, le=1000)
+    activate: Optional[bool] = None
+    move_to_category_id: Optional[UUID] = None
+    
+    @model_validator(mode="after")
+    def check_selection_and_changes(self):
+        if self.ids is None and self.category_id is None and self.is_active is None \
+                and self.is_featured is None:
+            raise ValueError("Select products with ids or at least one filter")
+        if self.set_stock is not None and self.adjust_stock is not None:
+            raise ValueError("Use either set_stock or adjust_stock, not both")
+        if self.set_stock is None and self.adjust_stock is None and self.price_change_percent is None \
+                and self.activate is None and self.move_to_category_id is None:
+            raise ValueError("No changes requested")
+        return self
+
+
+class ProductBulkResult(BaseModel):
+    """Schema for a bulk product mutation result"""
+    updated: int
+
+
+class FacetedProductResponse(BaseModel):
+    """Schema for product results with facet counts"""
+    items: list[ProductResponse]
+    facets: dict[str, dict[str, int]]
+
+
+class RelatedProductResponse(BaseModel):
+    """Schema for a recommended product"""
+    id: UUID
+    name: str
+    slug: str
+    price: float
+    image_url: Optional[str] = None
+    kind: str
+    score: float
+
+
+class SuggestionResponse(BaseModel):
+    """Schema for a typeahead suggestion"""
+    kind: str
+    id: UUID
+    label: str
+    slug: str
+
+
+class CatalogSyncResponse(BaseModel):
+    """Schema for a page of catalog changes since a sync token"""
+    sync_token: str
+    has_more: bool
+    products: list[ProductResponse]
+    categories: list[CategoryResponse]
+    deleted_products: list[UUID]
+    deleted_categories: list[UUID]
+
+
+class CategoryHighlight(BaseModel):
+    """A top-level category with a few of its products"""
+    category_id: UUID
+    name: str
+    slug: str
+    image_url: Optional[str] = None
+    products: list[ProductResponse]
+
+
+class StorefrontHomeResponse(BaseModel):
+    """Schema for everything the storefront home page shows"""
+    generated_at: datetime
+    categories: list[CategoryTreeNode]
+    featured: list[ProductResponse]
+    highlights: list[CategoryHighlight]
+
+
 # ============================================
 # Quote Schemas
 # ============================================
@@ -188,6 +309,74 @@ class QuoteUpdateStatus(BaseModel):
     estimated_price: Optional[str] = None
 
 
+# ============================================
+# Admin Stats Schemas
+# ============================================
+
+class QuoteDayStats(BaseModel):
+    """Quotes created on a day, by current status"""
+    day: date
+    counts: dict[str, int]
+
+
+class QuoteStats(BaseModel):
+    """Quote rollup for the requested window"""
+    total: int
+    by_status: dict[str, int]
+    conversion_rate: float
+    daily: list[QuoteDayStats]
+
+
+class OrderDayStats(BaseModel):
+    """Non-cancelled orders created on a day"""
+    day: date
+    orders: int
+    revenue: Decimal
+
+
+class OrderStats(BaseModel):
+    """Order rollup for the requested window"""
+    total: int
+    revenue: Decimal
+    by_status: dict[str, int]
+    daily: list[OrderDayStats]
+
+
+class CategoryRevenue(BaseModel):
+    """All-time units and revenue for a category"""
+    category_id: Optional[UUID] = None
+    name: str
+    units: int
+    revenue: Decimal
+
+
+class AdminStatsResponse(BaseModel):
+    """Admin dashboard statistics"""
+    since: date
+    quotes: QuoteStats
+    orders: OrderStats
+    categories: list[CategoryRevenue]
+
+
+class ProfileTokenResponse(BaseModel):
+    """Token that enables profiling for the requests carrying it"""
+    token: str
+    header: str
+    expires_at: datetime
+
+
+class ProfileInfo(BaseModel):
+    """A stored request profile"""
+    id: str
+    method: str
+    path: str
+    query: str
+    status: int
+    duration_ms: float
+    created_at: datetime
+    user_id: Optional[str] = None
+
+
 # ============================================
 # Generic Response Schemas
 # ============================================
@@ -0,0 +1,369 @@
+"""
+Analytics Rollups - Incrementally maintained quote and order statistics
+
+Quotes and orders per creation day and current status, and units/revenue
+per category, are adjusted inside the same transaction as each quote or
+order write, so the admin dashboard reads a bounded number of small rows
+however much history there is. rebuild_rollups() backfills the tables from
+scratch and reconcile_rollups() repairs drift left by writes that bypassed
+the hooks (manual SQL, scripts).
+"""
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Iterable
+
+from sqlalchemy import delete, text, update
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.services.facets import UPSERT_INSERTS
+from app.models import (
+    Category,
+    CategoryRevenueStat,
+    Order,
+    OrderDailyStat,
+    OrderItem,
+    OrderStatus,
+    Product,
+    Quote,
+    QuoteDailyStat,
+    QuoteStatus,
+)
+
+UNCATEGORIZED = "uncategorized"
+CENT = Decimal("0.01")
+
+# Quotes that received an answer count towards the conversion rate
+CONVERTED_QUOTE_STATUSES = (QuoteStatus.RESPONDED.value, QuoteStatus.CLOSED.value)
+
+# Rollup model -> primary key columns
+ROLLUP_KEYS = {
+    QuoteDailyStat: ("day", "status"),
+    OrderDailyStat: ("day", "status"),
+    CategoryRevenueStat: ("category",),
+}
+
+
+def status_value(value) -> str:
+    """Plain status string for an enum member or raw string"""
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+def as_day(value) -> date:
+    """Date of a datetime, date or ISO string (SQLite returns strings from date())"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def money(value) -> Decimal:
+    return Decimal(value or 0).quantize(CENT)
+
+
+def bump(session: Session, model, keys: dict, **deltas) -> None:
+    """
+    Add deltas to a rollup row, creating it if missing (a decrement on a
+    missing row is kept as a negative value for reconcile_rollups() to repair).
+    Must be called before the session is committed.
+    """
+    if not any(deltas.values()):
+        return
+
+    insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is not None:
+        # One atomic statement, so concurrent writers creating the same row don't collide
+        statement = insert(model).values(**keys, **deltas)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + change for name, change in deltas.items()}
+        ))
+        return
+
+    result = session.execute(
+        update(model)
+        .where(*(getattr(model, name) == value for name, value in keys.items()))
+        .values(**{name: getattr(model, name) + change for name, change in deltas.items()})
+    )
+
+    if result.rowcount == 0:
+        session.add(model(**keys, **deltas))
+
+
+# ============================================
+# Incremental hooks
+# ============================================
+
+def quote_created(session: Session, quote: Quote) -> None:
+    bump(
+        session,
+        QuoteDailyStat,
+        {"day": as_day(quote.created_at), "status": status_value(quote.status)},
+        count=1
+    )
+
+
+def quote_status_changed(session: Session, quote: Quote, before) -> None:
+    """Move a quote from its previous status to its current one"""
+    before, after = status_value(before), status_value(quote.status)
+    if before == after:
+        return
+
+    day = as_day(quote.created_at)
+    bump(session, QuoteDailyStat, {"day": day, "status": before}, count=-1)
+    bump(session, QuoteDailyStat, {"day": day, "status": after}, count=1)
+
+
+def apply_category_revenue(session: Session, items: Iterable[OrderItem], sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) order items from the category revenue"""
+    items = list(items)
+    if not items:
+        return
+
+    categories = dict(session.exec(
+        select(Product.id, Product.category_id).where(Product.id.in_({item.product_id for item in items}))
+    ).all())
+
+    totals: dict[str, list] = defaultdict(lambda: [0, Decimal(0)])
+    for item in items:
+        category_id = categories.get(item.product_id)
+        total = totals[str(category_id) if category_id else UNCATEGORIZED]
+        total[0] += item.quantity
+        total[1] += money(item.total_price)
+
+    for category, (units, revenue) in totals.items():
+        bump(session, CategoryRevenueStat, {"category": category}, units=sign * units, revenue=sign * revenue)
+
+
+def order_created(session: Session, order: Order, items: Iterable[OrderItem]) -> None:
+    status = status_value(order.status)
+    bump(
+        session,
+        OrderDailyStat,
+        {"day": as_day(order.created_at), "status": status},
+        count=1,
+        revenue=money(order.total_amount)
+    )
+
+    if status != OrderStatus.CANCELLED.value:
+        apply_category_revenue(session, items, sign=1)
+
+
+def order_status_changed(session: Session, order: Order, before) -> None:
+    """Move an order from its previous status; cancelling removes its category revenue"""
+    before, after = status_value(before), status_value(order.status)
+    if before == after:
+        return
+
+    day = as_day(order.created_at)
+    amount = money(order.total_amount)
+    bump(session, OrderDailyStat, {"day": day, "status": before}, count=-1, revenue=-amount)
+    bump(session, OrderDailyStat, {"day": day, "status": after}, count=1, revenue=amount)
+
+    cancelled = OrderStatus.CANCELLED.value
+    if cancelled in (before, after):
+        apply_category_revenue(session, order.items, sign=-1 if after == cancelled else 1)
+
+
+# ============================================
+# Backfill and reconcile
+# ============================================
+
+def lock_rollups(session: Session) -> None:
+    """
+    On Postgres, block incremental writers while the rollups are recomputed.
+    A writer either committed before the lock (and is counted by the
+    recompute) or waits for it (and applies its delta afterwards).
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        tables = ", ".join(model.__tablename__ for model in ROLLUP_KEYS)
+        session.execute(text(f"LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE"))
+
+
+def compute_rollups(session: Session) -> dict:
+    """
+    Aggregate the source tables into {model: {key: {column: value}}}
+    """
+    expected: dict = {model: {} for model in ROLLUP_KEYS}
+
+    quote_day = func.date(Quote.created_at)
+    for day, status, count in session.exec(
+        select(quote_day, Quote.status, func.count()).group_by(quote_day, Quote.status)
+    ):
+        expected[QuoteDailyStat][(as_day(day), status_value(status))] = {"count": count}
+
+    order_day = func.date(Order.created_at)
+    for day, status, count, revenue in session.exec(
+        select(order_day, Order.status, func.count(), func.sum(Order.total_amount))
+        .group_by(order_day, Order.status)
+    ):
+        expected[OrderDailyStat][(as_day(day), status_value(status))] = {
+            "count": count,
+            "revenue": money(revenue),
+        }
+
+    for category_id, units, revenue in session.exec(
+        select(Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.total_price))
+        .select_from(OrderItem)
+        .join(Order, OrderItem.order_id == Order.id)
+        .join(Product, OrderItem.product_id == Product.id)
+        .where(Order.status != OrderStatus.CANCELLED)
+        .group_by(Product.category_id)
+    ):
+        expected[CategoryRevenueStat][(str(category_id) if category_id else UNCATEGORIZED,)] = {
+            "units": units or 0,
+            "revenue": money(revenue),
+        }
+
+    # Archived quotes and orders left the hot tables but still count
+    if os.path.isdir(settings.ARCHIVE_DIR):
+        from app.services.archive import archived_rollups
+        add_archived_rollups(session, expected, archived_rollups())
+
+    return expected
+
+
+def add_archived_rollups(session: Session, expected: dict, archived: dict) -> None:
+    for key, count in archived["quotes"].items():
+        row = expected[QuoteDailyStat].setdefault(key, {"count": 0})
+        row["count"] += count
+
+    for key, (count, revenue) in archived["orders"].items():
+        row = expected[OrderDailyStat].setdefault(key, {"count": 0, "revenue": money(0)})
+        row["count"] += count
+        row["revenue"] = money(row["revenue"] + revenue)
+
+    if not archived["products"]:
+        return
+
+    categories = dict(session.exec(
+        select(Product.id, Product.category_id).where(Product.id.in_(list(archived["products"])))
+    ).all())
+    for product_id, (units, revenue) in archived["products"].items():
+        category_id = categories.get(product_id)
+        key = (str(category_id) if category_id else UNCATEGORIZED,)
+        row = expected[CategoryRevenueStat].setdefault(key, {"units": 0, "revenue": money(0)})
+        row["units"] += units
+        row["revenue"] = money(row["revenue"] + revenue)
+
+
+def rebuild_rollups(session: Session) -> None:
+    """
+    Recompute all rollups from the source tables (backfill)
+    """
+    lock_rollups(session)
+    expected = compute_rollups(session)
+
+    for model, rows in expected.items():
+        session.execute(delete(model))
+        keys = ROLLUP_KEYS[model]
+        for key, values in rows.items():
+            session.add(model(**dict(zip(keys, key)), **values))
+
+
+def reconcile_rollups(session: Session) -> int:
+    """
+    Compare the rollups with the source tables and fix the rows that drifted.
+    Returns the number of rows corrected. The caller commits.
+    """
+    lock_rollups(session)
+    expected = compute_rollups(session)
+    corrected = 0
+
+    for model, rows in expected.items():
+        keys = ROLLUP_KEYS[model]
+        stored = {
+            tuple(getattr(row, name) for name in keys): row
+            for row in session.exec(select(model)).all()
+        }
+
+        for key, values in rows.items():
+            row = stored.pop(key, None)
+            if row is None:
+                session.add(model(**dict(zip(keys, key)), **values))
+                corrected += 1
+            elif any(getattr(row, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(row, name, value)
+                session.add(row)
+                corrected += 1
+
+        # Rows with no source data left (zeroed counters are dropped silently)
+        for row in stored.values():
+            if any(getattr(row, name) for name in model.model_fields if name not in keys):
+                corrected += 1
+            session.delete(row)
+
+    return corrected
+
+
+# ============================================
+# Dashboard reads
+# ============================================
+
+def read_dashboard(session: Session, days: int) -> dict:
+    """
+    Quote and order stats for the last `days` days plus all-time category revenue
+    """
+    since = date.today() - timedelta(days=days - 1)
+
+    quote_days: dict[date, dict[str, int]] = defaultdict(dict)
+    quote_totals: dict[str, int] = defaultdict(int)
+    for row in session.exec(
+        select(QuoteDailyStat).where(QuoteDailyStat.day >= since, QuoteDailyStat.count > 0)
+    ):
+        quote_days[row.day][row.status] = row.count
+        quote_totals[row.status] += row.count
+
+    quote_total = sum(quote_totals.values())
+    converted = sum(quote_totals.get(status, 0) for status in CONVERTED_QUOTE_STATUSES)
+
+    order_days: dict[date, list] = defaultdict(lambda: [0, Decimal(0)])
+    order_totals: dict[str, int] = defaultdict(int)
+    revenue = Decimal(0)
+    for row in session.exec(
+        select(OrderDailyStat).where(OrderDailyStat.day >= since, OrderDailyStat.count > 0)
+    ):
+        order_totals[row.status] += row.count
+        if row.status != OrderStatus.CANCELLED.value:
+            order_days[row.day][0] += row.count
+            order_days[row.day][1] += row.revenue
+            revenue += row.revenue
+
+    names = {str(category_id): name for category_id, name in session.exec(select(Category.id, Category.name))}
+    categories = []
+    for row in session.exec(
+        select(CategoryRevenueStat).where(CategoryRevenueStat.units > 0)
+        .order_by(CategoryRevenueStat.revenue.desc())
+    ):
+        category_id = None if row.category == UNCATEGORIZED else row.category
+        categories.append({
+            "category_id": category_id,
+            "name": names.get(row.category, "Uncategorized"),
+            "units": row.units,
+            "revenue": money(row.revenue),
+        })
+
+    return {
+        "since": since,
+        "quotes": {
+            "total": quote_total,
+            "by_status": dict(quote_totals),
+            "conversion_rate": round(converted / quote_total, 4) if quote_total else 0.0,
+            "daily": [{"day": day, "counts": quote_days[day]} for day in sorted(quote_days)],
+        },
+        "orders": {
+            "total": sum(order_totals.values()),
+            "revenue": money(revenue),
+            "by_status": dict(order_totals),
+            "daily": [
+                {"day": day, "orders": orders, "revenue": money(amount)}
+                for day, (orders, amount) in sorted(order_days.items())
+            ],
+        },
+        "categories": categories,
+    }
@@ -0,0 +1,364 @@
+"""
+Cold Storage Archive - Old closed quotes and delivered orders as Parquet
+
+archive_records() moves CLOSED quotes and DELIVERED orders (with their
+items) created more than ARCHIVE_RETENTION_DAYS ago out of the hot tables
+into zstd-compressed Parquet files:
+
+    ARCHIVE_DIR/<dataset>/year=YYYY/month=MM/part-<timestamp>-<n>.parquet
+
+Each batch is written to a .tmp file, the rows are deleted and committed,
+and only then is the file renamed into place. A .tmp file left behind by a
+crash is published or discarded on the next run, depending on whether its
+rows are still in the hot table, so a record is never lost or archived
+twice.
+
+query_archive() reads the files back for the admin endpoint, and
+archived_rollups() lets the analytics reconcile job keep counting archived
+records. pyarrow is imported on first use.
+"""
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Boolean, DateTime, Integer, Numeric, delete, text
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Order, OrderItem, OrderStatus, Quote, QuoteStatus
+
+# Dataset name -> (model, archived status, business number column)
+ARCHIVE_KINDS = {
+    "quotes": (Quote, QuoteStatus.CLOSED, "quote_number"),
+    "orders": (Order, OrderStatus.DELIVERED, "order_number"),
+}
+ITEMS_DATASET = "order_items"
+
+logger = logging.getLogger(__name__)
+
+
+def arrow_type(column):
+    """pyarrow type for a SQLAlchemy column (UUIDs and enums as strings)"""
+    import pyarrow as pa
+
+    column_type = column.type
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Numeric):
+        return pa.decimal128(12, 2)
+    return pa.string()
+
+
+def arrow_schema(model):
+    import pyarrow as pa
+
+    return pa.schema([(column.name, arrow_type(column)) for column in model.__table__.columns])
+
+
+def arrow_value(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return value.quantize(Decimal("0.01"))
+    return value
+
+
+def to_arrow(model, rows: list):
+    """Arrow table of ORM rows, in the model's column order"""
+    import pyarrow as pa
+
+    columns = [column.name for column in model.__table__.columns]
+    return pa.Table.from_pydict(
+        {name: [arrow_value(getattr(row, name)) for row in rows] for name in columns},
+        schema=arrow_schema(model)
+    )
+
+
+def dataset_dir(dataset: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, dataset)
+
+
+def part_path(dataset: str, month: date, sequence: int) -> str:
+    directory = os.path.join(dataset_dir(dataset), f"year={month.year}", f"month={month.month:02d}")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"part-{datetime.utcnow():%Y%m%dT%H%M%S%f}-{sequence}.parquet")
+
+
+def write_part(table, path: str) -> None:
+    import pyarrow.parquet as pq
+
+    pq.write_table(table, path, compression="zstd")
+    with open(path, "rb") as part_file:
+        os.fsync(part_file.fileno())
+
+
+def pending_parts() -> list[str]:
+    paths = []
+    for dataset in (*ARCHIVE_KINDS, ITEMS_DATASET):
+        for root, _, names in os.walk(dataset_dir(dataset)):
+            paths.extend(os.path.join(root, name) for name in names if name.endswith(".parquet.tmp"))
+    return sorted(paths)
+
+
+def recover_pending(session: Session) -> int:
+    """
+    Publish .tmp files whose rows were deleted (committed) and discard the
+    ones whose rows are still in the hot table. Returns the number published.
+    """
+    import pyarrow.parquet as pq
+
+    models = {"quotes": Quote, "orders": Order, ITEMS_DATASET: OrderItem}
+    published = 0
+
+    for path in pending_parts():
+        dataset = os.path.relpath(path, settings.ARCHIVE_DIR).split(os.sep)[0]
+        model = models[dataset]
+        ids = pq.read_table(path, columns=["id"]).column("id").to_pylist()[:1]
+
+        if ids and session.get(model, UUID(ids[0])) is None:
+            os.replace(path, path[:-len(".tmp")])
+            published += 1
+        else:
+            os.remove(path)
+
+    return published
+
+
+def archive_batch(session: Session, kind: str, rows: list, sequence: int) -> list[str]:
+    """
+    Stage one batch as .tmp parts (per month) and delete its rows.
+    The caller commits, then publishes the returned paths.
+    """
+    model = ARCHIVE_KINDS[kind][0]
+    by_month = defaultdict(list)
+    for row in rows:
+        by_month[date(row.created_at.year, row.created_at.month, 1)].append(row)
+
+    staged = []
+    ids = [row.id for row in rows]
+
+    for month, month_rows in sorted(by_month.items()):
+        path = part_path(kind, month, sequence) + ".tmp"
+        write_part(to_arrow(model, month_rows), path)
+        staged.append(path)
+
+        if kind == "orders":
+            items = session.exec(
+                select(OrderItem).where(OrderItem.order_id.in_([row.id for row in month_rows]))
+            ).all()
+            if items:
+                path = part_path(ITEMS_DATASET, month, sequence) + ".tmp"
+                write_part(to_arrow(OrderItem, items), path)
+                staged.append(path)
+
+    if kind == "orders":
+        session.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+    session.execute(delete(model).where(model.id.in_(ids)))
+
+    return staged
+
+
+def archive_records(session: Session, retention_days: Optional[int] = None) -> dict:
+    """
+    Move archivable quotes and orders into Parquet.
+    Returns {kind: rows archived} plus the months touched.
+    """
+    retention_days = retention_days if retention_days is not None else settings.ARCHIVE_RETENTION_DAYS
+    cutoff = datetime.combine(date.today() - timedelta(days=retention_days), time.min)
+
+    recovered = recover_pending(session)
+    if recovered:
+        logger.info("Published %d archive parts left by an interrupted run", recovered)
+
+    summary = {"cutoff": cutoff.isoformat(), "months": set()}
+    sequence = 0
+
+    for kind, (model, status, _) in ARCHIVE_KINDS.items():
+        archived = 0
+        while True:
+            rows = session.exec(
+                select(model)
+                .where(model.status == status, model.created_at < cutoff)
+                .order_by(model.created_at, model.id)
+                .limit(settings.ARCHIVE_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+
+            summary["months"].update(date(row.created_at.year, row.created_at.month, 1) for row in rows)
+            staged = archive_batch(session, kind, rows, sequence)
+            session.commit()
+            for path in staged:
+                os.replace(path, path[:-len(".tmp")])
+
+            archived += len(rows)
+            sequence += 1
+            session.expunge_all()
+
+        summary[kind] = archived
+
+    summary["months"] = sorted(summary["months"])
+    return summary
+
+
+def vacuum_partitions(engine, months: list[date]) -> None:
+    """
+    VACUUM ANALYZE the hot partitions an archive run deleted from (Postgres)
+    """
+    from app.services.partitions import is_partitioned, partition_name
+
+    if engine.dialect.name != "postgresql":
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in ("quotes", "orders", "order_items"):
+            if table == "order_items" or not is_partitioned(connection, table):
+                connection.execute(text(f"VACUUM ANALYZE {table}"))
+                continue
+            for month in months:
+                name = partition_name(table, month)
+                if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+                    connection.execute(text(f"VACUUM ANALYZE {name}"))
+
+
+# ============================================
+# Reads
+# ============================================
+
+def dataset_model(dataset: str):
+    return OrderItem if dataset == ITEMS_DATASET else ARCHIVE_KINDS[dataset][0]
+
+
+def open_dataset(dataset: str):
+    """
+    Arrow dataset over a directory of parts; year/month come from the
+    directory names, so filters on them skip whole directories
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    directory = dataset_dir(dataset)
+    if not os.path.isdir(directory):
+        return None
+
+    partitioning = ds.partitioning(pa.schema([("year", pa.int32()), ("month", pa.int32())]), flavor="hive")
+    schema = arrow_schema(dataset_model(dataset))
+    schema = schema.append(pa.field("year", pa.int32())).append(pa.field("month", pa.int32()))
+    return ds.dataset(directory, format="parquet", partitioning=partitioning, schema=schema)
+
+
+def record_columns(dataset: str) -> list[str]:
+    return [column.name for column in dataset_model(dataset).__table__.columns]
+
+
+def query_archive(
+    kind: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    number: Optional[str] = None,
+    email: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    limit: int = 100
+) -> list[dict]:
+    """
+    Archived records, newest first. Date filters prune whole year/month
+    directories; orders come with their items.
+    """
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    dataset = open_dataset(kind)
+    if dataset is None:
+        return []
+
+    number_column = ARCHIVE_KINDS[kind][2]
+    conditions = []
+    if start:
+        conditions.append(ds.field("year") >= start.year)
+        conditions.append(ds.field("created_at") >= datetime.combine(start, time.min))
+    if end:
+        conditions.append(ds.field("year") <= end.year)
+        conditions.append(ds.field("created_at") < datetime.combine(end + timedelta(days=1), time.min))
+    if number:
+        conditions.append(ds.field(number_column) == number)
+    if email and kind == "quotes":
+        conditions.append(ds.field("contact_email") == email)
+    if user_id:
+        conditions.append(ds.field("user_id") == str(user_id))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    table = dataset.to_table(columns=record_columns(kind), filter=expression)
+    if table.num_rows == 0:
+        return []
+
+    order = pc.sort_indices(table, sort_keys=[("created_at", "descending")])
+    records = table.take(order[:limit]).to_pylist()
+
+    if kind == "orders":
+        items = open_dataset(ITEMS_DATASET)
+        by_order = defaultdict(list)
+        if items is not None:
+            ids = [record["id"] for record in records]
+            item_table = items.to_table(columns=record_columns(ITEMS_DATASET), filter=ds.field("order_id").isin(ids))
+            for item in item_table.to_pylist():
+                by_order[item["order_id"]].append(item)
+        for record in records:
+            record["items"] = by_order[record["id"]]
+
+    return records
+
+
+def archived_rollups() -> dict:
+    """
+    Contributions of archived records to the analytics rollups:
+    {"quotes": {(day, status): count},
+     "orders": {(day, status): (count, revenue)},
+     "products": {product_id: (units, revenue)}}
+    """
+    import pyarrow.compute as pc
+
+    result = {"quotes": {}, "orders": {}, "products": {}}
+
+    for kind in ARCHIVE_KINDS:
+        dataset = open_dataset(kind)
+        if dataset is None:
+            continue
+
+        columns = ["created_at", "status"] + (["total_amount"] if kind == "orders" else [])
+        table = dataset.to_table(columns=columns)
+        if table.num_rows == 0:
+            continue
+
+        table = table.append_column("day", pc.cast(table.column("created_at"), "date32"))
+        aggregates = [("status", "count")] + ([("total_amount", "sum")] if kind == "orders" else [])
+        for row in table.group_by(["day", "status"]).aggregate(aggregates).to_pylist():
+            key = (row["day"], row["status"])
+            if kind == "quotes":
+                result["quotes"][key] = row["status_count"]
+            else:
+                result["orders"][key] = (row["status_count"], row["total_amount_sum"] or Decimal(0))
+
+    items = open_dataset(ITEMS_DATASET)
+    if items is not None:
+        table = items.to_table(columns=["product_id", "quantity", "total_price"])
+        if table.num_rows:
+            for row in table.group_by("product_id").aggregate(
+                [("quantity", "sum"), ("total_price", "sum")]
+            ).to_pylist():
+                result["products"][UUID(row["product_id"])] = (row["quantity_sum"], row["total_price_sum"])
+
+    return result
@@ -0,0 +1,79 @@
+"""
+Attribute Filters - Filter products on JSON specifications and features
+
+`spec.<key>=<value>` matches products whose specifications contain that
+key/value pair and `feature=<value>` (repeatable) matches products listing
+that feature. On Postgres both become a single JSONB containment (@>) test
+served by the GIN indexes; on SQLite they use the JSON1 functions.
+"""
+import re
+from dataclasses import dataclass, field
+
+from sqlalchemy import exists, literal, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import func
+
+from app.models import Product
+
+SPEC_PREFIX = "spec."
+SPEC_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_]{1,50}$")
+
+
+@dataclass
+class AttributeFilters:
+    """Requested specification and feature filters"""
+    specs: dict[str, str] = field(default_factory=dict)
+    features: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.specs or self.features)
+
+
+def parse_spec_params(query_params) -> dict[str, str]:
+    """
+    Collect `spec.<key>=<value>` query parameters. Raises ValueError on bad keys.
+    """
+    specs = {}
+
+    for name, value in query_params.items():
+        if not name.startswith(SPEC_PREFIX):
+            continue
+
+        key = name[len(SPEC_PREFIX):]
+        if not SPEC_KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid specification filter: {name}")
+        specs[key] = value
+
+    return specs
+
+
+def apply_attribute_filters(statement, filters: AttributeFilters, dialect_name: str):
+    """
+    Add the specification / feature filters to a product select statement
+    """
+    if not filters:
+        return statement
+
+    if dialect_name == "postgresql":
+        if filters.specs:
+            statement = statement.where(
+                type_coerce(Product.specifications, JSONB).contains(filters.specs)
+            )
+        if filters.features:
+            statement = statement.where(
+                type_coerce(Product.features, JSONB).contains(filters.features)
+            )
+        return statement
+
+    for key, value in filters.specs.items():
+        statement = statement.where(
+            func.json_extract(Product.specifications, f'$."{key}"') == value
+        )
+
+    for feature in filters.features:
+        items = func.json_each(Product.features).table_valued("value")
+        statement = statement.where(
+            exists(select(literal(1)).select_from(items).where(items.c.value == feature))
+        )
+
+    return statement
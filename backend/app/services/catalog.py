@@ -0,0 +1,44 @@
+"""
+Catalog Change Notifications
+
+Product and category writes are announced on the invalidation bus so every
+worker's in-process catalog caches can update or drop their entries.
+Subscribers receive one of:
+- {"kind": "product", "id": ..., "name": ..., ...} for a single product
+- {"kind": "category", "id": ..., "name": ..., ...} for a single category
+- {"reload": True} when anything may have changed (bulk writes, reconnects)
+"""
+from app.core.events import bus
+from app.models import Product, Category
+
+CATALOG_TOPIC = "catalog"
+
+
+def product_changed(product: Product) -> None:
+    """Announce a committed product write"""
+    bus.publish(CATALOG_TOPIC, {
+        "kind": "product",
+        "id": str(product.id),
+        "name": product.name,
+        "sku": product.sku,
+        "slug": product.slug,
+        "category_id": str(product.category_id) if product.category_id else None,
+        "is_featured": product.is_featured,
+        "is_active": product.is_active,
+    })
+
+
+def category_changed(category: Category) -> None:
+    """Announce a committed category write"""
+    bus.publish(CATALOG_TOPIC, {
+        "kind": "category",
+        "id": str(category.id),
+        "name": category.name,
+        "slug": category.slug,
+        "is_active": category.is_active,
+    })
+
+
+def catalog_reloaded() -> None:
+    """Announce a change that may touch any part of the catalog"""
+    bus.publish(CATALOG_TOPIC, {"reload": True})
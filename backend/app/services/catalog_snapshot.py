@@ -0,0 +1,289 @@
+"""
+Catalog Snapshot - Versioned, memory-mapped catalog shared by the workers of a host
+
+The active products (name, SKU, slug, price, stock, featured flag) and all
+categories are compiled into uncompressed Arrow IPC files under
+CATALOG_SNAPSHOT_DIR, versioned by the catalog change sequence. Only
+catalog data goes in - sales figures change without bumping the sequence,
+so they are read from the database by the consumers that need them.
+
+    products-<version>.arrow, categories-<version>.arrow, manifest.json
+
+Workers memory-map the files read-only, so a freshly started (or recycled)
+worker has the catalog without querying the database, and the file data is
+read from disk once per host. The row objects handed out by product_rows()
+and category_rows(), and whatever consumers build from them, are still
+allocated in each worker.
+
+A rebuild writes new versioned files and then replaces manifest.json
+(write + rename), which switches all readers at once. Readers swap their
+reference to the new version with a single assignment - no locks; a
+request still holding the previous version keeps a valid mapping.
+
+Catalog changes schedule a rebuild on every worker (debounced). The first
+worker to take the host lock rebuilds; the others find the manifest
+current and only map the new files. Consumers must compare the snapshot's
+version with current_change_seq() before trusting it.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.core.database import background_session
+from app.core.events import bus
+from app.models import Category, Product
+from app.services.archive import arrow_value
+from app.services.catalog import CATALOG_TOPIC
+from app.services.sync import current_change_seq
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Versions kept on disk (the current one and the one before, for late readers)
+KEEP_VERSIONS = 2
+
+
+def product_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("slug", pa.string()),
+        ("sku", pa.string()),
+        ("price", pa.decimal128(12, 2)),
+        ("compare_at_price", pa.decimal128(12, 2)),
+        ("stock", pa.int64()),
+        ("in_stock", pa.bool_()),
+        ("is_featured", pa.bool_()),
+        ("category_id", pa.string()),
+        ("image_url", pa.string()),
+    ])
+
+
+def category_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("slug", pa.string()),
+        ("image_url", pa.string()),
+        ("sort_order", pa.int64()),
+        ("parent_id", pa.string()),
+        ("path", pa.string()),
+        ("is_active", pa.bool_()),
+        ("product_count", pa.int64()),
+    ])
+
+
+def snapshot_path(name: str) -> str:
+    return os.path.join(settings.CATALOG_SNAPSHOT_DIR, name)
+
+
+@contextmanager
+def snapshot_lock():
+    """One rebuild at a time per host (blocking - the loser then finds it current)"""
+    os.makedirs(settings.CATALOG_SNAPSHOT_DIR, exist_ok=True)
+    with open(snapshot_path(".lock"), "w") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def read_manifest() -> Optional[dict]:
+    try:
+        with open(snapshot_path(MANIFEST_NAME)) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def table_from_rows(schema, rows: list):
+    import pyarrow as pa
+
+    return pa.Table.from_pydict(
+        {name: [arrow_value(getattr(row, name)) for row in rows] for name in schema.names},
+        schema=schema
+    )
+
+
+def write_table(table, path: str) -> None:
+    import pyarrow as pa
+
+    tmp_path = path + ".tmp"
+    # Uncompressed, so readers can use the mapped buffers as they are
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def build_snapshot(session: Session) -> int:
+    """
+    Compile the catalog into a new snapshot version and publish it.
+    Returns the version. Call with snapshot_lock() held.
+    """
+    # Read first - data committed meanwhile only makes the files newer than labelled
+    version = current_change_seq(session)
+
+    products = session.exec(
+        select(
+            Product.id, Product.name, Product.slug, Product.sku, Product.price,
+            Product.compare_at_price, Product.stock, (Product.stock > 0).label("in_stock"),
+            Product.is_featured, Product.category_id, Product.image_url
+        )
+        .where(Product.is_active == True)
+        .order_by(Product.id)
+    ).all()
+
+    categories = session.exec(
+        select(
+            Category.id, Category.name, Category.slug, Category.image_url, Category.sort_order,
+            Category.parent_id, Category.path, Category.is_active,
+            func.count(Product.id).label("product_count")
+        )
+        .outerjoin(Product, (Product.category_id == Category.id) & (Product.is_active == True))
+        .group_by(Category.id)
+        .order_by(Category.path)
+    ).all()
+
+    files = {"products": f"products-{version}.arrow", "categories": f"categories-{version}.arrow"}
+    write_table(table_from_rows(product_schema(), products), snapshot_path(files["products"]))
+    write_table(table_from_rows(category_schema(), categories), snapshot_path(files["categories"]))
+
+    # Publishing the manifest switches every reader to the new version
+    manifest_path = snapshot_path(MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w") as manifest_file:
+        json.dump({"version": version, "built_at": datetime.utcnow().isoformat(), "files": files}, manifest_file)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    prune_versions(version)
+    logger.info("Built catalog snapshot v%d (%d products, %d categories)", version, len(products), len(categories))
+    return version
+
+
+def prune_versions(current: int) -> None:
+    """Remove all but the newest KEEP_VERSIONS versions (mapped files stay readable)"""
+    versions = set()
+    for name in os.listdir(settings.CATALOG_SNAPSHOT_DIR):
+        stem, _, extension = name.partition(".")
+        if extension == "arrow" and stem.rsplit("-", 1)[-1].isdigit():
+            versions.add(int(stem.rsplit("-", 1)[-1]))
+
+    keep = set(sorted(versions | {current})[-KEEP_VERSIONS:])
+    for name in os.listdir(settings.CATALOG_SNAPSHOT_DIR):
+        stem, _, extension = name.partition(".")
+        number = stem.rsplit("-", 1)[-1]
+        if extension == "arrow" and number.isdigit() and int(number) not in keep:
+            os.remove(snapshot_path(name))
+
+
+@dataclass(frozen=True)
+class LoadedSnapshot:
+    """One mapped snapshot version (Arrow tables backed by the files)"""
+    version: int
+    products: object
+    categories: object
+
+    def product_rows(self) -> list:
+        return [SimpleNamespace(**row) for row in self.products.to_pylist()]
+
+    def category_rows(self, active_only: bool = True) -> list:
+        rows = [SimpleNamespace(**row) for row in self.categories.to_pylist()]
+        return [row for row in rows if row.is_active] if active_only else rows
+
+
+def map_table(path: str):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+class CatalogSnapshot:
+    """
+    This worker's view of the host's catalog snapshot
+    """
+
+    def __init__(self):
+        self._loaded: Optional[LoadedSnapshot] = None
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+
+    def current(self) -> Optional[LoadedSnapshot]:
+        return self._loaded
+
+    def load(self) -> Optional[LoadedSnapshot]:
+        """Map the version named by the manifest, if it is not the one mapped already"""
+        manifest = read_manifest()
+        if manifest is None:
+            return self._loaded
+
+        loaded = self._loaded
+        if loaded is not None and loaded.version == manifest["version"]:
+            return loaded
+
+        try:
+            snapshot = LoadedSnapshot(
+                version=manifest["version"],
+                products=map_table(snapshot_path(manifest["files"]["products"])),
+                categories=map_table(snapshot_path(manifest["files"]["categories"])),
+            )
+        except (OSError, KeyError):
+            # Pruned by a newer build in between; the next refresh maps that one
+            logger.warning("Catalog snapshot v%s is incomplete, keeping the mapped version", manifest.get("version"))
+            return loaded
+
+        self._loaded = snapshot
+        return snapshot
+
+    def refresh(self) -> Optional[LoadedSnapshot]:
+        """Rebuild the snapshot if it is behind the database, then map it"""
+        try:
+            with snapshot_lock(), background_session() as session:
+                manifest = read_manifest()
+                if manifest is None or manifest["version"] < current_change_seq(session):
+                    build_snapshot(session)
+        except Exception:
+            logger.exception("Catalog snapshot rebuild failed")
+        return self.load()
+
+    def schedule_refresh(self, payload: Optional[dict] = None) -> None:
+        """Refresh shortly, folding bursts of catalog changes into one rebuild"""
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(settings.CATALOG_SNAPSHOT_DEBOUNCE_SECONDS, self._run_scheduled)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run_scheduled(self) -> None:
+        with self._timer_lock:
+            self._timer = None
+        self.refresh()
+
+    def stop(self) -> None:
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+# Process-wide view, refreshed after catalog changes
+catalog_snapshot = CatalogSnapshot()
+bus.subscribe(CATALOG_TOPIC, catalog_snapshot.schedule_refresh)
@@ -0,0 +1,205 @@
+"""
+Category Tree - Materialized paths and a cached tree of categories
+
+Each category stores its ancestry as a path of id hex strings,
+"/<root>/<child>/.../<self>/", assigned on insert and rewritten for the
+whole subtree when a category moves. A category's subtree is then the path
+range [path, path[:-1] + "0") - one indexed range scan ("0" is the
+character right after "/", and paths only contain hex digits and "/").
+
+The full tree is built from one query into a precomputed structure (nested
+nodes plus their JSON encoding), cached per worker and dropped whenever a
+category change is announced on the invalidation bus.
+"""
+import threading
+from typing import Optional
+from uuid import UUID
+
+import orjson
+from sqlalchemy import and_, event, literal, update
+from sqlmodel import Session, select, func
+
+from app.core.events import bus
+from app.models import Category
+from app.services.catalog import CATALOG_TOPIC
+
+PATH_SEPARATOR = "/"
+MAX_DEPTH = 10
+
+
+def child_path(parent_path: Optional[str], category_id: UUID) -> str:
+    return f"{parent_path or PATH_SEPARATOR}{category_id.hex}{PATH_SEPARATOR}"
+
+
+def subtree_condition(path: str):
+    """Categories at or below the one with this path (an index range)"""
+    return and_(Category.path >= path, Category.path < path[:-1] + "0")
+
+
+def path_depth(path: str) -> int:
+    return path.count(PATH_SEPARATOR) - 1
+
+
+@event.listens_for(Category, "before_insert")
+def assign_path(mapper, connection, target) -> None:
+    """Derive the path of a new category from its parent"""
+    if target.path:
+        return
+
+    parent_path = None
+    if target.parent_id is not None:
+        parent_path = connection.execute(
+            select(Category.path).where(Category.id == target.parent_id)
+        ).scalar_one_or_none()
+        if parent_path is None:
+            raise ValueError("Parent category not found")
+
+    target.path = child_path(parent_path, target.id)
+
+
+def validate_parent(session: Session, category: Optional[Category], parent_id: Optional[UUID]) -> Optional[str]:
+    """
+    Path of the requested parent, checking it exists, is not inside the
+    category itself and keeps the tree within MAX_DEPTH.
+    Raises ValueError otherwise.
+    """
+    if parent_id is None:
+        return None
+
+    parent = session.get(Category, parent_id)
+    if parent is None:
+        raise ValueError("Parent category not found")
+
+    if category is not None and parent.path.startswith(category.path):
+        raise ValueError("A category cannot be moved below itself")
+
+    subtree_height = 0
+    if category is not None:
+        deepest = session.exec(
+            select(func.max(func.length(Category.path))).where(subtree_condition(category.path))
+        ).one()
+        # Every level adds one 32 character id and a separator
+        subtree_height = ((deepest or len(category.path)) - len(category.path)) // 33
+
+    if path_depth(parent.path) + 1 + subtree_height > MAX_DEPTH:
+        raise ValueError(f"Categories can be nested at most {MAX_DEPTH} levels deep")
+
+    return parent.path
+
+
+def move_category(session: Session, category: Category, parent_id: Optional[UUID], change_seq: int) -> None:
+    """
+    Re-parent a category and rewrite the paths of its whole subtree in one
+    statement. The caller commits.
+    """
+    parent_path = validate_parent(session, category, parent_id)
+    old_path = category.path
+    new_path = child_path(parent_path, category.id)
+
+    if new_path != old_path:
+        session.execute(
+            update(Category)
+            .where(subtree_condition(old_path))
+            .values(
+                path=literal(new_path) + func.substr(Category.path, len(old_path) + 1),
+                change_seq=change_seq
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    category.parent_id = parent_id
+    category.path = new_path
+
+
+class CategoryTree:
+    """
+    Per-worker cache of the active category tree
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[dict] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, payload: Optional[dict] = None) -> None:
+        if payload is not None and payload.get("kind") == "product":
+            return
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def get(self, session: Session) -> dict:
+        """
+        {"roots": [...], "by_id": {id: node}, "json": bytes}, built on first use
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        generation = self._generation
+        snapshot = self.build(session)
+        with self._lock:
+            # Don't cache a tree read before a concurrent invalidation
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def build(session: Session) -> dict:
+        rows = session.exec(
+            select(
+                Category.id, Category.name, Category.slug, Category.image_url,
+                Category.sort_order, Category.parent_id, Category.path, Category.is_active
+            ).order_by(Category.path)
+        ).all()
+
+        by_id = {}
+        roots = []
+        # Ordered by path, so every parent comes before its children
+        for row in rows:
+            node = {
+                "id": str(row.id),
+                "name": row.name,
+                "slug": row.slug,
+                "image_url": row.image_url,
+                "sort_order": row.sort_order,
+                "parent_id": str(row.parent_id) if row.parent_id else None,
+                "path": row.path,
+                "is_active": row.is_active,
+                "children": [],
+            }
+            by_id[node["id"]] = node
+
+            # Inactive categories hide their whole subtree
+            parent = by_id.get(node["parent_id"])
+            node["visible"] = row.is_active and (parent is None or parent["visible"])
+            if not node["visible"]:
+                continue
+            (parent["children"] if parent else roots).append(node)
+
+        def public(nodes: list) -> list:
+            nodes.sort(key=lambda node: (node["sort_order"], node["name"]))
+            return [
+                {
+                    "id": node["id"],
+                    "name": node["name"],
+                    "slug": node["slug"],
+                    "image_url": node["image_url"],
+                    "sort_order": node["sort_order"],
+                    "parent_id": node["parent_id"],
+                    "children": public(node["children"]),
+                }
+                for node in nodes
+            ]
+
+        tree = public(roots)
+        return {"roots": tree, "by_id": by_id, "json": orjson.dumps(tree)}
+
+    def path_of(self, session: Session, category_id: UUID) -> Optional[str]:
+        node = self.get(session)["by_id"].get(str(category_id))
+        return node["path"] if node else None
+
+
+# Process-wide tree cache, dropped on category changes
+category_tree = CategoryTree()
+bus.subscribe(CATALOG_TOPIC, category_tree.invalidate)
@@ -0,0 +1,124 @@
+"""
+Analytics Exports - Orders, order items and quotes as Parquet / Arrow streams
+
+Rows are read through a server-side cursor (yield_per) in batches of
+EXPORT_BATCH_SIZE, converted into Arrow record batches (same column types
+as the cold storage archive) and written straight to the response: one
+Parquet row group, or one Arrow IPC message, per batch. Memory stays at one
+batch however many rows are exported.
+
+Every export carries a watermark - the time it started reading. Passing it
+back as `since` exports only rows created or updated after it (order items
+follow their order). The window overlaps the previous one by
+WATERMARK_OVERLAP so rows committed late are not missed; consumers keep the
+latest version of each id.
+"""
+import io
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.core.database import get_engine, set_statement_timeout
+from app.models import Order, OrderItem, Quote
+from app.services.archive import arrow_schema, to_arrow
+
+EXPORT_KINDS = {
+    "orders": Order,
+    "order_items": OrderItem,
+    "quotes": Quote,
+}
+
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def changed_at(model):
+    return func.coalesce(model.updated_at, model.created_at)
+
+
+def export_statement(kind: str, since: Optional[datetime] = None):
+    """All columns of the kind's table, in a stable order, changed after `since`"""
+    model = EXPORT_KINDS[kind]
+    statement = select(*model.__table__.columns).order_by(model.created_at, model.id)
+
+    if since is not None:
+        if since.tzinfo is not None:
+            # Stored timestamps are naive UTC
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        lower = since - WATERMARK_OVERLAP
+        if model is OrderItem:
+            statement = statement.join(Order, OrderItem.order_id == Order.id).where(changed_at(Order) > lower)
+        else:
+            statement = statement.where(changed_at(model) > lower)
+
+    return statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file collecting what the Arrow writers emit until drained"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_export(kind: str, export_format: str, since: Optional[datetime] = None) -> Iterator[bytes]:
+    """
+    Encoded export, chunk by chunk. Uses its own session, since it runs
+    while the response is being sent.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model = EXPORT_KINDS[kind]
+    schema = arrow_schema(model)
+    sink = ChunkSink()
+    output = pa.PythonFile(sink, mode="w")
+
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(output, schema)
+
+    finished = False
+    try:
+        with Session(get_engine()) as session:
+            # The first fetch sorts the whole table; later ones are quick
+            set_statement_timeout(session, 0)
+            result = session.execute(export_statement(kind, since))
+            for rows in result.partitions():
+                writer.write_table(to_arrow(model, rows))
+                yield sink.drain()
+
+        # Parquet footer / Arrow end-of-stream marker
+        writer.close()
+        finished = True
+        yield sink.drain()
+    finally:
+        # Also reached when the client disconnects mid-download
+        if not finished:
+            writer.close()
+        output.close()
@@ -0,0 +1,171 @@
+"""
+Facet Counts - Incrementally maintained product facet summary
+
+Counts per category, price bucket and stock status are kept in the
+product_facet_counts table and adjusted inside the same transaction as
+each product write, so rendering facets is a single small read.
+"""
+from collections import Counter
+from typing import Optional, Union
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.models import Product, ProductFacetCount
+
+FACET_CATEGORY = "category"
+FACET_PRICE = "price"
+FACET_STOCK = "stock"
+
+IN_STOCK = "in_stock"
+OUT_OF_STOCK = "out_of_stock"
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def price_bucket(price) -> str:
+    """Return the price bucket label (e.g. "1000-2500" or "10000+") for a price"""
+    bounds = settings.FACET_PRICE_BUCKETS
+    value = float(price)
+
+    for lower, upper in zip(bounds, bounds[1:]):
+        if lower <= value < upper:
+            return f"{lower}-{upper}"
+
+    return f"{bounds[-1]}+"
+
+
+def price_bucket_range(label: str) -> tuple[float, Optional[float]]:
+    """Return the (lower, upper) price range for a bucket label"""
+    if label.endswith("+"):
+        return float(label[:-1]), None
+
+    lower, upper = label.split("-", 1)
+    return float(lower), float(upper)
+
+
+def product_facets(product: Product) -> list[tuple[str, str]]:
+    """
+    Facet values a product contributes to - inactive products contribute none
+    """
+    if not product.is_active:
+        return []
+
+    facets = [
+        (FACET_PRICE, price_bucket(product.price)),
+        (FACET_STOCK, IN_STOCK if product.stock > 0 else OUT_OF_STOCK),
+    ]
+
+    if product.category_id:
+        facets.append((FACET_CATEGORY, str(product.category_id)))
+
+    return facets
+
+
+def matched_facet_counts(session: Session, *conditions) -> Counter:
+    """
+    Facet values contributed by the products matching `conditions`, counted
+    in one grouped query (for bulk writes)
+    """
+    counts: Counter = Counter()
+    in_stock = Product.stock > 0
+
+    for category_id, stocked, price, total in session.exec(
+        select(Product.category_id, in_stock, Product.price, func.count())
+        .where(Product.is_active == True, *conditions)
+        .group_by(Product.category_id, in_stock, Product.price)
+    ):
+        counts[(FACET_PRICE, price_bucket(price))] += total
+        counts[(FACET_STOCK, IN_STOCK if stocked else OUT_OF_STOCK)] += total
+        if category_id:
+            counts[(FACET_CATEGORY, str(category_id))] += total
+
+    return counts
+
+
+def apply_facet_delta(
+    session: Session,
+    before: Union[list[tuple[str, str]], Counter],
+    after: Union[list[tuple[str, str]], Counter]
+) -> None:
+    """
+    Move a product's contribution from its old facet values to its new ones
+    (or many products' contributions, given as Counters).
+    Must be called before the session is committed.
+    """
+    delta = Counter(after)
+    delta.subtract(Counter(before))
+
+    insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+
+    for (facet, value), change in delta.items():
+        if change == 0:
+            continue
+
+        if insert is not None:
+            # One atomic statement, so concurrent writers creating the same row don't collide
+            statement = insert(ProductFacetCount).values(facet=facet, value=value, count=max(change, 0))
+            session.execute(statement.on_conflict_do_update(
+                index_elements=["facet", "value"],
+                set_={"count": ProductFacetCount.count + change}
+            ))
+            continue
+
+        result = session.execute(
+            update(ProductFacetCount)
+            .where(ProductFacetCount.facet == facet, ProductFacetCount.value == value)
+            .values(count=ProductFacetCount.count + change)
+        )
+
+        if result.rowcount == 0:
+            session.add(ProductFacetCount(facet=facet, value=value, count=max(change, 0)))
+
+
+def rebuild_facet_counts(session: Session) -> None:
+    """
+    Recompute all facet counts from the products table (backfill)
+    """
+    session.execute(delete(ProductFacetCount))
+
+    active = Product.is_active == True
+    counts: Counter = Counter()
+
+    for category_id, total in session.exec(
+        select(Product.category_id, func.count()).where(active, Product.category_id.is_not(None))
+        .group_by(Product.category_id)
+    ):
+        counts[(FACET_CATEGORY, str(category_id))] += total
+
+    for in_stock, total in session.exec(
+        select(Product.stock > 0, func.count()).where(active).group_by(Product.stock > 0)
+    ):
+        counts[(FACET_STOCK, IN_STOCK if in_stock else OUT_OF_STOCK)] += total
+
+    # Prices are bucketed in Python so bucket bounds stay in one place
+    for price, total in session.exec(
+        select(Product.price, func.count()).where(active).group_by(Product.price)
+    ):
+        counts[(FACET_PRICE, price_bucket(price))] += total
+
+    for (facet, value), total in counts.items():
+        session.add(ProductFacetCount(facet=facet, value=value, count=total))
+
+
+def read_facet_counts(session: Session) -> dict[str, dict[str, int]]:
+    """
+    Read all facet counts as {facet: {value: count}}
+    """
+    facets: dict[str, dict[str, int]] = {
+        FACET_CATEGORY: {},
+        FACET_PRICE: {},
+        FACET_STOCK: {},
+    }
+
+    rows = session.exec(select(ProductFacetCount).where(ProductFacetCount.count > 0)).all()
+    for row in rows:
+        facets.setdefault(row.facet, {})[row.value] = row.count
+
+    return facets
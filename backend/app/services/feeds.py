@@ -0,0 +1,437 @@
+"""
+Sitemaps and Product Feeds - Streamed, sharded and cached on disk
+
+Products are split into shards of SITEMAP_SHARD_SIZE by their stable
+(created_at, id) order. Each shard produces a sitemap file plus a fragment
+of the Merchant XML and CSV feeds; the full feeds are assembled by
+concatenating fragments, without touching the database.
+
+A build streams rows through a server-side cursor (yield_per), so memory
+stays flat however large the catalog is. Incremental builds only regenerate
+the shards holding products changed since the last build's watermark.
+
+Layout under FEED_DIR:
+- public/   served at /feeds: sitemap.xml (index), sitemap-pages.xml,
+            sitemap-products-<n>.xml, products.xml, products.csv (+ .gz)
+- parts/    per-shard feed fragments
+- manifest.json   shard boundaries and the watermark
+"""
+import bisect
+import csv
+import fcntl
+import gzip
+import io
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+from xml.sax.saxutils import escape
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.models import Product, Category
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+STREAM_BATCH_SIZE = 1000
+
+# Rows committed by long transactions may carry a timestamp slightly older
+# than the last watermark - re-check a small window
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+SITEMAP_NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+IMAGE_NS = 'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"'
+
+FEED_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+    '<title>{title}</title>\n<link>{link}</link>\n<description>{title} products</description>\n'
+)
+FEED_FOOTER = "</channel>\n</rss>\n"
+
+# Plain RSS elements; every other attribute is in the g: namespace
+RSS_TAGS = {"title", "description", "link"}
+
+CSV_COLUMNS = [
+    "id", "title", "description", "link", "image_link", "price", "sale_price",
+    "availability", "condition", "product_type", "brand",
+]
+
+PRODUCT_COLUMNS = (
+    Product.id, Product.created_at, Product.slug, Product.name, Product.sku,
+    Product.description, Product.meta_title, Product.meta_description,
+    Product.price, Product.compare_at_price, Product.stock, Product.image_url,
+    Product.is_active, Product.updated_at, Category.name.label("category_name"),
+)
+
+
+# ============================================
+# Paths and file helpers
+# ============================================
+
+def public_dir() -> str:
+    return os.path.join(settings.FEED_DIR, "public")
+
+
+def parts_dir() -> str:
+    return os.path.join(settings.FEED_DIR, "parts")
+
+
+def manifest_path() -> str:
+    return os.path.join(settings.FEED_DIR, "manifest.json")
+
+
+def shard_sitemap_name(index: int) -> str:
+    return f"sitemap-products-{index + 1}.xml"
+
+
+def absolute_url(base: str, path: str) -> str:
+    if path.startswith(("http://", "https://")):
+        return path
+    return base.rstrip("/") + "/" + path.lstrip("/")
+
+
+def product_url(slug: str) -> str:
+    return absolute_url(settings.SITE_URL, f"/products/{slug}")
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w"):
+    """Write to a temporary file and move it into place when done"""
+    temporary = f"{path}.tmp"
+    options = {} if "b" in mode else {"encoding": "utf-8", "newline": ""}
+    with open(temporary, mode, **options) as handle:
+        yield handle
+    os.replace(temporary, path)
+
+
+def write_gzip_copy(path: str) -> None:
+    """Precompressed sibling picked up by MediaFiles for Accept-Encoding: gzip"""
+    with open(path, "rb") as source, atomic_write(f"{path}.gz", "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as target:
+            shutil.copyfileobj(source, target)
+
+
+@contextmanager
+def build_lock():
+    """Only one build at a time per FEED_DIR (cron and admin trigger may overlap)"""
+    os.makedirs(settings.FEED_DIR, exist_ok=True)
+    with open(os.path.join(settings.FEED_DIR, ".lock"), "w") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+# ============================================
+# Shard keys and manifest
+# ============================================
+
+def encode_key(created_at: datetime, product_id: UUID) -> list:
+    return [created_at.isoformat(), product_id.hex]
+
+
+def decode_key(key: list) -> tuple[datetime, UUID]:
+    return datetime.fromisoformat(key[0]), UUID(key[1])
+
+
+def load_manifest() -> Optional[dict]:
+    try:
+        with open(manifest_path(), encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+    # Settings that change shard layout or content invalidate the cache
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("settings") != layout_settings():
+        return None
+    return manifest
+
+
+def layout_settings() -> dict:
+    return {
+        "shard_size": settings.SITEMAP_SHARD_SIZE,
+        "site_url": settings.SITE_URL,
+        "feed_base_url": settings.FEED_BASE_URL,
+        "currency": settings.FEED_CURRENCY,
+        "brand": settings.FEED_BRAND,
+    }
+
+
+def save_manifest(manifest: dict) -> None:
+    with atomic_write(manifest_path()) as handle:
+        json.dump(manifest, handle, indent=1)
+
+
+# ============================================
+# Rendering
+# ============================================
+
+def format_price(amount) -> str:
+    return f"{float(amount):.2f} {settings.FEED_CURRENCY}"
+
+
+def feed_entry(row) -> dict:
+    """Merchant feed attributes for a product row"""
+    on_sale = row.compare_at_price is not None and row.compare_at_price > row.price
+    return {
+        "id": row.sku or str(row.id),
+        "title": row.meta_title or row.name,
+        "description": row.meta_description or row.description or row.name,
+        "link": product_url(row.slug),
+        "image_link": absolute_url(settings.FEED_BASE_URL, row.image_url) if row.image_url else "",
+        "price": format_price(row.compare_at_price if on_sale else row.price),
+        "sale_price": format_price(row.price) if on_sale else "",
+        "availability": "in_stock" if row.stock > 0 else "out_of_stock",
+        "condition": "new",
+        "product_type": row.category_name or "",
+        "brand": settings.FEED_BRAND,
+    }
+
+
+def sitemap_url(row) -> str:
+    lastmod = (row.updated_at or row.created_at).strftime("%Y-%m-%d")
+    image = ""
+    if row.image_url:
+        image = f"<image:image><image:loc>{escape(absolute_url(settings.FEED_BASE_URL, row.image_url))}</image:loc></image:image>"
+    return f"<url><loc>{escape(product_url(row.slug))}</loc><lastmod>{lastmod}</lastmod>{image}</url>\n"
+
+
+def feed_item(entry: dict) -> str:
+    fields = []
+    for name, value in entry.items():
+        if value:
+            tag = name if name in RSS_TAGS else f"g:{name}"
+            fields.append(f"<{tag}>{escape(value)}</{tag}>")
+    return f"<item>{''.join(fields)}</item>\n"
+
+
+# ============================================
+# Shard generation
+# ============================================
+
+def shard_statement(start: Optional[tuple], end: Optional[tuple]):
+    """All products in [start, end) in (created_at, id) order"""
+    key = tuple_(Product.created_at, Product.id)
+    statement = (
+        select(*PRODUCT_COLUMNS)
+        .outerjoin(Category, Product.category_id == Category.id)
+        .order_by(Product.created_at, Product.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    if start is not None:
+        statement = statement.where(key >= tuple_(*start))
+    if end is not None:
+        statement = statement.where(key < tuple_(*end))
+    return statement
+
+
+class ShardWriter:
+    """Writes one shard's sitemap and feed fragments"""
+
+    def __init__(self, index: int, start: Optional[tuple]):
+        self.index = index
+        self.start = start
+        self.count = 0
+        self.urls = 0
+        self.sitemap_path = os.path.join(public_dir(), shard_sitemap_name(index))
+        self.xml_path = os.path.join(parts_dir(), f"items-{index + 1}.xml")
+        self.csv_path = os.path.join(parts_dir(), f"items-{index + 1}.csv")
+        self.sitemap = open(f"{self.sitemap_path}.tmp", "w", encoding="utf-8")
+        self.xml = open(f"{self.xml_path}.tmp", "w", encoding="utf-8")
+        self.csv_file = open(f"{self.csv_path}.tmp", "w", encoding="utf-8", newline="")
+        self.csv = csv.writer(self.csv_file)
+        self.sitemap.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset {SITEMAP_NS} {IMAGE_NS}>\n')
+
+    def add(self, row) -> None:
+        self.count += 1
+        if not row.is_active:
+            return
+        self.urls += 1
+        self.sitemap.write(sitemap_url(row))
+        entry = feed_entry(row)
+        self.xml.write(feed_item(entry))
+        self.csv.writerow(entry[column] for column in CSV_COLUMNS)
+
+    def close(self) -> dict:
+        self.sitemap.write("</urlset>\n")
+        for handle, path in ((self.sitemap, self.sitemap_path), (self.xml, self.xml_path), (self.csv_file, self.csv_path)):
+            handle.close()
+            os.replace(f"{path}.tmp", path)
+        write_gzip_copy(self.sitemap_path)
+
+        return {
+            "start": encode_key(*self.start) if self.start else None,
+            "count": self.count,
+            "urls": self.urls,
+            "built_at": datetime.utcnow().isoformat(),
+        }
+
+
+def write_shards(session: Session, first_index: int, start: Optional[tuple], end: Optional[tuple], split: bool) -> list[dict]:
+    """
+    Stream the products in [start, end) into shard files. With split=True
+    (the open-ended last range) a new shard starts every SITEMAP_SHARD_SIZE rows.
+    """
+    shards = []
+    writer = ShardWriter(first_index, start)
+
+    for row in session.execute(shard_statement(start, end)):
+        if split and writer.count >= settings.SITEMAP_SHARD_SIZE:
+            shards.append(writer.close())
+            writer = ShardWriter(first_index + len(shards), (row.created_at, row.id))
+        writer.add(row)
+
+    shards.append(writer.close())
+    return shards
+
+
+# ============================================
+# Assembly
+# ============================================
+
+def write_pages_sitemap(session: Session) -> None:
+    """Home page and category pages - small, rebuilt every time"""
+    path = os.path.join(public_dir(), "sitemap-pages.xml")
+    with atomic_write(path) as handle:
+        handle.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset {SITEMAP_NS}>\n')
+        handle.write(f"<url><loc>{escape(absolute_url(settings.SITE_URL, '/'))}</loc></url>\n")
+        handle.write(f"<url><loc>{escape(absolute_url(settings.SITE_URL, '/products'))}</loc></url>\n")
+        for slug, in session.execute(
+            select(Category.slug).where(Category.is_active == True).order_by(Category.sort_order)
+        ):
+            handle.write(f"<url><loc>{escape(absolute_url(settings.SITE_URL, f'/categories/{slug}'))}</loc></url>\n")
+        handle.write("</urlset>\n")
+    write_gzip_copy(path)
+
+
+def write_index(shards: list[dict]) -> None:
+    path = os.path.join(public_dir(), "sitemap.xml")
+    now = datetime.utcnow().strftime("%Y-%m-%d")
+    names = [("sitemap-pages.xml", now)] + [
+        (shard_sitemap_name(index), shard["built_at"][:10]) for index, shard in enumerate(shards)
+    ]
+    with atomic_write(path) as handle:
+        handle.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex {SITEMAP_NS}>\n')
+        for name, lastmod in names:
+            location = escape(absolute_url(settings.FEED_BASE_URL, f"/feeds/{name}"))
+            handle.write(f"<sitemap><loc>{location}</loc><lastmod>{lastmod}</lastmod></sitemap>\n")
+        handle.write("</sitemapindex>\n")
+    write_gzip_copy(path)
+
+
+def assemble_feeds(shard_count: int) -> None:
+    """Concatenate the per-shard fragments into the full feeds (no database access)"""
+    xml_path = os.path.join(public_dir(), "products.xml")
+    with atomic_write(xml_path) as target:
+        target.write(FEED_HEADER.format(title=escape(settings.FEED_BRAND), link=escape(settings.SITE_URL)))
+        for index in range(shard_count):
+            with open(os.path.join(parts_dir(), f"items-{index + 1}.xml"), encoding="utf-8") as source:
+                shutil.copyfileobj(source, target)
+        target.write(FEED_FOOTER)
+    write_gzip_copy(xml_path)
+
+    csv_path = os.path.join(public_dir(), "products.csv")
+    with atomic_write(csv_path) as target:
+        header = io.StringIO()
+        csv.writer(header).writerow(CSV_COLUMNS)
+        target.write(header.getvalue())
+        for index in range(shard_count):
+            with open(os.path.join(parts_dir(), f"items-{index + 1}.csv"), encoding="utf-8", newline="") as source:
+                shutil.copyfileobj(source, target)
+    write_gzip_copy(csv_path)
+
+
+def remove_stale_shards(shard_count: int) -> None:
+    """Drop files of shards that no longer exist after a full rebuild"""
+    for directory in (public_dir(), parts_dir()):
+        for name in os.listdir(directory):
+            stem = name.split(".", 1)[0]
+            number = stem.rsplit("-", 1)[-1]
+            if stem.startswith(("sitemap-products-", "items-")) and number.isdigit() and int(number) > shard_count:
+                os.remove(os.path.join(directory, name))
+
+
+# ============================================
+# Build
+# ============================================
+
+def build_feeds(session: Session, full: bool = False) -> Optional[dict]:
+    """
+    Regenerate sitemaps and feeds. Incremental unless `full`, there is no
+    usable manifest, or a category changed (product_type / category pages).
+    Returns a summary, or None if another build holds the lock.
+    """
+    with build_lock() as acquired:
+        if not acquired:
+            return None
+
+        os.makedirs(public_dir(), exist_ok=True)
+        os.makedirs(parts_dir(), exist_ok=True)
+
+        # Taken before reading so changes made during the build are picked up next time
+        started = datetime.utcnow()
+        manifest = None if full else load_manifest()
+
+        if manifest is not None:
+            watermark = datetime.fromisoformat(manifest["watermark"]) - WATERMARK_OVERLAP
+            categories_changed = session.execute(
+                select(func.count()).select_from(Category)
+                .where(func.coalesce(Category.updated_at, Category.created_at) > watermark)
+            ).scalar()
+            if categories_changed:
+                manifest = None
+
+        if manifest is None:
+            shards = write_shards(session, 0, None, None, split=True)
+            rebuilt = list(range(len(shards)))
+            remove_stale_shards(len(shards))
+        else:
+            shards = manifest["shards"]
+            starts = [decode_key(shard["start"]) for shard in shards[1:]]
+
+            changed = session.execute(
+                select(Product.created_at, Product.id)
+                .where(func.coalesce(Product.updated_at, Product.created_at) > watermark)
+            ).all()
+            dirty = sorted({bisect.bisect_right(starts, (created_at, product_id)) for created_at, product_id in changed})
+
+            for index in dirty:
+                start = decode_key(shards[index]["start"]) if shards[index]["start"] else None
+                last = index == len(shards) - 1
+                end = None if last else decode_key(shards[index + 1]["start"])
+                shards[index:index + 1] = write_shards(session, index, start, end, split=last)
+            rebuilt = dirty
+
+        if rebuilt or manifest is None:
+            assemble_feeds(len(shards))
+        write_pages_sitemap(session)
+        write_index(shards)
+
+        save_manifest({
+            "version": MANIFEST_VERSION,
+            "settings": layout_settings(),
+            "watermark": started.isoformat(),
+            "shards": shards,
+        })
+
+    summary = {
+        "full": manifest is None,
+        "shards": len(shards),
+        "rebuilt_shards": len(rebuilt),
+        "urls": sum(shard["urls"] for shard in shards),
+    }
+    logger.info("Built feeds: %s", summary)
+    return summary
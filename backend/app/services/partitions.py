@@ -0,0 +1,274 @@
+"""
+Table Partitioning - Monthly range partitions for quotes and orders (Postgres)
+
+scripts/partition_tables.py converts the plain tables once into tables
+partitioned by month of created_at:
+
+- the primary key becomes (id, created_at) and the table's own unique
+  index is (number, created_at), since Postgres requires the partition key
+  in every unique constraint. The number alone stays unique through the
+  plain record_numbers table, which is backfilled here and written in the
+  same transaction as every new quote/order (check_partitioned_writes)
+- order_items.order_id keeps its index but loses its foreign key, which
+  cannot reference a partitioned table without the partition key. The ORM
+  write path checks it instead: an item must point at an existing order and
+  an order cannot be deleted while it has items. Bulk statements bypass
+  the check, so they must delete items before their orders (as archival does)
+- a DEFAULT partition catches rows outside the premade months
+
+ensure_partitions() keeps PARTITION_MONTHS_AHEAD future months created and
+drop_empty_partitions() removes old months emptied by the archival job, so
+hot indexes only cover live data. On other databases these are no-ops.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as OrmSession
+
+from app.models import Order, OrderItem, Quote, RecordNumber
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> (business number column, foreign keys to recreate)
+PARTITIONED_TABLES = {
+    "quotes": ("quote_number", {"user_id": "users(id)"}),
+    "orders": ("order_number", {"user_id": "users(id)"}),
+}
+
+# Foreign keys that point at a partitioned table and have to go
+REFERENCING_FOREIGN_KEYS = {
+    "orders": [("order_items", "order_id")],
+}
+
+# Model -> partitioned table, whose name is the record_numbers kind
+NUMBERED_MODELS = {Quote: "quotes", Order: "orders"}
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """Month of a partition named <table>_YYYY_MM (None for the default partition)"""
+    match = re.fullmatch(rf"{table}_(\d{{4}})_(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_postgres(connection) -> bool:
+    return connection.dialect.name == "postgresql"
+
+
+def is_partitioned(connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table}
+    ).first() is not None
+
+
+def list_partitions(connection, table: str) -> list[str]:
+    return list(connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table) "
+            "ORDER BY child.relname"
+        ),
+        {"table": table}
+    ).scalars())
+
+
+def create_partition(connection, table: str, month: date) -> None:
+    """
+    Create the partition for a month, moving any of its rows out of the
+    default partition first (Postgres refuses otherwise)
+    """
+    name = partition_name(table, month)
+    bounds = {"lower": datetime.combine(month, datetime.min.time()),
+              "upper": datetime.combine(add_months(month, 1), datetime.min.time())}
+    default = f"{table}_default"
+
+    stray = connection.execute(
+        text(f"SELECT 1 FROM {default} WHERE created_at >= :lower AND created_at < :upper LIMIT 1"),
+        bounds
+    ).first()
+
+    if stray is None:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+        ))
+        return
+
+    logger.warning("Moving %s rows out of %s into %s", table, default, name)
+    connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    connection.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+    ))
+    connection.execute(
+        text(f"INSERT INTO {table} SELECT * FROM {default} WHERE created_at >= :lower AND created_at < :upper"),
+        bounds
+    )
+    connection.execute(
+        text(f"DELETE FROM {default} WHERE created_at >= :lower AND created_at < :upper"),
+        bounds
+    )
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+
+
+def ensure_partitions(connection, months_ahead: int, today: Optional[date] = None) -> list[str]:
+    """
+    Create missing partitions from the current month to `months_ahead`
+    months ahead. Returns the names created.
+    """
+    if not is_postgres(connection):
+        return []
+
+    current = month_start(today or datetime.utcnow())
+    created = []
+
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+
+        existing = set(list_partitions(connection, table))
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if partition_name(table, month) not in existing:
+                create_partition(connection, table, month)
+                created.append(partition_name(table, month))
+
+    return created
+
+
+def drop_empty_partitions(connection, before: date) -> list[str]:
+    """
+    Drop month partitions that end before `before` and hold no rows
+    """
+    if not is_postgres(connection):
+        return []
+
+    dropped = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+
+        for name in list_partitions(connection, table):
+            month = partition_month(table, name)
+            if month is None or add_months(month, 1) > before:
+                continue
+            if connection.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+                connection.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+
+    return dropped
+
+
+def convert_to_partitioned(connection, table: str, months_ahead: int) -> int:
+    """
+    Rebuild a plain table as a monthly partitioned one, copying its rows.
+    Run inside a single transaction. Returns the number of rows copied.
+    """
+    number_column, foreign_keys = PARTITIONED_TABLES[table]
+    legacy = f"{table}_unpartitioned"
+
+    for referencing_table, column in REFERENCING_FOREIGN_KEYS.get(table, []):
+        for constraint in connection.execute(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE contype = 'f' AND conrelid = to_regclass(:table) "
+                "AND confrelid = to_regclass(:referenced)"
+            ),
+            {"table": referencing_table, "referenced": table}
+        ).scalars():
+            connection.execute(text(f"ALTER TABLE {referencing_table} DROP CONSTRAINT {constraint}"))
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    connection.execute(text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+
+    oldest = connection.execute(text(f"SELECT min(created_at) FROM {legacy}")).scalar()
+    month = month_start(oldest or datetime.utcnow())
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+    while month <= last:
+        create_partition(connection, table, month)
+        month = add_months(month, 1)
+
+    copied = connection.execute(text(f"INSERT INTO {table} SELECT * FROM {legacy}")).rowcount
+    RecordNumber.__table__.create(connection, checkfirst=True)
+    connection.execute(text(
+        f"INSERT INTO record_numbers (kind, number, created_at) "
+        f"SELECT '{table}', {number_column}, created_at FROM {legacy} "
+        f"ON CONFLICT DO NOTHING"
+    ))
+    connection.execute(text(f"DROP TABLE {legacy}"))
+
+    connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)"))
+    connection.execute(text(
+        f"CREATE UNIQUE INDEX ix_{table}_{number_column} ON {table} ({number_column}, created_at)"
+    ))
+    connection.execute(text(f"CREATE INDEX ix_{table}_created_at ON {table} (created_at DESC)"))
+    for column, target in foreign_keys.items():
+        connection.execute(text(f"ALTER TABLE {table} ADD FOREIGN KEY ({column}) REFERENCES {target}"))
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+    return copied
+
+
+def foreign_key_error(message: str, params) -> IntegrityError:
+    return IntegrityError(message, params, LookupError(message))
+
+
+@event.listens_for(OrmSession, "before_flush")
+def check_partitioned_writes(session, flush_context, instances) -> None:
+    """
+    Enforce the constraints partitioning drops, for every ORM flush:
+    claim a record_numbers row for each new quote/order (a reused number
+    fails the flush with an IntegrityError) and check order_items.order_id
+    """
+    for instance in list(session.new):
+        table = NUMBERED_MODELS.get(type(instance))
+        if table is not None:
+            number_column = PARTITIONED_TABLES[table][0]
+            session.add(RecordNumber(kind=table, number=getattr(instance, number_column)))
+
+    new_orders = {order.id for order in session.new if isinstance(order, Order)}
+    referenced = {
+        item.order_id for item in session.new | session.dirty
+        if isinstance(item, OrderItem)
+        and (item in session.new or inspect(item).attrs.order_id.history.has_changes())
+    } - new_orders
+    deleted_orders = {order.id for order in session.deleted if isinstance(order, Order)}
+    deleted_items = {item.id for item in session.deleted if isinstance(item, OrderItem)}
+
+    with session.no_autoflush:
+        if referenced:
+            found = set(session.execute(select(Order.id).where(Order.id.in_(referenced))).scalars())
+            missing = referenced - (found - deleted_orders)
+            if missing:
+                raise foreign_key_error("order_items.order_id references no order", sorted(map(str, missing)))
+
+        if deleted_orders:
+            remaining = session.execute(
+                select(OrderItem.order_id)
+                .where(OrderItem.order_id.in_(deleted_orders), OrderItem.id.not_in(deleted_items))
+                .limit(1)
+            ).scalar()
+            if remaining is not None:
+                raise foreign_key_error("orders row is still referenced by order_items", [str(remaining)])
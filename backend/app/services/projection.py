@@ -0,0 +1,119 @@
+"""
+Response Projection - Sparse fieldsets for product endpoints
+
+`fields=` selects product columns by name (or a preset view such as "card")
+so only those columns are read from the database and serialized.
+"""
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from app.models import Product, Category
+
+# Selectable product columns
+PRODUCT_FIELDS = {
+    "id": Product.id,
+    "name": Product.name,
+    "slug": Product.slug,
+    "description": Product.description,
+    "price": Product.price,
+    "compare_at_price": Product.compare_at_price,
+    "stock": Product.stock,
+    "sku": Product.sku,
+    "image_url": Product.image_url,
+    "images": Product.images,
+    "category_id": Product.category_id,
+    "features": Product.features,
+    "specifications": Product.specifications,
+    "is_active": Product.is_active,
+    "is_featured": Product.is_featured,
+    "meta_title": Product.meta_title,
+    "meta_description": Product.meta_description,
+    "created_at": Product.created_at,
+    "updated_at": Product.updated_at,
+}
+
+# Nested category - joined only when requested
+CATEGORY_FIELD = "category"
+CATEGORY_COLUMNS = {
+    "id": Category.id,
+    "name": Category.name,
+    "slug": Category.slug,
+}
+
+# Preset views
+PRODUCT_VIEWS = {
+    "card": ["id", "name", "slug", "price", "compare_at_price", "image_url"],
+    "detail": [
+        "id", "name", "slug", "description", "price", "compare_at_price", "stock", "sku",
+        "image_url", "images", "features", "specifications", "is_featured",
+        "meta_title", "meta_description", "created_at", CATEGORY_FIELD,
+    ],
+}
+
+
+def resolve_fields(fields: str) -> list[str]:
+    """
+    Expand a comma separated `fields=` value (field names and/or view names)
+    into an ordered list of field names. Raises ValueError on unknown names.
+    """
+    names: list[str] = []
+
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+
+        expanded = PRODUCT_VIEWS.get(name, [name])
+        for field_name in expanded:
+            if field_name not in PRODUCT_FIELDS and field_name != CATEGORY_FIELD:
+                raise ValueError(f"Unknown field: {field_name}")
+            if field_name not in names:
+                names.append(field_name)
+
+    if not names:
+        raise ValueError("No fields requested")
+
+    return names
+
+
+def projection_columns(names: list[str]) -> list:
+    """
+    Columns to select for the resolved field names
+    """
+    columns = [PRODUCT_FIELDS[name] for name in names if name != CATEGORY_FIELD]
+
+    if CATEGORY_FIELD in names:
+        columns.extend(
+            column.label(f"category_{key}") for key, column in CATEGORY_COLUMNS.items()
+        )
+
+    return columns
+
+
+def encode_value(value):
+    """Convert a column value to a JSON-compatible value"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def project_row(row, names: list[str]) -> dict:
+    """
+    Serialize a selected row into a dict holding only the requested fields
+    """
+    values = iter(row)
+    item = {}
+
+    for name in names:
+        if name != CATEGORY_FIELD:
+            item[name] = encode_value(next(values))
+
+    if CATEGORY_FIELD in names:
+        category = {key: encode_value(next(values)) for key in CATEGORY_COLUMNS}
+        item[CATEGORY_FIELD] = category if category["id"] is not None else None
+
+    return item
@@ -0,0 +1,60 @@
+"""
+Quote Events - Live quote updates over server-sent events
+
+Quote writes are published on the invalidation bus (topic "quotes"), so
+every worker forwards them to its own open streams: status changes go to
+the quote owner and to admins, new quotes go to admins.
+"""
+from app.core.events import bus
+from app.core.streams import event_hub
+from app.models import Quote
+
+QUOTE_TOPIC = "quotes"
+ADMIN_CHANNEL = "admins"
+
+QUOTE_CREATED = "quote_created"
+QUOTE_STATUS = "quote_status"
+
+
+def user_channel(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def quote_event_data(quote: Quote) -> dict:
+    return {
+        "id": str(quote.id),
+        "quote_number": quote.quote_number,
+        "user_id": str(quote.user_id) if quote.user_id else None,
+        "company_name": quote.company_name,
+        "status": quote.status,
+        "admin_response": quote.admin_response,
+        "estimated_price": quote.estimated_price,
+        "updated_at": quote.updated_at or quote.created_at,
+    }
+
+
+def publish_quote_created(quote: Quote) -> None:
+    """Announce a committed new quote"""
+    bus.publish(QUOTE_TOPIC, {"kind": QUOTE_CREATED, "quote": quote_event_data(quote)})
+
+
+def publish_quote_status(quote: Quote) -> None:
+    """Announce a committed quote status change"""
+    bus.publish(QUOTE_TOPIC, {"kind": QUOTE_STATUS, "quote": quote_event_data(quote)})
+
+
+def handle_quote_event(payload: dict) -> None:
+    if payload.get("reload"):
+        # Events may have been missed (bus reconnect) - clients should refetch
+        event_hub.publish(None, "resync", {})
+        return
+
+    quote = payload.get("quote") or {}
+    channels = [ADMIN_CHANNEL]
+    if payload.get("kind") == QUOTE_STATUS and quote.get("user_id"):
+        channels.append(user_channel(quote["user_id"]))
+
+    event_hub.publish(channels, payload.get("kind", QUOTE_STATUS), quote)
+
+
+bus.subscribe(QUOTE_TOPIC, handle_quote_event)
@@ -0,0 +1,257 @@
+"""
+Product Recommendations - Precomputed "bought together" and "similar" lists
+
+Pair counts (how many orders contain both products) live in
+product_cooccurrences; the top-K related products per product live in
+product_recommendations, so a product page reads one short primary key range.
+
+- build_recommendations() recomputes everything offline with sparse matrix
+  products (numpy/scipy, imported only there)
+- apply_basket() updates pair counts as orders arrive or are cancelled and
+  recomputes "bought together" for just the products in that order
+"""
+import heapq
+import math
+from collections import defaultdict
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import and_, delete, insert, update
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import Order, OrderItem, OrderStatus, Product, ProductCooccurrence, ProductRecommendation
+
+BOUGHT_TOGETHER = "bought_together"
+SIMILAR = "similar"
+RECOMMENDATION_KINDS = (BOUGHT_TOGETHER, SIMILAR)
+
+# Weight of popularity when ranking same-category products
+POPULARITY_WEIGHT = 0.1
+
+INSERT_BATCH_SIZE = 5000
+
+
+def cooccurrence_score(count, orders_a, orders_b):
+    """
+    Cosine similarity of two products' order sets, damped for pairs seen in
+    only one or two orders. Works on scalars and numpy arrays alike.
+    """
+    return count / (orders_a * orders_b) ** 0.5 * (count / (count + 1.0))
+
+
+def insert_rows(session: Session, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        session.execute(insert(model), rows[start:start + INSERT_BATCH_SIZE])
+
+
+# ============================================
+# Incremental updates
+# ============================================
+
+def apply_basket(session: Session, product_ids: Iterable[UUID], sign: int = 1) -> None:
+    """
+    Add (sign=1, order placed) or remove (sign=-1, order cancelled) one order's
+    products from the pair counts, then refresh their "bought together" lists.
+    Must be called before the session is committed.
+    """
+    products = sorted(set(product_ids))
+    if not products or len(products) > settings.RECOMMENDATION_MAX_BASKET:
+        return
+
+    # Every pair within the basket (diagonal included) in one statement
+    in_basket = and_(ProductCooccurrence.product_id.in_(products), ProductCooccurrence.other_id.in_(products))
+    session.execute(
+        update(ProductCooccurrence)
+        .where(in_basket)
+        .values(count=ProductCooccurrence.count + sign)
+    )
+
+    if sign > 0:
+        existing = set(session.exec(
+            select(ProductCooccurrence.product_id, ProductCooccurrence.other_id).where(in_basket)
+        ).all())
+        missing = [
+            {"product_id": a, "other_id": b, "count": 1}
+            for a in products for b in products if (a, b) not in existing
+        ]
+        if missing:
+            session.execute(insert(ProductCooccurrence), missing)
+
+    refresh_bought_together(session, products)
+
+
+def order_placed(session: Session, items: Iterable[OrderItem]) -> None:
+    apply_basket(session, (item.product_id for item in items), sign=1)
+
+
+def order_cancelled(session: Session, items: Iterable[OrderItem]) -> None:
+    apply_basket(session, (item.product_id for item in items), sign=-1)
+
+
+def refresh_bought_together(session: Session, products: list[UUID]) -> None:
+    """
+    Recompute the "bought together" top-K of the given products from pair counts
+    """
+    own = dict(session.exec(
+        select(ProductCooccurrence.product_id, ProductCooccurrence.count).where(
+            ProductCooccurrence.product_id.in_(products),
+            ProductCooccurrence.other_id == ProductCooccurrence.product_id
+        )
+    ).all())
+
+    other = aliased(ProductCooccurrence)
+    neighbours = session.exec(
+        select(ProductCooccurrence.product_id, ProductCooccurrence.other_id, ProductCooccurrence.count, other.count)
+        .join(other, and_(other.product_id == ProductCooccurrence.other_id, other.other_id == ProductCooccurrence.other_id))
+        .join(Product, Product.id == ProductCooccurrence.other_id)
+        .where(
+            ProductCooccurrence.product_id.in_(products),
+            ProductCooccurrence.other_id != ProductCooccurrence.product_id,
+            ProductCooccurrence.count > 0,
+            Product.is_active == True
+        )
+    ).all()
+
+    scored: dict[UUID, list] = defaultdict(list)
+    for product_id, other_id, count, other_orders in neighbours:
+        if own.get(product_id, 0) > 0 and other_orders > 0:
+            scored[product_id].append((cooccurrence_score(count, own[product_id], other_orders), other_id))
+
+    session.execute(
+        delete(ProductRecommendation).where(
+            ProductRecommendation.product_id.in_(products),
+            ProductRecommendation.kind == BOUGHT_TOGETHER
+        )
+    )
+
+    rows = [
+        {"product_id": product_id, "kind": BOUGHT_TOGETHER, "rank": rank, "related_id": other_id, "score": score}
+        for product_id, candidates in scored.items()
+        for rank, (score, other_id) in enumerate(heapq.nlargest(settings.RECOMMENDATION_TOP_K, candidates))
+    ]
+    if rows:
+        session.execute(insert(ProductRecommendation), rows)
+
+
+# ============================================
+# Offline build
+# ============================================
+
+def top_k(scores, k: int):
+    """Positions of the k largest scores, best first"""
+    import numpy as np
+
+    if len(scores) > k:
+        positions = np.argpartition(-scores, k)[:k]
+    else:
+        positions = np.arange(len(scores))
+    return positions[np.argsort(-scores[positions], kind="stable")]
+
+
+def build_recommendations(session: Session) -> int:
+    """
+    Recompute pair counts and both recommendation kinds from all
+    non-cancelled orders. Returns the number of recommendation rows written.
+    The caller commits; readers keep seeing the old lists until then.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    k = settings.RECOMMENDATION_TOP_K
+
+    products = session.exec(select(Product.id, Product.category_id, Product.is_active)).all()
+    ids = [row[0] for row in products]
+    position = {product_id: i for i, product_id in enumerate(ids)}
+    n = len(ids)
+
+    category_codes: dict = {}
+    category = np.array(
+        [category_codes.setdefault(row[1], len(category_codes)) if row[1] else -1 for row in products],
+        dtype=np.int64
+    )
+    active = np.array([bool(row[2]) for row in products], dtype=bool)
+
+    # Orders x products incidence matrix
+    baskets = session.exec(
+        select(OrderItem.order_id, OrderItem.product_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status != OrderStatus.CANCELLED)
+        .distinct()
+    ).all()
+    order_codes: dict = {}
+    order_rows = np.fromiter(
+        (order_codes.setdefault(order_id, len(order_codes)) for order_id, _ in baskets),
+        dtype=np.int64, count=len(baskets)
+    )
+    product_cols = np.fromiter(
+        (position[product_id] for _, product_id in baskets), dtype=np.int64, count=len(baskets)
+    )
+    incidence = sparse.csr_matrix(
+        (np.ones(len(baskets), dtype=np.int64), (order_rows, product_cols)),
+        shape=(len(order_codes), n)
+    )
+    basket_sizes = np.asarray(incidence.sum(axis=1)).ravel()
+    incidence = incidence[basket_sizes <= settings.RECOMMENDATION_MAX_BASKET]
+
+    # Pair counts; the diagonal is the number of orders per product
+    pairs = (incidence.T @ incidence).tocoo()
+    orders = np.zeros(n, dtype=np.int64)
+    diagonal = pairs.row == pairs.col
+    orders[pairs.row[diagonal]] = pairs.data[diagonal]
+
+    session.execute(delete(ProductCooccurrence))
+    insert_rows(session, ProductCooccurrence, [
+        {"product_id": ids[a], "other_id": ids[b], "count": int(count)}
+        for a, b, count in zip(pairs.row.tolist(), pairs.col.tolist(), pairs.data.tolist())
+    ])
+
+    off = ~diagonal & active[pairs.col]
+    rows, cols, counts = pairs.row[off], pairs.col[off], pairs.data[off].astype(np.float64)
+    scores = sparse.csr_matrix(
+        (cooccurrence_score(counts, orders[rows], orders[cols]), (rows, cols)), shape=(n, n)
+    )
+
+    # Most popular active products per category, used to fill "similar"
+    popularity = POPULARITY_WEIGHT * np.log1p(orders) / max(math.log1p(orders.max(initial=0)), 1.0)
+    popular: dict[int, np.ndarray] = {}
+    ranked = np.lexsort((-popularity, category))
+    for code in np.unique(category[ranked]):
+        if code < 0:
+            continue
+        members = ranked[(category[ranked] == code) & active[ranked]]
+        popular[int(code)] = members[:k + 1]
+
+    recommendations = []
+    for i in np.flatnonzero(active):
+        start, end = scores.indptr[i], scores.indptr[i + 1]
+        neighbours, neighbour_scores = scores.indices[start:end], scores.data[start:end]
+
+        for rank, j in enumerate(top_k(neighbour_scores, k)):
+            recommendations.append({
+                "product_id": ids[i], "kind": BOUGHT_TOGETHER, "rank": rank,
+                "related_id": ids[neighbours[j]], "score": float(neighbour_scores[j]),
+            })
+
+        if category[i] < 0:
+            continue
+
+        # Same category: co-purchased products first, then popular ones
+        same = category[neighbours] == category[i]
+        candidates = {int(j): float(s + popularity[j]) for j, s in zip(neighbours[same], neighbour_scores[same])}
+        for j in popular[int(category[i])]:
+            candidates.setdefault(int(j), float(popularity[j]))
+        candidates.pop(int(i), None)
+
+        best = heapq.nlargest(k, candidates.items(), key=lambda item: item[1])
+        for rank, (j, score) in enumerate(best):
+            recommendations.append({
+                "product_id": ids[i], "kind": SIMILAR, "rank": rank,
+                "related_id": ids[j], "score": score,
+            })
+
+    session.execute(delete(ProductRecommendation))
+    insert_rows(session, ProductRecommendation, recommendations)
+
+    return len(recommendations)
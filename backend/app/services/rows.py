@@ -0,0 +1,145 @@
+"""
+Row Projections - Read-only list rows without ORM instances
+
+List endpoints select plain column tuples into slotted dataclasses whose
+fields mirror the response schemas, and serialize them with orjson. No
+identity map, change tracking, relationship loading or pydantic validation
+is involved, so a large admin listing costs a fraction of the memory and
+CPU of the ORM path (see scripts/bench_row_projection.py).
+
+Field names and order match CategoryResponse / ProductResponse /
+QuoteResponse, so the JSON is the same as before.
+"""
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from sqlmodel import Session, select
+
+from app.models import Category, Product, Quote
+
+
+@dataclass(slots=True)
+class CategoryRow:
+    name: str
+    description: Optional[str]
+    is_active: bool
+    id: UUID
+    slug: str
+    image_url: Optional[str]
+    sort_order: int
+    created_at: datetime
+    parent_id: Optional[UUID]
+
+
+@dataclass(slots=True)
+class ProductRow:
+    name: str
+    description: Optional[str]
+    price: Decimal
+    compare_at_price: Optional[Decimal]
+    stock: int
+    category_id: Optional[UUID]
+    id: UUID
+    slug: str
+    sku: Optional[str]
+    image_url: Optional[str]
+    images: Optional[list]
+    features: Optional[list]
+    specifications: Optional[dict]
+    is_active: bool
+    is_featured: bool
+    created_at: datetime
+    category: Optional[CategoryRow] = None
+
+
+@dataclass(slots=True)
+class QuoteRow:
+    contact_name: str
+    contact_email: str
+    contact_phone: str
+    company_name: str
+    industry: Optional[str]
+    uniform_type: str
+    quantity: int
+    requirements: str
+    customization_notes: Optional[str]
+    id: UUID
+    quote_number: str
+    status: str
+    logo_url: Optional[str]
+    admin_response: Optional[str]
+    estimated_price: Optional[str]
+    created_at: datetime
+
+
+def row_columns(row_class, model) -> list:
+    """Model columns behind the row's fields, in field order"""
+    return [getattr(model, field.name) for field in fields(row_class) if field.name != "category"]
+
+
+CATEGORY_COLUMNS = row_columns(CategoryRow, Category)
+PRODUCT_COLUMNS = row_columns(ProductRow, Product)
+QUOTE_COLUMNS = row_columns(QuoteRow, Quote)
+
+# Position of Category.id in CATEGORY_COLUMNS (None there means no category)
+CATEGORY_ID_INDEX = [field.name for field in fields(CategoryRow)].index("id")
+
+
+def select_category_rows():
+    return select(*CATEGORY_COLUMNS)
+
+
+def select_product_rows():
+    """Product columns plus the nested category (outer join)"""
+    return (
+        select(*PRODUCT_COLUMNS, *CATEGORY_COLUMNS)
+        .select_from(Product)
+        .outerjoin(Category, Product.category_id == Category.id)
+    )
+
+
+def select_quote_rows():
+    return select(*QUOTE_COLUMNS)
+
+
+def category_rows(session: Session, statement) -> list[CategoryRow]:
+    return [CategoryRow(*row) for row in session.execute(statement)]
+
+
+def product_rows(session: Session, statement) -> list[ProductRow]:
+    split = len(PRODUCT_COLUMNS)
+    rows = []
+
+    for row in session.execute(statement):
+        category = row[split:]
+        rows.append(ProductRow(
+            *row[:split],
+            category=CategoryRow(*category) if category[CATEGORY_ID_INDEX] is not None else None
+        ))
+
+    return rows
+
+
+def quote_rows(session: Session, statement) -> list[QuoteRow]:
+    return [QuoteRow(*row) for row in session.execute(statement)]
+
+
+def encode_default(value: Any):
+    """orjson fallback for types it does not serialize natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+class RowsResponse(ORJSONResponse):
+    """
+    JSON response for lists of row dataclasses (orjson serializes them natively)
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,201 @@
+"""
+Storefront Home - Precomputed snapshot behind GET /storefront/home
+
+The home page needs the category tree, the featured products and a few
+products per top-level category. All of it is built in one session into a
+single pre-encoded JSON body, kept per worker and served as is:
+
+- a fresh snapshot (younger than STOREFRONT_HOME_TTL_SECONDS, no catalog
+  change since) is returned directly
+- a stale one is still returned, and a rebuild starts in the background
+  (stale-while-revalidate)
+- without a usable snapshot (none yet, or older than
+  STOREFRONT_HOME_MAX_STALE_SECONDS) the request waits for the rebuild
+
+Rebuilds are single-flight: concurrent requests share the one running
+rebuild instead of each querying the database. A background task also
+rebuilds every TTL so visitors rarely see a stale page.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.core.database import background_session
+from app.core.events import bus
+from app.models import Category, Product
+from app.services.catalog import CATALOG_TOPIC
+from app.services.category_tree import category_tree
+from app.services.rows import encode_default, product_rows, select_product_rows
+
+logger = logging.getLogger(__name__)
+
+
+def category_highlights(session: Session, roots: list, per_category: int) -> list[dict]:
+    """
+    Up to `per_category` active products from each top-level category's
+    subtree, featured first, then newest
+    """
+    # The root's id hex is the first path segment
+    root = func.substr(Category.path, 2, 32)
+    ranked = (
+        select(
+            Product.id,
+            root.label("root"),
+            func.row_number().over(
+                partition_by=root,
+                order_by=(Product.is_featured.desc(), Product.created_at.desc())
+            ).label("rank")
+        )
+        .join(Category, Product.category_id == Category.id)
+        .where(Product.is_active == True, Category.is_active == True)
+        .subquery()
+    )
+    picks = session.execute(
+        select(ranked.c.id, ranked.c.root)
+        .where(ranked.c.rank <= per_category)
+        .order_by(ranked.c.root, ranked.c.rank)
+    ).all()
+    if not picks:
+        return []
+
+    products = {
+        row.id: row
+        for row in product_rows(session, select_product_rows().where(Product.id.in_([pick.id for pick in picks])))
+    }
+    by_root: dict[str, list] = {}
+    for pick in picks:
+        by_root.setdefault(pick.root, []).append(products[pick.id])
+
+    return [
+        {
+            "category_id": node["id"],
+            "name": node["name"],
+            "slug": node["slug"],
+            "image_url": node["image_url"],
+            "products": by_root[UUID(node["id"]).hex],
+        }
+        for node in roots
+        if UUID(node["id"]).hex in by_root
+    ]
+
+
+def build_home(session: Session) -> dict:
+    """Everything the home page shows, in StorefrontHomeResponse shape"""
+    categories = category_tree.get(session)["roots"]
+    featured = product_rows(
+        session,
+        select_product_rows()
+        .where(Product.is_active == True, Product.is_featured == True)
+        .order_by(Product.created_at.desc())
+        .limit(settings.STOREFRONT_FEATURED_LIMIT)
+    )
+
+    return {
+        "generated_at": datetime.utcnow(),
+        "categories": categories,
+        "featured": featured,
+        "highlights": category_highlights(session, categories, settings.STOREFRONT_HIGHLIGHTS_PER_CATEGORY),
+    }
+
+
+@dataclass
+class HomeSnapshot:
+    body: bytes
+    built_at: float
+    generation: int
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+
+class StorefrontHome:
+    """
+    Per-worker home page snapshot with stale-while-revalidate and
+    single-flight rebuilds
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[HomeSnapshot] = None
+        # Bumped by catalog changes; a snapshot built before the bump is stale
+        self._generation = 0
+        self._rebuild: Optional[asyncio.Future] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    def invalidate(self, payload: Optional[dict] = None) -> None:
+        self._generation += 1
+
+    def is_stale(self, snapshot: HomeSnapshot) -> bool:
+        return snapshot.generation != self._generation or snapshot.age > settings.STOREFRONT_HOME_TTL_SECONDS
+
+    async def get(self) -> HomeSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.age > settings.STOREFRONT_HOME_MAX_STALE_SECONDS:
+            return await self.refresh()
+
+        if self.is_stale(snapshot):
+            self._start_rebuild()
+        return snapshot
+
+    async def refresh(self) -> HomeSnapshot:
+        """Wait for a rebuild, joining the one already running if any"""
+        # Shielded - a client that goes away must not cancel the shared rebuild
+        return await asyncio.shield(self._start_rebuild())
+
+    def _start_rebuild(self) -> asyncio.Future:
+        if self._rebuild is None:
+            self._rebuild = asyncio.ensure_future(self._build())
+            self._rebuild.add_done_callback(self._rebuild_done)
+        return self._rebuild
+
+    def _rebuild_done(self, future: asyncio.Future) -> None:
+        self._rebuild = None
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Storefront home rebuild failed", exc_info=future.exception())
+
+    async def _build(self) -> HomeSnapshot:
+        generation = self._generation
+        started = time.monotonic()
+        body = await run_in_threadpool(self._build_body)
+        snapshot = HomeSnapshot(body=body, built_at=started, generation=generation)
+        self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _build_body() -> bytes:
+        with background_session() as session:
+            home = build_home(session)
+        return orjson.dumps(home, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Already logged; keep serving the last snapshot
+                pass
+            await asyncio.sleep(settings.STOREFRONT_HOME_TTL_SECONDS)
+
+    def start(self) -> None:
+        """Start the periodic rebuild (from the app lifespan)"""
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_periodically())
+
+    def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+
+# Process-wide snapshot, marked stale on any catalog change
+storefront_home = StorefrontHome()
+bus.subscribe(CATALOG_TOPIC, storefront_home.invalidate)
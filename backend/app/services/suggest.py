@@ -0,0 +1,374 @@
+"""
+Suggest Index - In-memory prefix index for search-box typeahead
+
+Product names, SKUs and category names are kept in one sorted list of
+(term, kind, id, label, slug, weight) tuples. Every prefix matching more
+than SCAN_LIMIT terms has its TOP_K heaviest items precomputed in a prefix
+table, built bottom-up from its children's lists and recomputed along the
+written item's prefixes on each write. A lookup is a table hit, or a bisect
+and a scan of at most about SCAN_LIMIT terms, so suggestions are served
+without touching the database.
+
+Full reloads (after bulk catalog changes) run on a background thread while
+lookups keep using the previous index.
+"""
+import heapq
+import logging
+import math
+import threading
+from bisect import bisect_left, insort
+from types import SimpleNamespace
+from typing import Iterable, Optional
+
+from sqlmodel import Session, select, func
+
+from app.core.database import background_session
+from app.core.events import bus
+from app.models import Product, Category, OrderItem
+from app.services.catalog import CATALOG_TOPIC
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.sync import current_change_seq
+
+KIND_PRODUCT = "product"
+KIND_CATEGORY = "category"
+
+# Popularity weighting
+FEATURED_BOOST = 5.0
+CATEGORY_BASE_WEIGHT = 10.0
+
+# Suggestions kept per prefix (the most a lookup can ask for)
+TOP_K = 25
+
+# Prefixes matching more terms than this are ranked in advance
+SCAN_LIMIT = 64
+
+# Sorts after every character a term can contain
+MAX_CHAR = "\U0010ffff"
+
+# Wait before a background reload, folding bursts of bulk changes into one
+RELOAD_DELAY_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text: str) -> str:
+    """Lower-case and collapse whitespace"""
+    return " ".join(text.lower().split())
+
+
+def index_terms(text: Optional[str]) -> list[str]:
+    """
+    Terms indexed for a label - the full label and every word suffix,
+    so "Medical Scrubs Set" matches "med", "scr" and "set"
+    """
+    if not text:
+        return []
+
+    words = normalize(text).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def units_sold_by_product(session: Session) -> dict[str, int]:
+    """Units sold per product id (sales are not part of the catalog snapshot)"""
+    return {
+        str(product_id): int(total or 0)
+        for product_id, total in session.exec(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id)
+        )
+    }
+
+
+def product_weight(is_featured: bool, units_sold: int = 0) -> float:
+    """Popularity weight of a product"""
+    return 1.0 + (FEATURED_BOOST if is_featured else 0.0) + math.log1p(units_sold)
+
+
+def top_items(entries: Iterable[tuple]) -> list[tuple]:
+    """The TOP_K heaviest distinct items among entries, heaviest first"""
+    best: dict[tuple[str, str], tuple] = {}
+    # All terms of an item carry the same weight - keep the first one
+    for entry in entries:
+        best.setdefault((entry[1], entry[2]), entry)
+    return heapq.nsmallest(TOP_K, best.values(), key=lambda entry: (-entry[5], entry[3]))
+
+
+def term_prefixes(terms: Iterable[str]) -> set[str]:
+    return {term[:length] for term in terms for length in range(1, len(term) + 1)}
+
+
+def prefix_range(entries: list[tuple], prefix: str) -> tuple[int, int]:
+    """Slice of the sorted entries whose terms start with prefix"""
+    lo = bisect_left(entries, (prefix,))
+    return lo, bisect_left(entries, (prefix + MAX_CHAR,), lo)
+
+
+def rank_range(
+    entries: list[tuple],
+    table: dict,
+    prefix: str,
+    lo: int,
+    hi: int,
+    store: bool = True
+) -> list[tuple]:
+    """
+    Top items for `prefix` (matching entries[lo:hi]). Large ranges are
+    merged from their children - the table's list when there is one,
+    otherwise ranked recursively (and added to the table if `store`).
+    """
+    if hi - lo <= SCAN_LIMIT:
+        return top_items(entries[lo:hi])
+
+    depth = len(prefix)
+    candidates = []
+    index = lo
+
+    # A term equal to the prefix sorts before its extensions
+    while index < hi and len(entries[index][0]) == depth:
+        candidates.append(entries[index])
+        index += 1
+
+    # An item in the prefix's top K is in the top K of a child holding one of its terms
+    while index < hi:
+        child = entries[index][0][:depth + 1]
+        end = bisect_left(entries, (child + MAX_CHAR,), index, hi)
+        ranked = table.get(child)
+        if ranked is None:
+            ranked = rank_range(entries, table, child, index, end, store)
+            if store and end - index > SCAN_LIMIT:
+                table[child] = ranked
+        candidates.extend(ranked)
+        index = end
+
+    return top_items(candidates)
+
+
+class SuggestIndex:
+    """
+    Sorted-array prefix index. Reads take no lock - writers replace single
+    list items (or the whole list on rebuild) so readers always see a
+    consistent entry.
+    """
+
+    def __init__(self):
+        self._entries: list[tuple] = []
+        self._terms: dict[tuple[str, str], list[str]] = {}
+        self._units_sold: dict[str, int] = {}
+        self._category_weights: dict[str, float] = {}
+        # Prefix -> its top items, for prefixes matching more than SCAN_LIMIT terms
+        self._table: dict[str, list[tuple]] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+        # Incremental writes so far, to detect writes racing a reload
+        self._writes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def build(
+        self,
+        products: Iterable,
+        categories: Iterable,
+        units_sold: Optional[dict[str, int]] = None
+    ) -> None:
+        """
+        Build the whole index from product rows (id, name, sku, slug, is_featured)
+        and category rows (id, name, slug, product_count)
+        """
+        units_sold = units_sold or {}
+        entries: list[tuple] = []
+        terms: dict[tuple[str, str], list[str]] = {}
+        category_weights: dict[str, float] = {}
+
+        for product in products:
+            key = (KIND_PRODUCT, str(product.id))
+            weight = product_weight(product.is_featured, units_sold.get(key[1], 0))
+            product_terms = index_terms(product.name) + index_terms(product.sku)
+            terms[key] = product_terms
+            entries.extend(
+                (term, KIND_PRODUCT, key[1], product.name, product.slug, weight)
+                for term in product_terms
+            )
+
+        for category in categories:
+            key = (KIND_CATEGORY, str(category.id))
+            weight = CATEGORY_BASE_WEIGHT + math.log1p(category.product_count)
+            category_weights[key[1]] = weight
+            category_terms = index_terms(category.name)
+            terms[key] = category_terms
+            entries.extend(
+                (term, KIND_CATEGORY, key[1], category.name, category.slug, weight)
+                for term in category_terms
+            )
+
+        entries.sort()
+        table: dict[str, list[tuple]] = {}
+        rank_range(entries, table, "", 0, len(entries))
+
+        with self._lock:
+            self._entries = entries
+            self._table = table
+            self._terms = terms
+            self._units_sold = dict(units_sold)
+            self._category_weights = category_weights
+            self.loaded = True
+
+    def load(self, session: Session) -> None:
+        """
+        Build the index from the host's catalog snapshot when it is current,
+        otherwise from the database (sales always come from the database)
+        """
+        snapshot = catalog_snapshot.current()
+        if snapshot is not None and snapshot.version == current_change_seq(session):
+            self.build(snapshot.product_rows(), snapshot.category_rows(), units_sold_by_product(session))
+            return
+
+        products = session.exec(
+            select(Product.id, Product.name, Product.sku, Product.slug, Product.is_featured)
+            .where(Product.is_active == True)
+        ).all()
+
+        categories = session.exec(
+            select(Category.id, Category.name, Category.slug, func.count(Product.id).label("product_count"))
+            .outerjoin(Product, (Product.category_id == Category.id) & (Product.is_active == True))
+            .where(Category.is_active == True)
+            .group_by(Category.id, Category.name, Category.slug)
+        ).all()
+
+        self.build(products, categories, units_sold_by_product(session))
+
+    def schedule_load(self, delay: float = 0.0) -> None:
+        """Reload on a background thread (no-op if one is already scheduled)"""
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(delay, self._run_load)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run_load(self) -> None:
+        with self._timer_lock:
+            self._timer = None
+
+        writes = self._writes
+        try:
+            with background_session() as session:
+                self.load(session)
+        except Exception:
+            logger.exception("Suggest index reload failed")
+            return
+
+        if self._writes != writes:
+            # A change applied meanwhile may predate what the reload read
+            self.schedule_load(RELOAD_DELAY_SECONDS)
+
+    def stop(self) -> None:
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _remove_locked(self, key: tuple[str, str]) -> None:
+        kind, item_id = key
+        for term in self._terms.pop(key, []):
+            index = bisect_left(self._entries, (term, kind, item_id))
+            if index < len(self._entries) and self._entries[index][:3] == (term, kind, item_id):
+                del self._entries[index]
+
+    def _upsert_locked(self, key: tuple[str, str], terms: list[str], label: str, slug: str, weight: float) -> None:
+        self._remove_locked(key)
+        kind, item_id = key
+        for term in terms:
+            insort(self._entries, (term, kind, item_id, label, slug, weight))
+        self._terms[key] = terms
+
+    def _rerank_locked(self, terms: Iterable[str]) -> None:
+        """Recompute the table along the prefixes of a written item's terms"""
+        entries, table = self._entries, self._table
+        # Longest first, so each prefix merges already updated children
+        for prefix in sorted(term_prefixes(terms), key=len, reverse=True):
+            lo, hi = prefix_range(entries, prefix)
+            if hi - lo > SCAN_LIMIT:
+                table[prefix] = rank_range(entries, table, prefix, lo, hi)
+            else:
+                table.pop(prefix, None)
+        self._writes += 1
+
+    def upsert_product(self, product: Product) -> None:
+        """
+        Add or refresh a product after it was written
+        """
+        if not self.loaded:
+            return
+
+        key = (KIND_PRODUCT, str(product.id))
+        with self._lock:
+            previous = self._terms.get(key, [])
+            if product.is_active:
+                weight = product_weight(product.is_featured, self._units_sold.get(key[1], 0))
+                terms = index_terms(product.name) + index_terms(product.sku)
+                self._upsert_locked(key, terms, product.name, product.slug, weight)
+            else:
+                terms = []
+                self._remove_locked(key)
+            self._rerank_locked(previous + terms)
+
+    def upsert_category(self, category: Category) -> None:
+        """
+        Add or refresh a category after it was written
+        """
+        if not self.loaded:
+            return
+
+        key = (KIND_CATEGORY, str(category.id))
+        with self._lock:
+            previous = self._terms.get(key, [])
+            terms = index_terms(category.name) if category.is_active else []
+            if terms:
+                # Keep the product-count part of the weight from the last build
+                weight = self._category_weights.get(key[1], CATEGORY_BASE_WEIGHT)
+                self._upsert_locked(key, terms, category.name, category.slug, weight)
+            else:
+                self._remove_locked(key)
+            self._rerank_locked(previous + terms)
+
+    def handle_catalog_event(self, payload: dict) -> None:
+        """
+        Apply a catalog change announced on the invalidation bus
+        """
+        kind = payload.get("kind")
+        if kind == "product":
+            self.upsert_product(SimpleNamespace(**payload))
+        elif kind == "category":
+            self.upsert_category(SimpleNamespace(**payload))
+        else:
+            # Reloaded in the background; lookups use the current index meanwhile
+            self.schedule_load(RELOAD_DELAY_SECONDS)
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Return up to `limit` suggestions whose terms start with the query,
+        most popular first
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        entries, table = self._entries, self._table
+        ranked = table.get(prefix)
+        if ranked is None:
+            lo, hi = prefix_range(entries, prefix)
+            # Lookups never write to the table - only writers do, under the lock
+            ranked = rank_range(entries, table, prefix, lo, hi, store=False) if hi > lo else []
+
+        return [
+            {"kind": kind, "id": item_id, "label": label, "slug": slug}
+            for _, kind, item_id, label, slug, _ in ranked[:limit]
+        ]
+
+
+# Process-wide index instance, kept current by catalog change notifications
+suggest_index = SuggestIndex()
+bus.subscribe(CATALOG_TOPIC, suggest_index.handle_catalog_event)
@@ -0,0 +1,134 @@
+"""
+Catalog Delta Sync - Versioned change feed for client-side catalog caches
+
+Every transaction that writes products or categories takes the next value of
+the "catalog" change sequence and stamps it on each row it touches
+(change_seq, indexed). Bumping the counter row locks it until commit, so
+catalog writers commit in version order: a client that has seen version N
+can never miss a later commit carrying a smaller version.
+
+Clients send the last sync token (a version) and receive every row written
+since, in pages that never split a version.
+"""
+from typing import Optional
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session as OrmSession, selectinload
+from sqlmodel import Session, select
+
+from app.models import Product, Category, ChangeSequence
+
+CATALOG_SEQUENCE = "catalog"
+SESSION_KEY = "catalog_change_seq"
+
+VERSIONED_MODELS = (Product, Category)
+
+
+def next_change_seq(session: Session) -> int:
+    """
+    Catalog version for rows written in the current transaction (allocated once)
+    """
+    seq = session.info.get(SESSION_KEY)
+    if seq is not None:
+        return seq
+
+    connection = session.connection()
+    result = connection.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.name == CATALOG_SEQUENCE)
+        .values(value=ChangeSequence.value + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(ChangeSequence).values(name=CATALOG_SEQUENCE, value=1))
+
+    seq = connection.execute(
+        select(ChangeSequence.value).where(ChangeSequence.name == CATALOG_SEQUENCE)
+    ).scalar_one()
+    session.info[SESSION_KEY] = seq
+    return seq
+
+
+def current_change_seq(session: Session) -> int:
+    value = session.exec(
+        select(ChangeSequence.value).where(ChangeSequence.name == CATALOG_SEQUENCE)
+    ).first()
+    return value or 0
+
+
+@event.listens_for(OrmSession, "before_flush")
+def stamp_catalog_changes(session, flush_context, instances) -> None:
+    """Stamp new and modified products/categories with the transaction's version"""
+    changed = [obj for obj in session.new if isinstance(obj, VERSIONED_MODELS)]
+    changed += [
+        obj for obj in session.dirty
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj, include_collections=False)
+    ]
+
+    if changed:
+        seq = next_change_seq(session)
+        for obj in changed:
+            obj.change_seq = seq
+
+
+@event.listens_for(OrmSession, "after_transaction_end")
+def reset_change_seq(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(SESSION_KEY, None)
+
+
+def read_catalog_changes(session: Session, since: Optional[int], limit: int) -> dict:
+    """
+    Products and categories written after version `since` (everything active
+    when None), at most about `limit` rows - a page always ends on a whole
+    version, so one large bulk write may exceed it.
+    """
+    initial = since is None
+    # Rows written before change tracking existed carry version 0 until
+    # scripts/migrate_change_seq.py numbers them
+    floor = -1 if initial else since
+
+    def changed_after(statement, model, lower: int):
+        statement = statement.where(model.change_seq > lower)
+        if initial:
+            statement = statement.where(model.is_active == True)
+        return statement
+
+    seqs = sorted(
+        seq
+        for model in VERSIONED_MODELS
+        for seq in session.exec(
+            changed_after(select(model.change_seq), model, floor).order_by(model.change_seq).limit(limit + 1)
+        ).all()
+    )
+
+    if not seqs:
+        return {
+            "sync_token": str(since if since is not None else current_change_seq(session)),
+            "has_more": False,
+            "products": [],
+            "categories": [],
+            "deleted_products": [],
+            "deleted_categories": [],
+        }
+
+    upto = seqs[min(limit, len(seqs)) - 1]
+    has_more = len(seqs) > limit and any(
+        session.exec(changed_after(select(model.change_seq), model, upto).limit(1)).first() is not None
+        for model in VERSIONED_MODELS
+    )
+
+    def rows(model, *options):
+        statement = changed_after(select(model), model, floor).where(model.change_seq <= upto)
+        return session.exec(statement.order_by(model.change_seq).options(*options)).all()
+
+    products = rows(Product, selectinload(Product.category))
+    categories = rows(Category)
+
+    return {
+        "sync_token": str(upto),
+        "has_more": has_more,
+        "products": [product for product in products if product.is_active],
+        "categories": [category for category in categories if category.is_active],
+        "deleted_products": [product.id for product in products if not product.is_active],
+        "deleted_categories": [category.id for category in categories if not category.is_active],
+    }
@@ -0,0 +1,28 @@
+"""
+Gunicorn Configuration - Multi-worker production mode
+
+Runs uvicorn workers sized to the CPU count (override with WEB_CONCURRENCY).
+Every worker must see the same SECRET_KEY (set it in the environment) and
+keeps its in-process caches current through the invalidation bus.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master so workers fork warm
+preload_app = True
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = 1000
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
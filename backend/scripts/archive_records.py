@@ -0,0 +1,50 @@
+"""
+Archival Job - Partition upkeep and cold storage for quotes and orders
+
+1. creates the monthly partitions for the next PARTITION_MONTHS_AHEAD months
+2. moves CLOSED quotes and DELIVERED orders older than
+   ARCHIVE_RETENTION_DAYS into Parquet files under ARCHIVE_DIR
+3. drops month partitions emptied by the archival and vacuums the rest
+
+Run daily, e.g. from cron.
+Usage: python scripts/archive_records.py [--retention-days N]
+"""
+import argparse
+from datetime import date, timedelta
+
+from sqlmodel import Session, create_engine
+
+from app.core.config import settings
+from app.services.archive import archive_records, vacuum_partitions
+from app.services.partitions import drop_empty_partitions, ensure_partitions, month_start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--retention-days", type=int, default=settings.ARCHIVE_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.begin() as connection:
+        created = ensure_partitions(connection, settings.PARTITION_MONTHS_AHEAD)
+    print(f"✅ Ensured partitions ({len(created)} created)")
+
+    with Session(engine) as session:
+        summary = archive_records(session, args.retention_days)
+    print(
+        f"✅ Archived {summary['quotes']} quotes and {summary['orders']} orders "
+        f"created before {summary['cutoff']}"
+    )
+
+    cutoff = month_start(date.today() - timedelta(days=args.retention_days))
+    with engine.begin() as connection:
+        dropped = drop_empty_partitions(connection, cutoff)
+    print(f"✅ Dropped {len(dropped)} empty partitions")
+
+    # Dropped partitions are skipped
+    vacuum_partitions(engine, summary["months"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Attribute Filter Benchmark - SQL JSON filtering vs load-and-parse in Python
+
+Compares filtering products by `spec.material=cotton&feature=reflective`
+through the JSON column filters against the old approach of loading every
+row and parsing its serialized JSON in Python.
+
+Uses an in-memory SQLite catalog by default. Pass a scratch Postgres URL to
+measure JSONB + GIN (the tables are created in that database).
+Usage: python scripts/bench_attribute_filter.py [product_count] [database_url]
+"""
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Product
+from app.services.attributes import AttributeFilters, apply_attribute_filters
+
+MATERIALS = ["cotton", "polyester", "poly-cotton", "denim", "drill", "twill", "fleece", "nylon"]
+COLORS = ["navy", "white", "black", "khaki", "grey", "maroon", "green", "orange"]
+FEATURES = ["reflective", "waterproof", "breathable", "flame retardant", "anti-static", "stretch"]
+
+
+def seed(engine, count: int) -> None:
+    """Insert a synthetic catalog in batches"""
+    rng = random.Random(7)
+    with Session(engine) as session:
+        for i in range(count):
+            session.add(Product(
+                name=f"Product {i}",
+                slug=f"bench-product-{i}",
+                price=Decimal("1000.00") + i % 500,
+                specifications={
+                    "material": rng.choice(MATERIALS),
+                    "color": rng.choice(COLORS),
+                    "size": rng.choice(["S", "M", "L", "XL"]),
+                },
+                features=rng.sample(FEATURES, 2),
+            ))
+            if i % 5000 == 4999:
+                session.commit()
+        session.commit()
+
+
+def sql_filter(session: Session, filters: AttributeFilters) -> int:
+    statement = apply_attribute_filters(
+        select(Product.id).where(Product.is_active == True),
+        filters,
+        session.get_bind().dialect.name
+    )
+    return len(session.exec(statement).all())
+
+
+def python_filter(session: Session, filters: AttributeFilters) -> int:
+    """The pre-JSON-column approach: fetch everything, parse, filter"""
+    matches = 0
+    rows = session.execute(
+        select(Product.id, Product.specifications, Product.features).where(Product.is_active == True)
+    ).all()
+    for _, specifications, features in rows:
+        # Values used to be serialized JSON strings
+        specifications = json.loads(json.dumps(specifications or {}))
+        features = json.loads(json.dumps(features or []))
+        if all(specifications.get(k) == v for k, v in filters.specs.items()) and \
+                all(f in features for f in filters.features):
+            matches += 1
+    return matches
+
+
+def timed(engine, function, filters, rounds: int = 5) -> tuple[float, int]:
+    timings = []
+    for _ in range(rounds):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            result = function(session, filters)
+            timings.append(time.perf_counter() - started)
+    return sorted(timings)[rounds // 2], result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    url = sys.argv[2] if len(sys.argv) > 2 else "sqlite://"
+
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    seed(engine, count)
+
+    filters = AttributeFilters(specs={"material": "cotton"}, features=["reflective"])
+    sql_seconds, sql_matches = timed(engine, sql_filter, filters)
+    py_seconds, py_matches = timed(engine, python_filter, filters)
+    assert sql_matches == py_matches, (sql_matches, py_matches)
+
+    print(f"{count} products on {engine.dialect.name}, {sql_matches} matches")
+    print(f"SQL JSON filter:       {sql_seconds * 1000:8.1f} ms")
+    print(f"load + parse in Python: {py_seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
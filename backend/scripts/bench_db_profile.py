@@ -0,0 +1,95 @@
+"""
+Engine Profile Benchmark - Per-query latency of the database engine profiles
+
+Runs the hottest read queries (product by slug, a product list page, the
+category list) one checkout per query - as each request does - against
+DATABASE_URL with:
+- ping: pool_pre_ping on every checkout (the previous profile)
+- profile: the configured profile (keepalives + recycle, no ping)
+- prepared: the profile on the psycopg 3 driver with server-side prepared
+  statements (skipped unless psycopg is installed and the database is Postgres)
+
+Reports median and p95 per query. Needs a seeded database.
+Usage: python scripts/bench_db_profile.py [rounds]
+"""
+import statistics
+import sys
+import time
+
+from sqlalchemy.engine import make_url
+from sqlmodel import Session, create_engine, select
+
+from app.core.config import settings
+from app.core.database import engine_options
+from app.models import Category, Product
+from app.services.rows import select_product_rows, select_category_rows
+
+QUERIES = {
+    "product by slug": lambda slug: select(Product).where(Product.slug == slug),
+    "product page": lambda slug: select_product_rows().where(Product.is_active == True).limit(20),
+    "categories": lambda slug: select_category_rows().where(Category.is_active == True).order_by(Category.sort_order),
+}
+
+
+def variants() -> list[tuple[str, str, dict]]:
+    url = settings.DATABASE_URL
+    result = [
+        ("ping", url, {**engine_options(url), "pool_pre_ping": True}),
+        ("profile", url, engine_options(url)),
+    ]
+
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "postgresql":
+        try:
+            import psycopg  # noqa: F401
+        except ImportError:
+            print("⚠️  psycopg 3 not installed - skipping the prepared statement variant")
+        else:
+            prepared_url = database_url.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+            result.append(("prepared", prepared_url, engine_options(prepared_url)))
+
+    return result
+
+
+def measure(engine, statement, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        with Session(engine) as session:
+            session.execute(statement).all()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print(f"{'variant':<10} {'query':<18} {'median':>10} {'p95':>10}")
+    baseline = {}
+    for name, url, options in variants():
+        options["echo"] = False
+        engine = create_engine(url, **options)
+
+        with Session(engine) as session:
+            slug = session.exec(select(Product.slug).limit(1)).first() or "missing"
+
+        for label, build in QUERIES.items():
+            statement = build(slug)
+            # Warm the pool, compiled cache and (prepared variant) statement preparation
+            measure(engine, statement, 50)
+            timings = sorted(measure(engine, statement, rounds))
+            median = statistics.median(timings) * 1000
+            p95 = timings[int(len(timings) * 0.95)] * 1000
+
+            change = ""
+            if label in baseline:
+                change = f"  {(median / baseline[label] - 1) * 100:+.0f}% vs ping"
+            else:
+                baseline[label] = median
+            print(f"{name:<10} {label:<18} {median:>7.3f} ms {p95:>7.3f} ms{change}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Media Serving Benchmark - MediaFiles vs a plain StaticFiles mount
+
+Serves generated images through each ASGI app in-process (httpx ASGI
+transport) and reports requests per second for full downloads, range
+requests and conditional (If-None-Match) revalidations.
+Usage: python scripts/bench_media.py [requests] [file_kib]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+from starlette.staticfiles import StaticFiles
+
+from app.core.media import MediaFiles
+
+
+async def run(app, requests: int, names: list[str], headers: dict) -> float:
+    """Requests per second for `requests` GETs spread over `names`"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for i in range(requests):
+            response = await client.get(f"/{names[i % len(names)]}", headers=headers)
+            assert response.status_code in (200, 206, 304), response.status_code
+        return requests / (time.perf_counter() - started)
+
+
+async def etag_of(app, name: str):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return (await client.get(f"/{name}")).headers.get("etag")
+
+
+async def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    file_kib = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = []
+        for i in range(20):
+            name = f"product{i}_{i:08x}.jpg"
+            with open(os.path.join(directory, name), "wb") as file:
+                file.write(os.urandom(file_kib * 1024))
+            names.append(name)
+
+        apps = {
+            "StaticFiles": StaticFiles(directory=directory),
+            "MediaFiles": MediaFiles(directory=directory, accel_redirect_prefix=""),
+        }
+
+        print(f"{requests} requests, {len(names)} files of {file_kib} KiB")
+        print(f"{'app':<12} {'full req/s':>12} {'range req/s':>12} {'304 req/s':>12}")
+        for label, app in apps.items():
+            etag = await etag_of(app, names[0])
+            full = await run(app, requests, names, {})
+            ranged = await run(app, requests, names, {"Range": "bytes=0-65535"})
+            revalidated = await run(app, requests, names[:1], {"If-None-Match": etag})
+            print(f"{label:<12} {full:>12.0f} {ranged:>12.0f} {revalidated:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Product Projection Benchmark - payload size and latency of full vs projected listings
+
+Runs against an in-memory SQLite catalog.
+Usage: python scripts/bench_product_projection.py [product_count] [page_size]
+"""
+import json
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Product, Category
+from app.schemas import ProductResponse
+from app.services.projection import resolve_fields, projection_columns, project_row
+
+DESCRIPTION = "Durable poly-cotton fabric with reinforced stitching. " * 20
+SPECIFICATIONS = {f"attribute_{i}": f"value {i}" for i in range(20)}
+FEATURES = [f"Feature number {i}" for i in range(10)]
+
+
+def seed(session: Session, count: int) -> None:
+    """Insert a synthetic catalog"""
+    categories = [Category(name=f"Category {i}", slug=f"category-{i}") for i in range(10)]
+    session.add_all(categories)
+    session.flush()
+
+    for i in range(count):
+        session.add(Product(
+            name=f"Product {i}",
+            slug=f"product-{i}",
+            description=DESCRIPTION,
+            price=Decimal("1500.00") + i % 100,
+            stock=i % 50,
+            sku=f"SKU-{i:06d}",
+            image_url=f"/uploads/products/{i}.jpg",
+            category_id=categories[i % 10].id,
+            features=FEATURES,
+            specifications=SPECIFICATIONS,
+        ))
+    session.commit()
+
+
+def full_page(session: Session, limit: int) -> bytes:
+    """Current path - ORM rows validated into ProductResponse"""
+    products = session.exec(select(Product).where(Product.is_active == True).limit(limit)).all()
+    items = [ProductResponse.model_validate(product).model_dump(mode="json") for product in products]
+    return json.dumps(items).encode()
+
+
+def projected_page(session: Session, limit: int, fields: str) -> bytes:
+    """Projected path - only the requested columns"""
+    names = resolve_fields(fields)
+    statement = select(*projection_columns(names)).select_from(Product)
+    if "category" in names:
+        statement = statement.outerjoin(Category, Product.category_id == Category.id)
+    rows = session.execute(statement.where(Product.is_active == True).limit(limit)).all()
+    return json.dumps([project_row(row, names) for row in rows]).encode()
+
+
+def measure(label: str, engine, build, rounds: int = 20) -> None:
+    timings = []
+    for _ in range(rounds):
+        # Fresh session per round, like one request each
+        with Session(engine) as session:
+            started = time.perf_counter()
+            payload = build(session)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{label:<16} {len(payload) / 1024:>9.1f} KiB {timings[len(timings) // 2] * 1000:>9.2f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, count)
+
+    print(f"{count} products, page size {limit}")
+    print(f"{'variant':<16} {'payload':>13} {'median':>12}")
+    measure("full", engine, lambda session: full_page(session, limit))
+    measure("fields=detail", engine, lambda session: projected_page(session, limit, "detail"))
+    measure("fields=card", engine, lambda session: projected_page(session, limit, "card"))
+
+
+if __name__ == "__main__":
+    main()
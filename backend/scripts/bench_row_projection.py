@@ -0,0 +1,128 @@
+"""
+Row Projection Benchmark - ORM + pydantic vs slotted rows + orjson for list endpoints
+
+Serializes a full admin listing of quotes and products both ways and reports
+median time and peak allocated memory (tracemalloc). Runs against an
+in-memory SQLite database.
+Usage: python scripts/bench_row_projection.py [row_count]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Product, Category, Quote, QuoteStatus
+from app.schemas import ProductResponse, QuoteResponse
+from app.services.rows import (
+    select_product_rows, product_rows, select_quote_rows, quote_rows, RowsResponse
+)
+
+STATUSES = list(QuoteStatus)
+
+
+def seed(session: Session, count: int) -> None:
+    """Insert a synthetic catalog and quote history"""
+    categories = [Category(name=f"Category {i}", slug=f"category-{i}") for i in range(10)]
+    session.add_all(categories)
+    session.flush()
+
+    for i in range(count):
+        session.add(Product(
+            name=f"Product {i}",
+            slug=f"product-{i}",
+            description="Durable poly-cotton fabric with reinforced stitching.",
+            price=Decimal("1500.00") + i % 100,
+            stock=i % 50,
+            sku=f"SKU-{i:06d}",
+            image_url=f"/uploads/products/{i}.jpg",
+            category_id=categories[i % 10].id,
+            features=["Reflective strips", "Multiple pockets"],
+            specifications={"material": "cotton", "fit": "regular"},
+        ))
+        session.add(Quote(
+            quote_number=f"QT-2026-{i:06d}",
+            contact_name=f"Contact {i}",
+            contact_email=f"buyer{i}@example.com",
+            contact_phone="+254700000000",
+            company_name=f"Company {i % 500}",
+            uniform_type="Security Uniforms",
+            quantity=10 + i % 90,
+            requirements="Navy trousers and shirts with embroidered logo",
+            status=STATUSES[i % len(STATUSES)],
+        ))
+    session.commit()
+
+
+def orm_quotes(session: Session) -> bytes:
+    """Previous path - ORM instances validated into QuoteResponse"""
+    quotes = session.exec(select(Quote).order_by(Quote.created_at.desc())).all()
+    items = [QuoteResponse.model_validate(quote).model_dump(mode="json") for quote in quotes]
+    return json.dumps(items).encode()
+
+
+def row_quotes(session: Session) -> bytes:
+    rows = quote_rows(session, select_quote_rows().order_by(Quote.created_at.desc()))
+    return RowsResponse(content=rows).body
+
+
+def orm_products(session: Session) -> bytes:
+    """Previous path - ORM instances (category lazy loaded) validated into ProductResponse"""
+    products = session.exec(select(Product).where(Product.is_active == True)).all()
+    items = [ProductResponse.model_validate(product).model_dump(mode="json") for product in products]
+    return json.dumps(items).encode()
+
+
+def row_products(session: Session) -> bytes:
+    rows = product_rows(session, select_product_rows().where(Product.is_active == True))
+    return RowsResponse(content=rows).body
+
+
+def measure(label: str, engine, build, rounds: int = 5):
+    timings = []
+    for _ in range(rounds):
+        # Fresh session per round, like one request each
+        with Session(engine) as session:
+            started = time.perf_counter()
+            payload = build(session)
+            timings.append(time.perf_counter() - started)
+
+    with Session(engine) as session:
+        tracemalloc.start()
+        build(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    timings.sort()
+    print(
+        f"{label:<16} {len(payload) / 1024:>9.1f} KiB "
+        f"{timings[len(timings) // 2] * 1000:>9.1f} ms {peak / 1024 / 1024:>9.1f} MiB"
+    )
+    return payload
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, count)
+
+    print(f"{count} quotes and products")
+    print(f"{'variant':<16} {'payload':>13} {'median':>12} {'peak':>13}")
+    for name, orm_build, row_build in (
+        ("quotes", orm_quotes, row_quotes),
+        ("products", orm_products, row_products),
+    ):
+        expected = measure(f"{name} orm", engine, orm_build)
+        actual = measure(f"{name} rows", engine, row_build)
+        if json.loads(expected) != json.loads(actual):
+            print(f"⚠️  {name}: row output differs from the ORM output")
+
+
+if __name__ == "__main__":
+    main()
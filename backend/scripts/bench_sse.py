@@ -0,0 +1,86 @@
+"""
+Quote Event Stream Benchmark - many idle SSE connections on one worker
+
+Opens N admin event streams against a running server, then submits a quote
+and measures how long the quote_created event takes to reach every stream.
+Raise the open file limit first (ulimit -n) for large N.
+
+Usage: python scripts/bench_sse.py <base_url> <admin_access_token> [connections]
+"""
+import asyncio
+import sys
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+QUOTE = {
+    "contact_name": "Bench",
+    "contact_email": "bench@example.com",
+    "contact_phone": "0700000000",
+    "company_name": "Bench Ltd",
+    "uniform_type": "Security Uniforms",
+    "quantity": 10,
+    "requirements": "Benchmark quote",
+}
+
+
+async def open_stream(host: str, port: int, ticket: str):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"GET /api/v1/quotes/events?ticket={ticket} HTTP/1.1\r\n"
+        f"Host: {host}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+
+    status = await reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(f"Stream rejected: {status.decode().strip()}")
+    await reader.readuntil(b"retry:")
+    return reader, writer
+
+
+async def wait_for_event(reader, event: bytes) -> float:
+    await reader.readuntil(event)
+    return time.perf_counter()
+
+
+async def main():
+    base_url, token = sys.argv[1], sys.argv[2]
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    url = urlsplit(base_url)
+
+    started = time.perf_counter()
+    streams = []
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"}) as client:
+        for start in range(0, count, 200):
+            # Tickets are short-lived - one per batch of connections
+            response = await client.post("/api/v1/quotes/events/ticket")
+            response.raise_for_status()
+            ticket = response.json()["ticket"]
+            streams += await asyncio.gather(*(
+                open_stream(url.hostname, url.port or 80, ticket) for _ in range(min(200, count - start))
+            ))
+    print(f"Opened {len(streams)} streams in {time.perf_counter() - started:.1f}s")
+
+    # Let the connections go idle
+    await asyncio.sleep(2)
+
+    waiters = [asyncio.create_task(wait_for_event(reader, b"event: quote_created")) for reader, _ in streams]
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        published = time.perf_counter()
+        response = await client.post("/api/v1/quotes/", json=QUOTE)
+        response.raise_for_status()
+
+    received = sorted(timestamp - published for timestamp in await asyncio.gather(*waiters))
+    print(f"Fan-out to {len(received)} streams: "
+          f"p50 {received[len(received) // 2] * 1000:.1f} ms, "
+          f"p99 {received[int(len(received) * 0.99)] * 1000:.1f} ms, "
+          f"max {received[-1] * 1000:.1f} ms")
+
+    for _, writer in streams:
+        writer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""
+Startup Benchmark - import time and time to first ready request
+
+Starts uvicorn in a subprocess and polls /health/ready until the worker
+reports ready, then requests a catalog endpoint.
+Usage: python scripts/bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def import_seconds() -> float:
+    """Time `import app.main` in a fresh interpreter"""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    output = subprocess.check_output([sys.executable, "-c", code], env=os.environ.copy())
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def wait_for(url: str, deadline: float) -> bool:
+    """Poll `url` until it answers 200"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+    return False
+
+
+def first_request_seconds() -> tuple[float, float]:
+    """Seconds from process start until ready, and until the first catalog response"""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=os.environ.copy()
+    )
+    try:
+        if not wait_for(f"{BASE_URL}/health/ready", started + 60):
+            raise RuntimeError("Server did not become ready")
+        ready = time.perf_counter() - started
+        urllib.request.urlopen(f"{BASE_URL}/api/v1/categories/", timeout=10).read()
+        return ready, time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    imports = sorted(import_seconds() for _ in range(runs))
+    starts = sorted(first_request_seconds() for _ in range(runs))
+
+    print(f"import app.main (median of {runs}):      {imports[runs // 2] * 1000:.0f} ms")
+    print(f"process start -> ready (median):        {starts[runs // 2][0] * 1000:.0f} ms")
+    print(f"process start -> first response (median): {starts[runs // 2][1] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
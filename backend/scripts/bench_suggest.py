@@ -0,0 +1,87 @@
+"""
+Suggest Index Benchmark - memory footprint, lookup latency (mean and slowest
+query) and the cost of an incremental product write
+
+Usage: python scripts/bench_suggest.py [product_count]
+"""
+import random
+import string
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.suggest import SuggestIndex
+
+ProductRow = namedtuple("ProductRow", "id name sku slug is_featured")
+CategoryRow = namedtuple("CategoryRow", "id name slug product_count")
+
+WORDS = [
+    "security", "guard", "uniform", "chef", "medical", "scrubs", "corporate", "polo",
+    "shirt", "reflective", "safety", "vest", "school", "sports", "jersey", "industrial",
+    "coverall", "cotton", "navy", "white", "black", "premium", "heavy", "duty", "set",
+]
+
+
+def make_catalog(count: int):
+    """Generate a synthetic catalog"""
+    rng = random.Random(42)
+    categories = [
+        CategoryRow(uuid4(), f"Category {i}", f"category-{i}", count // 50)
+        for i in range(50)
+    ]
+    products = []
+    for i in range(count):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+        sku = "".join(rng.choices(string.ascii_uppercase, k=3)) + f"-{i:06d}"
+        products.append(ProductRow(uuid4(), name.title(), sku, f"p-{i}", rng.random() < 0.05))
+    units_sold = {str(p.id): rng.randint(0, 500) for p in products[: count // 10]}
+    return products, categories, units_sold
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    products, categories, units_sold = make_catalog(count)
+
+    index = SuggestIndex()
+    tracemalloc.start()
+    started = time.perf_counter()
+    index.build(products, categories, units_sold)
+    build_seconds = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    queries = ["se", "sec", "med", "scrubs s", "pol", "abc-00", "cat", "h", "white c", "zzz"]
+    rounds = 2000
+    per_query_us = {}
+    for query in queries:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            index.suggest(query, 10)
+        per_query_us[query] = (time.perf_counter() - started) / rounds * 1e6
+    slowest = max(per_query_us, key=per_query_us.get)
+
+    product = products[0]
+    writes = 50
+    started = time.perf_counter()
+    for i in range(writes):
+        index.upsert_product(SimpleNamespace(
+            id=product.id, name=f"{product.name} {i}", sku=product.sku, slug=product.slug,
+            is_featured=product.is_featured, is_active=True
+        ))
+    write_ms = (time.perf_counter() - started) / writes * 1000
+
+    print(f"products:            {count}")
+    print(f"index entries:       {len(index)}")
+    print(f"build time:          {build_seconds:.2f} s")
+    print(f"index memory:        {current / 1024 / 1024:.1f} MiB "
+          f"({current / 1024 / 1024 * 100_000 / count:.1f} MiB per 100k products)")
+    print(f"mean lookup latency: {sum(per_query_us.values()) / len(per_query_us):.1f} us")
+    print(f"slowest query:       {slowest!r} {per_query_us[slowest]:.1f} us")
+    print(f"product write:       {write_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Catalog Snapshot Job - Compile the memory-mapped catalog snapshot
+
+Run on each host before starting (or restarting) the workers so they map a
+current catalog at startup instead of warming from the database.
+Usage: python scripts/build_catalog_snapshot.py
+"""
+import time
+
+from sqlmodel import Session, create_engine
+
+from app.core.config import settings
+from app.services.catalog_snapshot import build_snapshot, snapshot_lock
+
+
+def main():
+    engine = create_engine(settings.DATABASE_URL)
+
+    started = time.perf_counter()
+    with snapshot_lock(), Session(engine) as session:
+        version = build_snapshot(session)
+
+    print(f"✅ Built catalog snapshot v{version} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
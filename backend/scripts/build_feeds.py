@@ -0,0 +1,32 @@
+"""
+Feed Build Job - Regenerate sitemaps and product feeds
+
+Incremental by default: only shards with products changed since the last
+build are regenerated (run e.g. every 15 minutes from cron).
+Usage: python scripts/build_feeds.py [--full]
+"""
+import sys
+import time
+
+from sqlmodel import Session, create_engine
+
+from app.core.config import settings
+from app.services.feeds import build_feeds
+
+
+def main():
+    engine = create_engine(settings.DATABASE_URL)
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        summary = build_feeds(session, full="--full" in sys.argv[1:])
+
+    if summary is None:
+        print("⚠️  Another feed build is running")
+        return
+
+    print(f"✅ Built feeds in {time.perf_counter() - started:.1f}s: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Recommendation Build Job - Recompute related products from all orders
+
+Rebuilds order pair counts and the "bought together" / "similar" top-K lists
+in one transaction (e.g. nightly from cron).
+Usage: python scripts/build_recommendations.py
+"""
+import time
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.services.recommendations import build_recommendations
+
+
+def main():
+    engine = create_engine(settings.DATABASE_URL)
+    SQLModel.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        written = build_recommendations(session)
+        session.commit()
+
+    print(f"✅ Wrote {written} recommendations in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
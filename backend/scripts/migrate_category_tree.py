@@ -0,0 +1,54 @@
+"""
+Schema Migration - parent_id and materialized paths for nested categories
+
+Adds categories.parent_id and categories.path (byte-ordered "C" collation
+on Postgres so path range scans use the index), makes every existing
+category a root ("/<id hex>/") and indexes products.category_id for subtree
+product queries.
+
+Safe to re-run. Usage: python scripts/migrate_category_tree.py
+"""
+from sqlalchemy import inspect, text
+from sqlmodel import create_engine
+
+from app.core.config import settings
+
+
+def migrate() -> None:
+    engine = create_engine(settings.DATABASE_URL)
+    postgres = engine.dialect.name == "postgresql"
+
+    columns = {column["name"] for column in inspect(engine).get_columns("categories")}
+    with engine.begin() as connection:
+        if "parent_id" not in columns:
+            parent_type = "UUID" if postgres else "CHAR(32)"
+            connection.execute(text(
+                f"ALTER TABLE categories ADD COLUMN parent_id {parent_type} REFERENCES categories (id)"
+            ))
+            print("✅ Added categories.parent_id")
+
+        if "path" not in columns:
+            collation = ' COLLATE "C"' if postgres else ""
+            connection.execute(text(
+                f"ALTER TABLE categories ADD COLUMN path VARCHAR(1000){collation} NOT NULL DEFAULT ''"
+            ))
+            print("✅ Added categories.path")
+
+        # UUIDs are stored as 32 hex characters on SQLite and as uuid on Postgres
+        id_hex = "replace(id::text, '-', '')" if postgres else "lower(id)"
+        backfilled = connection.execute(text(
+            f"UPDATE categories SET path = '/' || {id_hex} || '/' WHERE path = ''"
+        )).rowcount
+        print(f"✅ Backfilled {backfilled} category paths")
+
+        for name, table, column in (
+            ("ix_categories_parent_id", "categories", "parent_id"),
+            ("ix_categories_path", "categories", "path"),
+            ("ix_products_category_id", "products", "category_id"),
+        ):
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"))
+            print(f"✅ Ensured index {name}")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,86 @@
+"""
+Schema Migration - change_seq columns for catalog delta sync
+
+Adds the indexed change_seq column to products and categories and creates
+the change_sequences table. Existing rows (still at version 0) are then
+given one version each, in created_at order, so the first syncs after the
+migration page through them like any other writes instead of receiving one
+version holding the whole catalog.
+
+Safe to re-run. Usage: python scripts/migrate_change_seq.py
+"""
+from sqlalchemy import inspect, insert, select, text, update
+from sqlmodel import create_engine
+
+from app.core.config import settings
+from app.models import ChangeSequence
+from app.services.sync import CATALOG_SEQUENCE
+
+TABLES = ("categories", "products")
+
+
+def reserve_versions(connection, count: int) -> int:
+    """
+    Take `count` catalog versions at once; returns the last version before them
+    """
+    result = connection.execute(
+        update(ChangeSequence)
+        .where(ChangeSequence.name == CATALOG_SEQUENCE)
+        .values(value=ChangeSequence.value + count)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(ChangeSequence).values(name=CATALOG_SEQUENCE, value=count))
+
+    value = connection.execute(
+        select(ChangeSequence.value).where(ChangeSequence.name == CATALOG_SEQUENCE)
+    ).scalar_one()
+    return value - count
+
+
+def number_unversioned_rows(connection, table: str) -> int:
+    """
+    Give each row of `table` still at version 0 its own version
+    """
+    count = connection.execute(text(f"SELECT count(*) FROM {table} WHERE change_seq = 0")).scalar()
+    if not count:
+        return 0
+
+    base = reserve_versions(connection, count)
+    connection.execute(
+        text(
+            f"UPDATE {table} SET change_seq = numbered.seq FROM ("
+            f"SELECT id, :base + ROW_NUMBER() OVER (ORDER BY created_at, id) AS seq "
+            f"FROM {table} WHERE change_seq = 0"
+            f") AS numbered WHERE {table}.id = numbered.id"
+        ),
+        {"base": base}
+    )
+    return count
+
+
+def migrate() -> None:
+    engine = create_engine(settings.DATABASE_URL)
+
+    ChangeSequence.__table__.create(engine, checkfirst=True)
+
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in TABLES:
+            columns = {column["name"] for column in inspector.get_columns(table)}
+            if "change_seq" not in columns:
+                connection.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0"
+                ))
+                print(f"✅ Added {table}.change_seq")
+
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_change_seq ON {table} (change_seq)"
+            ))
+            print(f"✅ Ensured index ix_{table}_change_seq")
+
+            numbered = number_unversioned_rows(connection, table)
+            print(f"✅ Gave {numbered} existing {table} rows their own version")
+
+
+if __name__ == "__main__":
+    migrate()
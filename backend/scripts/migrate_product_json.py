@@ -0,0 +1,150 @@
+"""
+Data Migration - Product features/specifications/images to native JSON
+
+Older rows hold these columns as TEXT with serialized (or hand-entered)
+JSON. This script:
+1. normalizes every value into valid JSON (plain text features become a
+   list, a bare URL becomes a one-item image list, unparseable
+   specifications are dropped and reported)
+2. on Postgres, converts the columns to JSONB and builds the GIN indexes
+
+Safe to re-run. Usage: python scripts/migrate_product_json.py
+"""
+import json
+
+from sqlalchemy import text
+from sqlmodel import create_engine
+
+from app.core.config import settings
+
+BATCH_SIZE = 1000
+
+# column -> expected JSON type
+COLUMNS = {
+    "features": list,
+    "specifications": dict,
+    "images": list,
+}
+
+GIN_INDEXES = {
+    "ix_products_specifications_gin": "specifications",
+    "ix_products_features_gin": "features",
+}
+
+
+def normalize(column: str, raw):
+    """
+    Return the JSON value a stored column value should become (None clears it)
+    """
+    if raw is None:
+        return None
+    if not isinstance(raw, str):
+        # Already a native JSON value
+        return raw
+
+    stripped = raw.strip()
+    if not stripped:
+        return None
+
+    try:
+        value = json.loads(stripped)
+    except ValueError:
+        value = None
+
+    expected = COLUMNS[column]
+    if isinstance(value, expected):
+        return value
+
+    if expected is list:
+        # "Reflective strips, Multiple pockets" or one item per line
+        separator = "\n" if "\n" in stripped else ","
+        return [item.strip() for item in stripped.split(separator) if item.strip()]
+
+    return None
+
+
+def column_type(connection, column: str) -> str:
+    return connection.execute(
+        text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'products' AND column_name = :column"
+        ),
+        {"column": column}
+    ).scalar()
+
+
+def normalize_rows(engine) -> None:
+    """
+    Rewrite every TEXT value that is not already the expected JSON, in batches
+    """
+    columns = ", ".join(COLUMNS)
+    updates = []
+    dropped = 0
+
+    with engine.connect() as connection:
+        rows = connection.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(
+            text(f"SELECT id, {columns} FROM products")
+        )
+        for row in rows:
+            changes = {}
+            for column in COLUMNS:
+                raw = getattr(row, column)
+                if not isinstance(raw, str):
+                    continue
+
+                value = normalize(column, raw)
+                if value is None and raw.strip():
+                    dropped += 1
+                    print(f"⚠️  Dropping unparseable {column} of product {row.id}: {raw[:60]!r}")
+
+                serialized = json.dumps(value) if value is not None else None
+                if serialized != raw:
+                    changes[column] = serialized
+
+            if changes:
+                updates.append((row.id, changes))
+
+    for start in range(0, len(updates), BATCH_SIZE):
+        with engine.begin() as connection:
+            for product_id, changes in updates[start:start + BATCH_SIZE]:
+                assignments = ", ".join(f"{column} = :{column}" for column in changes)
+                connection.execute(
+                    text(f"UPDATE products SET {assignments} WHERE id = :id"),
+                    {"id": product_id, **changes}
+                )
+
+    print(f"✅ Normalized {len(updates)} products ({dropped} values dropped)")
+
+
+def convert_postgres(engine) -> None:
+    """
+    Change the columns to JSONB and build the GIN indexes
+    """
+    with engine.begin() as connection:
+        for column in COLUMNS:
+            if column_type(connection, column) != "jsonb":
+                connection.execute(text(
+                    f"ALTER TABLE products ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"
+                ))
+                print(f"✅ Converted products.{column} to JSONB")
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for index, column in GIN_INDEXES.items():
+            connection.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON products USING GIN ({column})"
+            ))
+            print(f"✅ Ensured GIN index {index}")
+
+
+def migrate() -> None:
+    engine = create_engine(settings.DATABASE_URL)
+
+    normalize_rows(engine)
+
+    if engine.dialect.name == "postgresql":
+        convert_postgres(engine)
+
+
+if __name__ == "__main__":
+    migrate()
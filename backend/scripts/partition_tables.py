@@ -0,0 +1,36 @@
+"""
+Schema Migration - Monthly partitioning for quotes and orders (Postgres)
+
+Rebuilds the quotes and orders tables as tables partitioned by month of
+created_at, copying every row and recording its number in record_numbers
+(see app.services.partitions). Each table is
+converted in its own transaction; stop the API first, since the tables are
+locked while their rows are copied.
+
+Safe to re-run. Usage: python scripts/partition_tables.py
+"""
+from sqlmodel import create_engine
+
+from app.core.config import settings
+from app.services.partitions import PARTITIONED_TABLES, convert_to_partitioned, is_partitioned
+
+
+def migrate() -> None:
+    engine = create_engine(settings.DATABASE_URL)
+
+    if engine.dialect.name != "postgresql":
+        print("⚠️  Partitioning needs Postgres - nothing to do")
+        return
+
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as connection:
+            if is_partitioned(connection, table):
+                print(f"✅ {table} is already partitioned")
+                continue
+
+            copied = convert_to_partitioned(connection, table, settings.PARTITION_MONTHS_AHEAD)
+            print(f"✅ Partitioned {table} by month ({copied} rows copied)")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,34 @@
+"""
+Analytics Rollup Job - Backfill or reconcile the admin stats tables
+
+Without arguments, compares the rollups with the quotes/orders tables and
+fixes rows that drifted (safe to run periodically, e.g. nightly from cron).
+With --rebuild, recomputes every rollup from scratch (first deployment).
+
+Usage: python scripts/reconcile_rollups.py [--rebuild]
+"""
+import sys
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.services.analytics import rebuild_rollups, reconcile_rollups
+
+
+def main():
+    engine = create_engine(settings.DATABASE_URL)
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        if "--rebuild" in sys.argv[1:]:
+            rebuild_rollups(session)
+            session.commit()
+            print("✅ Rebuilt analytics rollups")
+        else:
+            corrected = reconcile_rollups(session)
+            session.commit()
+            print(f"✅ Reconciled analytics rollups ({corrected} rows corrected)")
+
+
+if __name__ == "__main__":
+    main()
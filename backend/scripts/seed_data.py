@@ -6,6 +6,9 @@ from sqlmodel import Session, create_engine
 from app.core.config import settings
 from app.core.security import hash_password
 from app.models import User, Category, Product
+from app.services.facets import rebuild_facet_counts
+import app.services.sync  # noqa: F401 - stamps catalog versions for delta sync
+import app.services.category_tree  # noqa: F401 - assigns category paths
 from datetime import datetime
 from slugify import slugify
 from decimal import Decimal
@@ -148,6 +151,11 @@ def seed_database():
         session.commit()
         print(f"✅ Created {len(products_data)} products")
         
+        # Backfill facet counts for the seeded catalog
+        rebuild_facet_counts(session)
+        session.commit()
+        print("✅ Computed product facet counts")
+        
         print("\n🎉 Database seeding completed successfully!")
         print("\n📝 Admin Credentials:")
         print("   Email: admin@sentengfashions.com")